@@ -0,0 +1,218 @@
+# auto_fixes.py
+# Correção automática de valores por regras nomeadas (escolhidas pelo usuário).
+# Lógica sem dependência de interface (usada pela UI e pela CLI).
+
+import csv
+import io
+import os
+from lxml import etree
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Importa do projeto local
+from .constants import DEFAULT_ENCODING, NUMERIC_FIELDS
+from .location import Location
+from .verification import run_verification_checks_on_tree
+from .backup_store import backup_file
+from .splice_writer import SpliceWriter
+
+# Regras disponíveis: nome -> (rótulo, descrição). Nenhuma é aplicada sem ser pedida.
+AUTO_FIX_RULES: Dict[str, Tuple[str, str]] = {
+    "virgula_decimal": ("Vírgula decimal", "Troca a vírgula decimal por ponto nos campos numéricos (ex.: '12,5' -> '12.5')."),
+    "quantidade_ids": ("QUANTIDADE = nº de IDs", "Ajusta QUANTIDADE ao número de IDs da PECA, em LISTAID ou soltos (PECAs com pelo menos um ID)."),
+    "espacos_bordas": ("Espaços nas bordas", "Remove espaços antes/depois do valor dos campos de uma PECA (campos só com espaços não têm o que aproveitar e ficam como estão)."),
+}
+
+_PECA_NUMERIC_FIELDS = frozenset(NUMERIC_FIELDS)
+
+def parse_rule_names(text: str) -> Tuple[str, ...]:
+    """Converte 'regra1,regra2' (ou 'todas') em nomes de regras; ValueError se alguma não existe."""
+    names = [name.strip() for name in text.split(",") if name.strip()]
+    if names == ["todas"]:
+        return tuple(AUTO_FIX_RULES)
+    unknown = [name for name in names if name not in AUTO_FIX_RULES]
+    if unknown or not names:
+        raise ValueError(f"Regra(s) de correção desconhecida(s): {', '.join(unknown) or text!r}. "
+                         f"Disponíveis: {', '.join(AUTO_FIX_RULES)} ou todas.")
+    return tuple(dict.fromkeys(names))
+
+def _number(text: Optional[str]) -> Optional[float]:
+    """Mesma conversão da verificação (aceita vírgula decimal)."""
+    try:
+        return float(text.strip().replace(',', '.'))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+def _sibling_ordinals(parent: etree._Element) -> Dict[etree._Element, Tuple[int, int]]:
+    """filho -> (posição entre os irmãos de mesma tag, total de irmãos com a tag), em uma passada."""
+    totals: Dict[str, int] = {}
+    for child in parent:
+        totals[child.tag] = totals.get(child.tag, 0) + 1
+    seen: Dict[str, int] = {}
+    ordinals = {}
+    for child in parent:
+        seen[child.tag] = ordinal = seen.get(child.tag, 0) + 1
+        ordinals[child] = (ordinal, totals[child.tag])
+    return ordinals
+
+def _relative_path(element: etree._Element, peca: etree._Element,
+                   cache: Dict[etree._Element, Dict[etree._Element, Tuple[int, int]]]) -> str:
+    """
+    Caminho de element a partir da PECA ("/TABELAACO/POSICAO[2]/QTDE"); TAG[i] só quando a tag se repete.
+    cache guarda as posições dos filhos de cada pai já visto (sem recontar a cada alteração).
+    """
+    steps = []
+    while element is not peca:
+        parent = element.getparent()
+        ordinals = cache.get(parent)
+        if ordinals is None:
+            ordinals = cache[parent] = _sibling_ordinals(parent)
+        ordinal, total = ordinals[element]
+        steps.append(f"{element.tag}[{ordinal}]" if total > 1 else element.tag)
+        element = parent
+    return "".join("/" + step for step in reversed(steps))
+
+class AutoFixReport:
+    """
+    Resultado da correção automática de um arquivo: alterações feitas, cada uma como
+    (regra, Location, valor anterior, valor novo), e erro, se o arquivo não pôde ser
+    corrigido. Objeto simples (picklable).
+    """
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.changes: List[Tuple[str, Location, str, str]] = []
+        self.written = False
+        self.error: Optional[str] = None
+
+    def counts(self) -> Dict[str, int]:
+        """Número de alterações por regra."""
+        counts = {}
+        for rule, _, _, _ in self.changes:
+            counts[rule] = counts.get(rule, 0) + 1
+        return counts
+
+    def messages(self) -> List[Tuple[str, str, object]]:
+        """Resultados (type, description, location) que descrevem as alterações."""
+        if self.error is not None:
+            return [("Erro", self.error, "Correção Automática")]
+        return [("Info", f"Correção automática ({AUTO_FIX_RULES[rule][0]}): '{old}' -> '{new}'", location)
+                for rule, location, old, new in self.changes]
+
+class _AutoFixer:
+    """Aplica as regras escolhidas percorrendo a árvore uma única vez."""
+    def __init__(self, rules: Iterable[str], report: AutoFixReport, writer: SpliceWriter):
+        rules = set(rules)
+        self.fix_commas = "virgula_decimal" in rules
+        self.fix_quantity = "quantidade_ids" in rules
+        self.fix_spaces = "espacos_bordas" in rules
+        self.report = report
+        self.writer = writer
+        self._ordinals = {} # Pai -> posições dos filhos (da PECA em andamento)
+
+    def _change(self, rule: str, element, peca, peca_no: int, new: str):
+        path = _relative_path(element, peca, self._ordinals)
+        self.report.changes.append((rule, Location.of(element, peca_no, path), element.text, new))
+        self.writer.set_text(element, new)
+
+    def run(self, root: etree._Element) -> bool:
+        pecas = [] # (PECA, ordinal) abertas; o caminho é relativo à mais interna
+        peca_count = 0
+        for event, elem in etree.iterwalk(root, events=("start", "end")):
+            tag = elem.tag
+            if not isinstance(tag, str): continue # Comentários / instruções de processamento
+            if tag == "PECA":
+                if event == "start":
+                    peca_count += 1
+                    pecas.append((elem, peca_count))
+                    if self.fix_quantity:
+                        self._fix_quantity(elem, peca_count)
+                else:
+                    pecas.pop()
+                    self._ordinals.clear()
+                continue
+            if event != "start" or not pecas or len(elem) or not elem.text:
+                continue
+            # Campo (folha) dentro de uma PECA
+            peca, peca_no = pecas[-1]
+            text = elem.text
+            if self.fix_spaces:
+                stripped = text.strip()
+                if stripped and stripped != text:
+                    self._change("espacos_bordas", elem, peca, peca_no, stripped)
+                    text = stripped
+            if self.fix_commas and ',' in text:
+                parent_tag = elem.getparent().tag
+                if ((parent_tag == "PECA" and tag in _PECA_NUMERIC_FIELDS) or (tag == "QTDE" and parent_tag == "POSICAO")) \
+                        and _number(text) is not None:
+                    self._change("virgula_decimal", elem, peca, peca_no, text.replace(',', '.'))
+        return bool(self.report.changes)
+
+    def _fix_quantity(self, peca: etree._Element, peca_no: int):
+        quantidade = peca.find("QUANTIDADE")
+        if quantidade is None: return # Campo ausente: estrutura, não valor
+        # IDs da PECA como a correção estrutural os deixa: em LISTAID e soltos (movidos para LISTAID)
+        num_ids = (sum(1 for listaid in peca.iterchildren("LISTAID") for _ in listaid.iterchildren("ID"))
+                   + sum(1 for _ in peca.iterchildren("ID")))
+        if num_ids == 0: return # Sem IDs não há como inferir a quantidade
+        value = _number(quantidade.text)
+        if value is not None and value.is_integer() and int(value) == num_ids: return
+        self._change("quantidade_ids", quantidade, peca, peca_no, str(num_ids))
+
+def auto_fix_file(file_path: str, rules: Tuple[str, ...], backup: bool = False,
+                  verify: bool = True) -> Tuple[AutoFixReport, Optional[List[Tuple[str, str, str, object]]]]:
+    """
+    Lê e analisa o arquivo uma vez, aplica as regras em uma única passada pela árvore
+    e grava o resultado (só se houve alteração, trocando só os textos alterados; com
+    backup, guarda antes os bytes lidos no repositório de backups). Arquivos mal
+    formados não são alterados (corrija a estrutura antes).
+    Com verify, revalida a árvore final em memória e retorna também os resultados
+    [(arquivo, type, description, location)]; senão o segundo item é None.
+    """
+    report = AutoFixReport(file_path)
+    try:
+        with open(file_path, 'rb') as f: data = f.read()
+        parser = etree.XMLParser(remove_blank_text=False, encoding=DEFAULT_ENCODING)
+        tree = etree.parse(io.BytesIO(data), parser, base_url=file_path)
+    except etree.XMLSyntaxError as e:
+        report.error = f"XML mal formado, correção automática não aplicada (use a correção estrutural): {e}"
+        return report, None
+    except Exception as e:
+        report.error = f"Erro ao ler arquivo: {e}"
+        return report, None
+
+    writer = SpliceWriter(data)
+    if _AutoFixer(rules, report, writer).run(tree.getroot()):
+        try:
+            if backup:
+                backup_file(file_path, data, "Correção Automática")
+            writer.write(file_path, tree, want_tree=verify)
+            report.written = True
+        except Exception as e:
+            report.error = f"Erro ao salvar arquivo após correção automática: {e}"
+            return report, None
+        if verify:
+            # Mesma árvore se as linhas não mudaram; senão a dos bytes gravados
+            tree = writer.tree
+    return report, run_verification_checks_on_tree(file_path, tree) if verify else None
+
+def summarize_reports(reports: Iterable[AutoFixReport]) -> Dict[str, Tuple[int, int]]:
+    """Por regra: (alterações, arquivos alterados)."""
+    summary = {}
+    for report in reports:
+        for rule, count in report.counts().items():
+            changes, files = summary.get(rule, (0, 0))
+            summary[rule] = (changes + count, files + 1)
+    return summary
+
+AUTO_FIX_HEADER = ["Arquivo", "Regra", "Localização", "Valor anterior", "Valor novo"]
+
+def write_auto_fix_csv(reports: Iterable[AutoFixReport], stream):
+    """Grava o relatório de alterações (uma linha por alteração, agrupadas por regra) em um stream de texto."""
+    writer = csv.writer(stream, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+    writer.writerow(AUTO_FIX_HEADER)
+    reports = list(reports)
+    for rule, (label, _) in AUTO_FIX_RULES.items():
+        for report in reports:
+            base_name = os.path.basename(report.file_path)
+            for change_rule, location, old, new in report.changes:
+                if change_rule == rule:
+                    writer.writerow([base_name, label, location, old, new])
@@ -0,0 +1,205 @@
+# backup_store.py
+# Backups dos arquivos antes das correções: conteúdo comprimido (zlib) e endereçado
+# pelo hash, com várias gerações por arquivo. Não importa tkinter.
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+# Importa do projeto local
+from .constants import BACKUP_DIR, BACKUP_MAX_GENERATIONS
+
+BACKUP_DB_NAME = "backups.sqlite3"
+_COMPRESS_LEVEL = 6 # zlib: boa taxa em XML e descompressão rápida na restauração
+
+def _path_key(file_path: str) -> str:
+    return os.path.normcase(os.path.abspath(file_path))
+
+class BackupGeneration:
+    """Uma versão guardada de um arquivo (os bytes ficam no objeto de hash digest)."""
+    def __init__(self, generation_id: int, file_path: str, digest: str, size: int, stored_size: int,
+                 created: float, label: str):
+        self.id = generation_id
+        self.file_path = file_path
+        self.digest = digest
+        self.size = size
+        self.stored_size = stored_size
+        self.created = created
+        self.label = label
+
+    def describe(self) -> str:
+        """Texto curto para listas: data/hora, motivo e tamanho."""
+        when = time.strftime("%d/%m/%Y %H:%M:%S", time.localtime(self.created))
+        return f"{when} - {self.label or 'Backup'} ({self.size:,} bytes)".replace(",", ".")
+
+class BackupStore:
+    """
+    Repositório de backups em disco. Cada conteúdo distinto é gravado uma única vez,
+    comprimido, em objects/<hash[:2]>/<hash> (SHA-256 dos bytes originais); um banco
+    SQLite registra as gerações de cada arquivo (caminho, hash, data, motivo).
+    Guardar um conteúdo que já existe custa só uma linha no banco; cada arquivo
+    mantém até max_generations gerações e objetos sem referência são apagados.
+    Vários processos podem gravar ao mesmo tempo: as alterações nos objetos são
+    feitas sob o bloqueio de escrita do banco (e, no processo, sob um lock, pois a
+    conexão é compartilhada entre threads).
+    """
+    def __init__(self, store_dir: str = BACKUP_DIR, max_generations: int = BACKUP_MAX_GENERATIONS):
+        self.store_dir = store_dir
+        self.max_generations = max_generations
+        self._lock = threading.RLock()
+        os.makedirs(os.path.join(store_dir, "objects"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(store_dir, BACKUP_DB_NAME), timeout=60,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS objects (
+                                  digest TEXT PRIMARY KEY, size INTEGER NOT NULL, stored_size INTEGER NOT NULL)""")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS generations (
+                                  id INTEGER PRIMARY KEY AUTOINCREMENT, path TEXT NOT NULL, file_path TEXT NOT NULL,
+                                  digest TEXT NOT NULL, created REAL NOT NULL, label TEXT NOT NULL)""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS generations_path ON generations (path, id)")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.store_dir, "objects", digest[:2], digest)
+
+    def _write_object(self, digest: str, compressed: bytes):
+        """Grava o objeto de forma atômica (arquivo temporário + rename)."""
+        path = self._object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f: f.write(compressed)
+            os.replace(temp_path, path)
+        except BaseException:
+            try: os.remove(temp_path)
+            except OSError: pass
+            raise
+
+    def save(self, file_path: str, data: Optional[bytes] = None, label: str = "") -> BackupGeneration:
+        """
+        Guarda o conteúdo atual do arquivo (ou data, os bytes já lidos dele) como nova
+        geração. Se a geração mais recente já tem esse conteúdo, apenas a retorna.
+        """
+        if data is None:
+            with open(file_path, 'rb') as f: data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        key = _path_key(file_path)
+        # Comprime fora do bloqueio (só se o objeto ainda não existe)
+        compressed = None if os.path.exists(self._object_path(digest)) else zlib.compress(data, _COMPRESS_LEVEL)
+        conn = self._conn
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                latest = conn.execute("SELECT id, digest FROM generations WHERE path = ? ORDER BY id DESC LIMIT 1",
+                                      (key,)).fetchone()
+                if latest is not None and latest[1] == digest and os.path.exists(self._object_path(digest)):
+                    generation_id = latest[0]
+                else:
+                    row = conn.execute("SELECT stored_size FROM objects WHERE digest = ?", (digest,)).fetchone()
+                    if row is None or not os.path.exists(self._object_path(digest)):
+                        if compressed is None:
+                            compressed = zlib.compress(data, _COMPRESS_LEVEL)
+                        self._write_object(digest, compressed)
+                        conn.execute("INSERT OR REPLACE INTO objects (digest, size, stored_size) VALUES (?, ?, ?)",
+                                     (digest, len(data), len(compressed)))
+                    cursor = conn.execute("INSERT INTO generations (path, file_path, digest, created, label) VALUES (?, ?, ?, ?, ?)",
+                                          (key, os.path.abspath(file_path), digest, time.time(), label))
+                    generation_id = cursor.lastrowid
+                    self._prune(key)
+                generation = self._generation(generation_id)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return generation
+
+    def _prune(self, key: str):
+        """Descarta as gerações além do limite e os objetos que ficaram sem referência."""
+        old = self._conn.execute("SELECT id, digest FROM generations WHERE path = ? ORDER BY id DESC LIMIT -1 OFFSET ?",
+                                 (key, self.max_generations)).fetchall()
+        if not old:
+            return
+        self._conn.executemany("DELETE FROM generations WHERE id = ?", ((generation_id,) for generation_id, _ in old))
+        for digest in {digest for _, digest in old}:
+            if self._conn.execute("SELECT 1 FROM generations WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+                self._conn.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+                try: os.remove(self._object_path(digest))
+                except OSError: pass
+
+    def _generation(self, generation_id: int) -> BackupGeneration:
+        row = self._conn.execute("""SELECT g.id, g.file_path, g.digest, o.size, o.stored_size, g.created, g.label
+                                    FROM generations g JOIN objects o ON o.digest = g.digest WHERE g.id = ?""",
+                                 (generation_id,)).fetchone()
+        return BackupGeneration(*row)
+
+    def generations(self, file_path: str) -> List[BackupGeneration]:
+        """Gerações guardadas do arquivo, da mais recente para a mais antiga."""
+        with self._lock:
+            rows = self._conn.execute("""SELECT g.id, g.file_path, g.digest, o.size, o.stored_size, g.created, g.label
+                                         FROM generations g JOIN objects o ON o.digest = g.digest
+                                         WHERE g.path = ? ORDER BY g.id DESC""", (_path_key(file_path),)).fetchall()
+        return [BackupGeneration(*row) for row in rows]
+
+    def read(self, generation: BackupGeneration) -> bytes:
+        """Bytes originais da geração (conferidos pelo hash)."""
+        with open(self._object_path(generation.digest), 'rb') as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != generation.digest:
+            raise ValueError(f"Backup corrompido: {generation.digest}")
+        return data
+
+    def restore(self, generation: BackupGeneration, file_path: Optional[str] = None) -> Optional[BackupGeneration]:
+        """
+        Regrava o arquivo com o conteúdo da geração. O conteúdo atual é guardado antes
+        como nova geração, então a restauração pode ser desfeita; retorna essa geração
+        (None se o arquivo não existia).
+        """
+        return self.restore_data(file_path or generation.file_path, self.read(generation))
+
+    def restore_data(self, file_path: str, data: bytes) -> Optional[BackupGeneration]:
+        """Regrava o arquivo com data de forma atômica, guardando antes o conteúdo atual."""
+        current = self.save(file_path, label="Antes da restauração") if os.path.exists(file_path) else None
+        directory = os.path.dirname(os.path.abspath(file_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f: f.write(data)
+            if current is not None:
+                try: os.chmod(temp_path, os.stat(file_path).st_mode & 0o7777)
+                except OSError: pass
+            os.replace(temp_path, file_path)
+        except BaseException:
+            try: os.remove(temp_path)
+            except OSError: pass
+            raise
+        return current
+
+    def stats(self) -> Dict[str, int]:
+        """Totais do repositório: gerações, objetos, bytes originais e bytes gravados."""
+        with self._lock:
+            generations = self._conn.execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+            objects, size, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM objects").fetchone()
+        return {"generations": generations, "objects": objects, "size": size, "stored_size": stored}
+
+    def close(self):
+        self._conn.close()
+
+# Repositórios abertos neste processo (workers da correção reutilizam a conexão)
+_open_stores: Dict[str, BackupStore] = {}
+
+def get_backup_store(store_dir: Optional[str] = None) -> BackupStore:
+    """Repositório padrão (ou o de store_dir), aberto uma vez por processo."""
+    store_dir = store_dir or BACKUP_DIR
+    store = _open_stores.get(store_dir)
+    if store is None:
+        store = _open_stores[store_dir] = BackupStore(store_dir)
+    return store
+
+def backup_file(file_path: str, data: Optional[bytes] = None, label: str = "",
+                store_dir: Optional[str] = None) -> BackupGeneration:
+    """Guarda uma geração do arquivo no repositório padrão (ou em store_dir)."""
+    return get_backup_store(store_dir).save(file_path, data, label)
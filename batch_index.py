@@ -0,0 +1,86 @@
+# batch_index.py
+
+import os
+import sqlite3
+import tempfile
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Importa do projeto local
+from .verification import _describe_id_occurrence, _id_location
+
+class BatchIdIndex:
+    """
+    Índice de IDs de todos os arquivos de um lote, para detectar o mesmo ID em
+    arquivos diferentes. Fica em um banco SQLite temporário em disco, então
+    escala além da memória com milhões de IDs. É alimentado com as ocorrências
+    já coletadas na verificação de cada arquivo (sem novo parsing).
+    """
+    def __init__(self, directory: Optional[str] = None):
+        fd, self._db_path = tempfile.mkstemp(prefix="xml_verifier_ids_", suffix=".sqlite3", dir=directory)
+        os.close(fd)
+        self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        # Banco descartável: sem journal nem fsync
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("CREATE TABLE ids (value TEXT NOT NULL, file_id INTEGER NOT NULL, peca INTEGER, line INTEGER)")
+        self._file_ids: Dict[str, int] = {} # Caminho normalizado -> id
+        self._file_paths: Dict[int, str] = {}
+
+    def add_file(self, file_path: str, id_occurrences: Iterable[Tuple[str, Optional[int], Optional[int]]]):
+        """Acrescenta as ocorrências (valor, ordinal da PECA, linha) de um arquivo."""
+        key = os.path.normcase(os.path.abspath(file_path))
+        file_id = self._file_ids.get(key)
+        if file_id is None:
+            file_id = self._file_ids[key] = len(self._file_ids)
+            self._file_paths[file_id] = os.path.abspath(file_path)
+        self._conn.executemany("INSERT INTO ids (value, file_id, peca, line) VALUES (?, ?, ?, ?)",
+                               ((value, file_id, peca, line) for value, peca, line in id_occurrences))
+
+    def _display_names(self) -> Dict[int, str]:
+        """Nome de cada arquivo no texto: o nome base, ou o caminho relativo se o nome se repete no lote."""
+        by_name: Dict[str, List[int]] = {}
+        for file_id, path in self._file_paths.items():
+            by_name.setdefault(os.path.normcase(os.path.basename(path)), []).append(file_id)
+        names = {}
+        for file_ids in by_name.values():
+            if len(file_ids) == 1:
+                names[file_ids[0]] = os.path.basename(self._file_paths[file_ids[0]])
+                continue
+            try:
+                common = os.path.commonpath([os.path.dirname(self._file_paths[i]) for i in file_ids])
+            except ValueError:
+                common = None # Unidades diferentes (Windows)
+            for file_id in file_ids:
+                path = self._file_paths[file_id]
+                names[file_id] = os.path.relpath(path, common) if common else path
+        return names
+
+    def duplicate_results(self) -> Iterator[Tuple[str, str, str, str]]:
+        """
+        Gera um resultado por arquivo envolvido em cada ID repetido entre arquivos:
+        (arquivo, "Erro", descrição com todos os arquivos e PECAs, localização da 1ª ocorrência no arquivo).
+        """
+        display_names = self._display_names()
+        # O índice é criado só no fim: inserir sem índice é bem mais rápido
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ids_value ON ids (value, file_id)")
+        rows = self._conn.execute("""SELECT value, file_id, peca, line FROM ids
+                                     WHERE value IN (SELECT value FROM ids GROUP BY value HAVING COUNT(DISTINCT file_id) > 1)
+                                     ORDER BY value, file_id, rowid""")
+        for value, value_rows in groupby(rows, key=lambda r: r[0]):
+            by_file = sorted(((file_id, [(peca, line) for _, _, peca, line in file_rows])
+                              for file_id, file_rows in groupby(value_rows, key=lambda r: r[1])),
+                             key=lambda entry: display_names[entry[0]])
+            described = "; ".join(f"{display_names[file_id]} ({', '.join(_describe_id_occurrence(p, l) for p, l in occurrences)})"
+                                  for file_id, occurrences in by_file)
+            desc = f"ID '{value}' duplicado entre {len(by_file)} arquivos: {described}"
+            for file_id, occurrences in by_file:
+                yield (os.path.basename(self._file_paths[file_id]), "Erro", desc, _id_location(*occurrences[0]))
+
+    def close(self):
+        """Fecha e remove o banco temporário."""
+        try:
+            self._conn.close()
+        finally:
+            try: os.remove(self._db_path)
+            except OSError: pass
@@ -0,0 +1,325 @@
+# benchmark.py
+# Gerador de XML Tekla sintético e medição de desempenho da verificação/correção.
+# Uso: python -m <pacote>.benchmark [--pecas N] [--output resultados.json] [--compare anterior.json]
+
+import argparse
+import difflib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from lxml import etree
+
+# Importa do projeto local
+from .constants import REQUIRED_FIELDS, NUMERIC_FIELDS, DEFAULT_ENCODING, DEFAULT_ROOT_TAG
+
+try:
+    import resource # Indisponível no Windows: pico de RSS não é medido
+except ImportError:
+    resource = None
+
+# --- Gerador de XML Sintético ---
+
+# Valores típicos de cada campo (os numéricos usam vírgula ou ponto, como nas exportações reais)
+_FIELD_VALUES = {
+    "NOMEPECA": lambda r, i: f"P{i:05d}",
+    "TIPOPRODUTO": lambda r, i: r.choice(["VIGA", "PILAR", "LAJE ALVEOLAR", "TERÇA", "PRÉ-LAJE"]),
+    "GRUPO": lambda r, i: r.choice(["ESTRUTURA", "FECHAMENTO", "COBERTURA"]),
+    "SECAO": lambda r, i: f"{r.choice([20, 25, 30, 40])}x{r.choice([40, 50, 60, 80])}",
+    "QUANTIDADE": None, # Definido pelo número de IDs
+    "COMPRIMENTO": lambda r, i: f"{r.uniform(1, 15):.2f}".replace('.', r.choice(['.', ','])),
+    "ALTURA": lambda r, i: f"{r.uniform(0.2, 1.2):.2f}",
+    "LARGURA": lambda r, i: f"{r.uniform(0.2, 0.6):.2f}",
+    "VOLUMEUNITARIO": lambda r, i: f"{r.uniform(0.1, 5):.3f}",
+    "PESO": lambda r, i: f"{r.uniform(250, 12500):.1f}",
+    "AREA": lambda r, i: f"{r.uniform(0.1, 30):.2f}",
+    "CLASSECONCRETO": lambda r, i: r.choice(["C30", "C35", "C40", "C50"]),
+    "DESENHO": lambda r, i: f"DES-{r.randint(1, 999):03d}",
+}
+
+# Tipos de erro injetados (cada PECA sorteia no máximo um, com probabilidade error_rate)
+INJECTED_ERRORS = ("campo_ausente", "valor_nao_numerico", "apenas_espacos", "campo_duplicado",
+                   "quantidade_divergente", "id_direto", "posicao_direta", "qtde_zero", "id_duplicado")
+
+# Tipos de defeito de sintaxe (com probabilidade malformed_rate por PECA)
+MALFORMED_KINDS = ("peca_nao_fechada", "campo_nao_fechado", "fechamento_solto")
+
+def generate_tekla_xml(file_path: str, pecas: int = 1000, ids_per_listaid: int = 4,
+                       posicoes_per_tabelaaco: int = 3, error_rate: float = 0.05,
+                       malformed_rate: float = 0.0, seed: int = 0) -> Dict[str, int]:
+    """
+    Escreve um arquivo DETALHAMENTOTEKLA sintético (escrita incremental, memória constante).
+    Retorna a contagem de erros e defeitos injetados por tipo.
+    """
+    rnd = random.Random(seed)
+    injected = {}
+    id_counter = 0
+    last_id = None
+    with open(file_path, 'w', encoding=DEFAULT_ENCODING, newline='\n') as f:
+        f.write(f"<?xml version='1.0' encoding='{DEFAULT_ENCODING}'?>\n<{DEFAULT_ROOT_TAG}>\n")
+        for i in range(pecas):
+            error = rnd.choice(INJECTED_ERRORS) if rnd.random() < error_rate else None
+            malformed = rnd.choice(MALFORMED_KINDS) if rnd.random() < malformed_rate else None
+            for kind in (error, malformed):
+                if kind: injected[kind] = injected.get(kind, 0) + 1
+
+            num_ids = max(1, rnd.randint(ids_per_listaid // 2, ids_per_listaid)) if ids_per_listaid else 0
+            quantidade = num_ids + (1 if error == "quantidade_divergente" else 0)
+            target_field = rnd.choice(REQUIRED_FIELDS if error in ("campo_ausente", "apenas_espacos", "campo_duplicado") else NUMERIC_FIELDS)
+            lines = ["  <PECA>"]
+            for field in REQUIRED_FIELDS:
+                value = str(quantidade) if field == "QUANTIDADE" else _FIELD_VALUES[field](rnd, i)
+                if field == target_field:
+                    if error == "campo_ausente": continue
+                    if error == "apenas_espacos": value = "   "
+                    if error == "valor_nao_numerico": value = "N/D"
+                close = "" if malformed == "campo_nao_fechado" and field == "DESENHO" else f"</{field}>"
+                lines.append(f"    <{field}>{value}{close}")
+                if error == "campo_duplicado" and field == target_field:
+                    lines.append(f"    <{field}>{value}</{field}>")
+
+            ids = []
+            for _ in range(num_ids):
+                id_counter += 1
+                ids.append(f"{id_counter:08d}")
+            if error == "id_duplicado" and last_id is not None:
+                ids[0] = last_id
+            last_id = ids[-1] if ids else last_id
+            if error == "id_direto":
+                lines.extend(f"    <ID>{v}</ID>" for v in ids)
+            elif ids:
+                lines.append("    <LISTAID>")
+                lines.extend(f"      <ID>{v}</ID>" for v in ids)
+                lines.append("    </LISTAID>")
+
+            posicoes = []
+            for j in range(posicoes_per_tabelaaco):
+                qtde = "0" if error == "qtde_zero" and j == 0 else str(rnd.randint(1, 12))
+                posicoes.append(f"<POS>N{j+1}</POS><BITOLA>{rnd.choice(['6.3', '8.0', '10.0', '12.5'])}</BITOLA><QTDE>{qtde}</QTDE>")
+            indent = "    " if error == "posicao_direta" else "      "
+            if posicoes and error != "posicao_direta": lines.append("    <TABELAACO>")
+            lines.extend(f"{indent}<POSICAO>{p}</POSICAO>" for p in posicoes)
+            if posicoes and error != "posicao_direta": lines.append("    </TABELAACO>")
+
+            if malformed == "fechamento_solto":
+                lines.append("    </LISTAID>")
+            if malformed != "peca_nao_fechada":
+                lines.append("  </PECA>")
+            f.write("\n".join(lines) + "\n")
+        f.write(f"</{DEFAULT_ROOT_TAG}>\n")
+    return injected
+
+# --- Casos de Medição ---
+# Cada caso recebe (arquivo, pasta de trabalho, opções) e retorna (preparar, executar, extras):
+# preparar() roda antes de cada repetição e não é cronometrado.
+
+def _case_verification(file_path, workdir, options, streaming=False):
+    from .verification import run_verification_checks
+    extra = {}
+    def run():
+        extra["resultados"] = len(run_verification_checks(file_path, streaming=streaming))
+    return None, run, extra
+
+def _case_verification_streaming(file_path, workdir, options):
+    return _case_verification(file_path, workdir, options, streaming=True)
+
+def _case_prescreen(file_path, workdir, options):
+    from .prescreen import prescreen_file
+    extra = {}
+    def run():
+        extra["pontuacao"] = prescreen_file(file_path).score
+    return None, run, extra
+
+def _peca_checks_case(check_name):
+    def case(file_path, workdir, options):
+        from . import verification
+        check = getattr(verification, check_name)
+        parser = etree.XMLParser(remove_blank_text=False, recover=True, encoding=DEFAULT_ENCODING)
+        pecas = etree.parse(file_path, parser).getroot().findall(".//PECA")
+        extra = {"pecas": len(pecas)}
+        def run():
+            extra["resultados"] = sum(len(check(peca, idx)) for idx, peca in enumerate(pecas))
+        return None, run, extra
+    return case
+
+def _case_structural_fix(file_path, workdir, options):
+    from .structural_fixes import _fix_single_file_structure
+    work_copy = os.path.join(workdir, "correcao_" + os.path.basename(file_path))
+    extra = {}
+    def prepare():
+        shutil.copyfile(file_path, work_copy)
+    def run():
+        fixed, messages = _fix_single_file_structure(work_copy, False)
+        extra["corrigido"] = fixed
+    return prepare, run, extra
+
+def _case_find_by_location(file_path, workdir, options, indexed=False):
+    from .verification import run_verification_checks
+    from .correction_value import _find_element_by_location, _LocationIndex
+    locations = [loc for _, _, _, loc in run_verification_checks(file_path)
+                 if str(loc).startswith("PECA[") and "/.../" not in str(loc)][:options["locations"]]
+    parser = etree.XMLParser(remove_blank_text=False, encoding=DEFAULT_ENCODING, recover=True)
+    root = etree.parse(file_path, parser).getroot()
+    extra = {"localizacoes": len(locations)}
+    def run():
+        if indexed:
+            # Como na correção: índice montado uma vez por arquivo
+            find = _LocationIndex(root).find
+        else:
+            find = lambda loc: _find_element_by_location(root, loc)
+        extra["encontradas"] = sum(1 for loc in locations if find(loc) is not None)
+    return None, run, extra
+
+def _case_find_by_location_indexed(file_path, workdir, options):
+    return _case_find_by_location(file_path, workdir, options, indexed=True)
+
+def _case_difflib_comparison(file_path, workdir, options):
+    from .structural_fixes import _fix_single_file_structure
+    fixed_copy = os.path.join(workdir, "comparacao_" + os.path.basename(file_path))
+    shutil.copyfile(file_path, fixed_copy)
+    _fix_single_file_structure(fixed_copy, False)
+    with open(file_path, 'r', encoding=DEFAULT_ENCODING, errors='replace') as f: original = f.readlines()
+    with open(fixed_copy, 'r', encoding=DEFAULT_ENCODING, errors='replace') as f: corrected = f.readlines()
+    extra = {"linhas_original": len(original), "linhas_corrigido": len(corrected)}
+    def run():
+        extra["linhas_diff"] = sum(1 for _ in difflib.ndiff(original, corrected))
+    return None, run, extra
+
+BENCHMARK_CASES: Dict[str, Callable] = {
+    "verificacao": _case_verification,
+    "verificacao_streaming": _case_verification_streaming,
+    "triagem": _case_prescreen,
+    "regras_legado": _peca_checks_case("_run_peca_checks_legacy"),
+    "regras_compiladas": _peca_checks_case("_run_peca_checks"),
+    "correcao_estrutural": _case_structural_fix,
+    "busca_localizacao": _case_find_by_location,
+    "busca_localizacao_indice": _case_find_by_location_indexed,
+    "comparacao_difflib": _case_difflib_comparison,
+}
+
+def _max_rss_kb() -> Optional[int]:
+    if resource is None: return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss # macOS informa em bytes
+
+def _run_case_isolated(case_name: str, file_path: str, workdir: str, options: dict) -> dict:
+    """Executa um caso em um processo novo (pico de memória não contaminado por outros casos)."""
+    prepare, run, extra = BENCHMARK_CASES[case_name](file_path, workdir, options)
+    rss_before_kb = _max_rss_kb()
+    times = []
+    for _ in range(options["repeats"]):
+        if prepare is not None: prepare()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    rss_after_kb = _max_rss_kb()
+
+    # Repetição extra com tracemalloc (só memória Python; lxml aloca fora do alcance dele)
+    if prepare is not None: prepare()
+    tracemalloc.start()
+    run()
+    python_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "tempos_s": times,
+        "melhor_s": min(times),
+        "media_s": sum(times) / len(times),
+        "pico_rss_kb": rss_after_kb,
+        "rss_antes_kb": rss_before_kb,
+        "pico_python_bytes": python_peak,
+        "extras": extra,
+    }
+
+def run_benchmarks(file_path: str, cases: List[str], repeats: int = 3, locations: int = 1000) -> Dict[str, dict]:
+    """Roda os casos pedidos, cada um em um processo novo, e devolve as medições por caso."""
+    options = {"repeats": repeats, "locations": locations}
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="xml_verifier_bench_")
+    try:
+        for case_name in cases:
+            print(f"Executando {case_name}...", file=sys.stderr)
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                results[case_name] = executor.submit(_run_case_isolated, case_name, file_path, workdir, options).result()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+def compare_reports(previous: dict, current: dict) -> List[Tuple[str, float, float, float]]:
+    """Compara dois relatórios salvos: [(caso, melhor anterior, melhor atual, razão atual/anterior)]."""
+    rows = []
+    for case_name, measurement in current["casos"].items():
+        old = previous.get("casos", {}).get(case_name)
+        if old:
+            rows.append((case_name, old["melhor_s"], measurement["melhor_s"], measurement["melhor_s"] / old["melhor_s"] if old["melhor_s"] else float("inf")))
+    return rows
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark da verificação e correção de XML Tekla.")
+    parser.add_argument("--arquivo", help="Usa um XML existente em vez de gerar um sintético.")
+    parser.add_argument("--pecas", type=int, default=2000)
+    parser.add_argument("--ids-por-listaid", type=int, default=4)
+    parser.add_argument("--posicoes-por-tabelaaco", type=int, default=3)
+    parser.add_argument("--taxa-erros", type=float, default=0.05)
+    parser.add_argument("--taxa-malformados", type=float, default=0.0)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--localizacoes", type=int, default=1000, help="Tamanho do lote de buscas por localização.")
+    parser.add_argument("--casos", nargs="+", choices=sorted(BENCHMARK_CASES), default=list(BENCHMARK_CASES))
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: benchmark_AAAAMMDD_HHMMSS.json).")
+    parser.add_argument("--compare", help="Relatório JSON anterior para comparação.")
+    args = parser.parse_args(argv)
+
+    generator_params = None
+    tmp_dir = None
+    try:
+        if args.arquivo:
+            file_path = args.arquivo
+        else:
+            tmp_dir = tempfile.mkdtemp(prefix="xml_verifier_gen_")
+            file_path = os.path.join(tmp_dir, "sintetico.xml")
+            generator_params = {"pecas": args.pecas, "ids_per_listaid": args.ids_por_listaid,
+                                "posicoes_per_tabelaaco": args.posicoes_por_tabelaaco,
+                                "error_rate": args.taxa_erros, "malformed_rate": args.taxa_malformados, "seed": args.semente}
+            injected = generate_tekla_xml(file_path, **generator_params)
+            generator_params["injetados"] = injected
+
+        report = {
+            "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "lxml": ".".join(map(str, etree.LXML_VERSION)),
+            "plataforma": platform.platform(),
+            "arquivo": os.path.basename(file_path),
+            "tamanho_bytes": os.path.getsize(file_path),
+            "gerador": generator_params,
+            "casos": run_benchmarks(file_path, args.casos, args.repeticoes, args.localizacoes),
+        }
+    finally:
+        if tmp_dir: shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    output = args.output or time.strftime("benchmark_%Y%m%d_%H%M%S.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    size_mb = report["tamanho_bytes"] / (1024 * 1024)
+    for case_name, m in report["casos"].items():
+        print(f"{case_name:24s} melhor {m['melhor_s']:8.3f}s  ({size_mb / m['melhor_s']:7.1f} MB/s)  pico RSS {m['pico_rss_kb'] or '-'} kB")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f: previous = json.load(f)
+        print("\nComparação com", args.compare)
+        for case_name, old, new, ratio in compare_reports(previous, report):
+            print(f"{case_name:24s} {old:8.3f}s -> {new:8.3f}s  (x{ratio:.2f})")
+    print(f"\nResultados salvos em {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
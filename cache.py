@@ -0,0 +1,177 @@
+# cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Importa do projeto local
+from .constants import (
+    REQUIRED_FIELDS, NUMERIC_FIELDS, ALLOWED_MULTIPLE_PECA_CHILDREN,
+    DEFAULT_ENCODING, CACHE_DIR, CACHE_MAX_BYTES
+)
+from .location import Location
+
+# Incrementar sempre que as verificações ou o formato dos resultados mudarem
+CACHE_SCHEMA_VERSION = 5
+
+CACHE_DB_NAME = "verificacao.sqlite3"
+
+# Gravações confirmadas em lotes: uma execução interrompida perde no máximo um lote
+CACHE_COMMIT_EVERY = 50
+CACHE_COMMIT_SECONDS = 5.0
+
+def rules_fingerprint() -> str:
+    """Impressão digital das regras: muda quando as constantes de verificação mudam."""
+    payload = json.dumps({
+        "schema": CACHE_SCHEMA_VERSION,
+        "required": REQUIRED_FIELDS,
+        "numeric": NUMERIC_FIELDS,
+        "multiple": sorted(ALLOWED_MULTIPLE_PECA_CHILDREN),
+        "encoding": DEFAULT_ENCODING,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def file_digest(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash SHA-256 do conteúdo do arquivo, lido em blocos."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _db_path(cache_dir: str) -> str:
+    return os.path.join(cache_dir, CACHE_DB_NAME)
+
+# Conexões somente leitura (uma por thread e diretório de cache): a verificação sem
+# processos workers roda em uma thread nova a cada vez
+_reader_connections = threading.local()
+
+def lookup_cached_results(cache_dir: str, digest: str) -> Optional[Tuple[List[Tuple[str, str, str]], List[Tuple[str, Optional[int], Optional[int]]]]]:
+    """
+    Consulta o cache sem alterá-lo (seguro em processos workers).
+    Retorna ([(type, description, location)], [(id, ordinal da PECA, linha)])
+    ou None se não houver entrada válida.
+    """
+    try:
+        connections: Optional[Dict[str, sqlite3.Connection]] = getattr(_reader_connections, "by_dir", None)
+        if connections is None:
+            connections = _reader_connections.by_dir = {}
+        conn = connections.get(cache_dir)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{_db_path(cache_dir)}?mode=ro", uri=True, timeout=30)
+            connections[cache_dir] = conn
+        row = conn.execute("SELECT results, ids FROM entries WHERE digest = ? AND fingerprint = ?",
+                           (digest, rules_fingerprint())).fetchone()
+    except sqlite3.ProgrammingError:
+        raise # Erro de uso da conexão, não uma entrada ausente
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    return _decode_row(row)
+
+def _decode_row(row) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, Optional[int], Optional[int]]]]:
+    return ([(r_type, desc, Location.from_json(loc)) for r_type, desc, loc in json.loads(row[0])],
+            [tuple(o) for o in json.loads(row[1])])
+
+class VerificationCache:
+    """
+    Cache em disco (SQLite) da saída de run_verification_checks e dos IDs do arquivo.
+    Chave: hash do conteúdo do arquivo + impressão digital das regras. Entradas de
+    outras versões das regras são descartadas ao abrir; o tamanho total é limitado
+    a max_bytes, removendo as entradas usadas há mais tempo.
+    A escrita é feita por um único processo (o que coordena a verificação) e
+    confirmada em lotes durante a execução, não só em close().
+    """
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fingerprint = rules_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(_db_path(cache_dir), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL") # Leitores (workers) não bloqueiam a escrita
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_SCHEMA_VERSION:
+            # Formato antigo do banco: recomeça do zero
+            self._conn.execute("DROP TABLE IF EXISTS entries")
+            self._conn.execute(f"PRAGMA user_version = {CACHE_SCHEMA_VERSION}")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+                                  digest TEXT NOT NULL, fingerprint TEXT NOT NULL, results TEXT NOT NULL,
+                                  ids TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL,
+                                  PRIMARY KEY (digest, fingerprint))""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        # Invalida automaticamente resultados gerados com outras regras/constantes
+        self._conn.execute("DELETE FROM entries WHERE fingerprint != ?", (self.fingerprint,))
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self._pending_writes = 0
+        self._last_commit = time.monotonic()
+
+    def get(self, digest: str) -> Optional[Tuple[List[Tuple[str, str, str]], List[Tuple[str, Optional[int], Optional[int]]]]]:
+        """Busca (resultados, ocorrências de ID) pelo hash do conteúdo, contabilizando acerto/falha."""
+        row = self._conn.execute("SELECT results, ids FROM entries WHERE digest = ? AND fingerprint = ?",
+                                 (digest, self.fingerprint)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.record_hit(digest)
+        return _decode_row(row)
+
+    def record_hit(self, digest: str):
+        """Registra um acerto obtido fora desta conexão (ex.: em um worker)."""
+        self.hits += 1
+        self._conn.execute("UPDATE entries SET last_used = ? WHERE digest = ? AND fingerprint = ?",
+                           (time.time(), digest, self.fingerprint))
+        self._written()
+
+    def put(self, digest: str, results: List[Tuple[str, str, str]],
+            id_occurrences: List[Tuple[str, Optional[int], Optional[int]]]):
+        """
+        Grava os resultados (sem o nome do arquivo) e os IDs do arquivo, aplicando o limite de tamanho.
+        Localizações estruturadas são gravadas em campos (Location.to_json), não em texto.
+        """
+        payload = json.dumps(results, ensure_ascii=False, default=Location.to_json)
+        ids_payload = json.dumps(id_occurrences, ensure_ascii=False)
+        size = len(payload) + len(ids_payload)
+        if size > self.max_bytes:
+            return # Nunca caberia no cache
+        old = self._conn.execute("SELECT size FROM entries WHERE digest = ? AND fingerprint = ?",
+                                 (digest, self.fingerprint)).fetchone()
+        self._conn.execute("INSERT OR REPLACE INTO entries (digest, fingerprint, results, ids, size, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                           (digest, self.fingerprint, payload, ids_payload, size, time.time()))
+        self._total_bytes += size - (old[0] if old else 0)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+        self._written()
+
+    def _written(self):
+        """Confirma as gravações a cada CACHE_COMMIT_EVERY alterações ou CACHE_COMMIT_SECONDS segundos."""
+        self._pending_writes += 1
+        now = time.monotonic()
+        if self._pending_writes >= CACHE_COMMIT_EVERY or now - self._last_commit >= CACHE_COMMIT_SECONDS:
+            self._conn.commit()
+            self._pending_writes = 0
+            self._last_commit = now
+
+    def _evict(self):
+        """Remove as entradas menos usadas recentemente até ficar abaixo de 90% do limite."""
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute("SELECT digest, size FROM entries ORDER BY last_used").fetchall()
+        removed = []
+        for digest, size in rows:
+            if self._total_bytes <= target: break
+            removed.append((digest, self.fingerprint))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM entries WHERE digest = ? AND fingerprint = ?", removed)
+
+    def close(self):
+        """Confirma as gravações pendentes e fecha o banco."""
+        try:
+            self._conn.commit()
+        finally:
+            self._conn.close()
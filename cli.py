@@ -0,0 +1,210 @@
+# cli.py
+# Verificação em lote sem interface gráfica (não importa tkinter).
+# Uso: python -m <pacote>.cli ARQUIVOS/PASTAS/GLOBS [opções]
+
+import argparse
+import csv
+import functools
+import glob
+import json
+import os
+import sys
+from typing import Iterable, List, Optional, Tuple
+
+# Importa do projeto local
+from .verification import run_verification_batch, VerificationLimits
+from .parallel import default_worker_count, run_in_process_pool
+from .cache import VerificationCache
+from .batch_index import BatchIdIndex
+from .structural_fixes import _fix_single_file_structure
+from .profiling import write_profiles_csv
+from .prescreen import prescreen_files, write_triage_csv
+from .auto_fixes import AUTO_FIX_RULES, auto_fix_file, parse_rule_names, summarize_reports, write_auto_fix_csv
+
+# Códigos de saída
+EXIT_OK = 0
+EXIT_ERRORS_FOUND = 1
+EXIT_USAGE = 2
+
+CSV_HEADER = ["Arquivo", "Tipo", "Descrição", "Localização"]
+
+def expand_inputs(inputs: Iterable[str], recursive: bool = False) -> List[str]:
+    """Expande arquivos, pastas e padrões glob em uma lista de arquivos .xml (sem repetições)."""
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, "**", "*") if recursive else os.path.join(item, "*")
+            candidates = glob.glob(pattern, recursive=recursive)
+        elif os.path.isfile(item):
+            candidates = [item]
+        else:
+            candidates = glob.glob(item, recursive=True)
+        found.extend(sorted(p for p in candidates if os.path.isfile(p) and p.lower().endswith('.xml')))
+    unique, seen = [], set()
+    for path in found:
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+class _ResultWriter:
+    """Escreve resultados em CSV ou JSONL à medida que chegam."""
+    def __init__(self, stream, output_format: str):
+        self.stream = stream
+        self.output_format = output_format
+        self.counts = {}
+        if output_format == "csv":
+            self._csv = csv.writer(stream, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            self._csv.writerow(CSV_HEADER)
+
+    def write(self, results: Iterable[Tuple[str, str, str, str]]):
+        for arquivo, tipo, descricao, localizacao in results:
+            self.counts[tipo] = self.counts.get(tipo, 0) + 1
+            if self.output_format == "csv":
+                self._csv.writerow([arquivo, tipo, descricao, localizacao])
+            else:
+                self.stream.write(json.dumps({"arquivo": arquivo, "tipo": tipo, "descricao": descricao,
+                                              "localizacao": str(localizacao)}, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+def _positive(convert):
+    """Tipo do argparse: número (int ou float) maior que zero."""
+    def parse(text: str):
+        try:
+            value = convert(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"valor inválido: '{text}'")
+        if value <= 0:
+            raise argparse.ArgumentTypeError(f"deve ser maior que zero: '{text}'")
+        return value
+    return parse
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Verificador de arquivos XML Tekla (modo linha de comando).")
+    parser.add_argument("inputs", nargs="+", help="Arquivos, pastas ou padrões glob (ex.: 'projeto/**/*.xml').")
+    parser.add_argument("-f", "--format", choices=("csv", "jsonl"), default="csv", help="Formato da saída (padrão: csv).")
+    parser.add_argument("-o", "--output", help="Arquivo de saída (padrão: saída padrão).")
+    parser.add_argument("-j", "--workers", type=int, default=default_worker_count(), help="Número de processos (padrão: núcleos da CPU).")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Procura .xml também nas subpastas das pastas informadas.")
+    parser.add_argument("--no-cache", action="store_true", help="Não usa o cache persistente de resultados.")
+    parser.add_argument("--fix-structure", action="store_true", help="Aplica a correção estrutural antes de verificar.")
+    parser.add_argument("--auto-fix", metavar="REGRAS", help="Aplica as regras de correção automática antes de verificar "
+                        f"(separadas por vírgula ou 'todas': {', '.join(AUTO_FIX_RULES)}).")
+    parser.add_argument("--auto-fix-report", metavar="CSV", help="Com --auto-fix, grava as alterações feitas (por regra) neste CSV.")
+    parser.add_argument("--backup", action="store_true", help="Com --fix-structure/--auto-fix, guarda os originais no repositório de backups.")
+    parser.add_argument("--max-issues", type=_positive(int), metavar="N", help="Para a verificação de um arquivo após N problemas.")
+    parser.add_argument("--max-issues-per-check", type=_positive(int), metavar="N", help="Reporta no máximo N problemas de cada verificação por arquivo.")
+    parser.add_argument("--max-seconds", type=_positive(float), metavar="S", help="Tempo máximo de verificação por arquivo, em segundos.")
+    parser.add_argument("--prescreen", action="store_true", help="Faz uma triagem rápida dos bytes e verifica primeiro os arquivos suspeitos.")
+    parser.add_argument("--triage", metavar="CSV", help="Grava o relatório da triagem rápida neste CSV (implica --prescreen).")
+    parser.add_argument("--triage-only", action="store_true", help="Apenas a triagem rápida: grava o relatório na saída, sem a verificação completa.")
+    parser.add_argument("--profile", metavar="CSV", help="Mede o tempo de cada etapa/verificação e grava o perfil neste CSV.")
+    return parser
+
+def _run_triage_only(file_paths: List[str], args, stream) -> int:
+    """Triagem rápida sem verificação completa; retorna EXIT_ERRORS_FOUND se houver suspeitos."""
+    try:
+        reports = prescreen_files(file_paths, args.workers)
+        write_triage_csv(reports, stream)
+        if args.triage:
+            with open(args.triage, 'w', encoding='utf-8', newline='') as f:
+                write_triage_csv(reports, f)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    suspicious = sum(1 for report in reports if report.is_suspicious)
+    print(f"{len(file_paths)} arquivo(s) na triagem: {suspicious} suspeito(s).", file=sys.stderr)
+    return EXIT_ERRORS_FOUND if suspicious else EXIT_OK
+
+def _run_auto_fix(file_paths: List[str], rules, args, writer: _ResultWriter):
+    """Correção automática em paralelo; as alterações vão para a saída como 'Info'."""
+    worker = functools.partial(auto_fix_file, rules=rules, backup=args.backup, verify=False)
+    reports = []
+    for file_path, output, error in run_in_process_pool(worker, file_paths, args.workers):
+        base_name = os.path.basename(file_path)
+        if error is not None:
+            writer.write([(base_name, "Erro", f"Erro crítico na correção automática: {str(error)}", "Correção Automática")])
+            continue
+        report, _ = output
+        reports.append(report)
+        writer.write((base_name, msg_type, msg_desc, msg_loc) for msg_type, msg_desc, msg_loc in report.messages())
+    for rule, (changes, files) in summarize_reports(reports).items():
+        print(f"Correção automática - {AUTO_FIX_RULES[rule][0]}: {changes} alteração(ões) em {files} arquivo(s).", file=sys.stderr)
+    if args.auto_fix_report:
+        with open(args.auto_fix_report, 'w', encoding='utf-8', newline='') as f:
+            write_auto_fix_csv(reports, f)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    auto_fix_rules = None
+    if args.auto_fix:
+        try:
+            auto_fix_rules = parse_rule_names(args.auto_fix)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return EXIT_USAGE
+    file_paths = expand_inputs(args.inputs, args.recursive)
+    if not file_paths:
+        print("Nenhum arquivo .xml encontrado.", file=sys.stderr)
+        return EXIT_USAGE
+
+    stream = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    if args.triage_only:
+        return _run_triage_only(file_paths, args, stream)
+    cache = None
+    id_index = None
+    profiles = [] if args.profile else None
+    limits = VerificationLimits(args.max_issues, args.max_issues_per_check, args.max_seconds)
+    triage = [] if args.prescreen or args.triage else None
+    try:
+        writer = _ResultWriter(stream, args.format)
+
+        if args.fix_structure:
+            fix_worker = functools.partial(_fix_single_file_structure, backup=args.backup)
+            for file_path, output, error in run_in_process_pool(fix_worker, file_paths, args.workers):
+                base_name = os.path.basename(file_path)
+                if error is not None:
+                    writer.write([(base_name, "Erro", f"Erro crítico ao tentar corrigir estrutura: {str(error)}", "Correção Estrutural")])
+                    continue
+                _, messages = output
+                writer.write((base_name, msg_type, msg_desc, msg_loc) for msg_type, msg_desc, msg_loc in messages)
+
+        if auto_fix_rules:
+            _run_auto_fix(file_paths, auto_fix_rules, args, writer)
+
+        if not args.no_cache:
+            try:
+                cache = VerificationCache()
+            except Exception as e:
+                print(f"Cache de verificação indisponível: {e}", file=sys.stderr)
+        if len(file_paths) > 1:
+            id_index = BatchIdIndex()
+
+        for i, (file_path, file_results) in enumerate(run_verification_batch(file_paths, args.workers, None, cache, id_index,
+                                                                                     profiles, limits, triage)):
+            writer.write(file_results)
+            print(f"[{i+1}/{len(file_paths)}] {os.path.basename(file_path)}: {len(file_results)} resultado(s)", file=sys.stderr)
+        if id_index is not None:
+            writer.write(id_index.duplicate_results())
+        if profiles is not None:
+            write_profiles_csv(profiles, args.profile)
+        if args.triage:
+            with open(args.triage, 'w', encoding='utf-8', newline='') as f:
+                write_triage_csv(triage, f)
+    finally:
+        if cache is not None:
+            cache.close()
+        if id_index is not None:
+            id_index.close()
+        if stream is not sys.stdout:
+            stream.close()
+
+    num_erros = writer.counts.get("Erro", 0)
+    num_avisos = writer.counts.get("Aviso", 0)
+    cache_info = f" Cache: {cache.hits} acerto(s), {cache.misses} falha(s)." if cache is not None else ""
+    print(f"{len(file_paths)} arquivo(s) verificado(s): {num_erros} erro(s), {num_avisos} aviso(s).{cache_info}", file=sys.stderr)
+    return EXIT_ERRORS_FOUND if num_erros else EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,19 @@
 # comparison.py
 
+import io
 import os
-import difflib
+import bisect
+import functools
+import threading
 from tkinter import *
 from tkinter import ttk, messagebox
-from typing import TYPE_CHECKING
+from typing import Callable, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
 
 # Importa do projeto local
 from .constants import DEFAULT_ENCODING
+from .backup_store import get_backup_store
+from .line_diff import diff_lines, intraline_spans
+from .peca_diff import PecaDiff, diff_pecas
 
 # Evita importação circular para type hinting
 if TYPE_CHECKING:
@@ -33,29 +39,11 @@ def _sync_scroll_x(text1, text2):
         except TclError: pass
     return _sync
 
-def _highlight_inline_diff(text_widget, line_num, diff_info, tag_name):
-    """Aplica tag a caracteres específicos numa linha do Text widget."""
-    if line_num < 1: return
-    start_index = f"{line_num}.0"
-    end_index = f"{line_num}.end"
-    try:
-        line_content = text_widget.get(start_index, end_index)
-        if line_content.strip() == "": return # Ignorar linhas de placeholder
-    except TclError: return
-
-    char_index_offset = 6 # Ajuste para 'NNNN[+- ] '
-    for i, marker in enumerate(diff_info.rstrip()):
-         if marker in ('^', '-', '+'):
-             char_pos = i + char_index_offset
-             try:
-                 text_widget.tag_add(tag_name, f"{line_num}.{char_pos}", f"{line_num}.{char_pos + 1}")
-             except TclError: pass
-
 # --- Função Principal de Comparação (Chamada pela UI) ---
 
 def show_comparison_window(app_instance: 'XMLVerifier'):
     """Cria e exibe a janela de comparação de arquivos."""
-    selection = app_instance.result_tree.selection()
+    selection = app_instance.get_selected_results()
     if not selection:
         messagebox.showinfo("Comparar Arquivos", "Selecione um resultado na tabela.", parent=app_instance.root)
         return
@@ -63,14 +51,7 @@ def show_comparison_window(app_instance: 'XMLVerifier'):
          messagebox.showwarning("Comparar Arquivos", "Selecione apenas UM resultado.", parent=app_instance.root)
          return
 
-    try:
-        item = app_instance.result_tree.item(selection[0])
-        values = item["values"]
-        if not values: return
-        arquivo_base = values[0]
-    except Exception:
-        messagebox.showerror("Erro", "Não foi possível obter dados do item selecionado.", parent=app_instance.root)
-        return
+    _, (arquivo_base, _, _, _) = selection[0]
 
     file_path = None
     for path in app_instance.file_paths:
@@ -82,16 +63,9 @@ def show_comparison_window(app_instance: 'XMLVerifier'):
         messagebox.showerror("Erro", f"Arquivo '{arquivo_base}' não encontrado.", parent=app_instance.root)
         return
 
-    backup_path = file_path + ".bak"
-    if not os.path.exists(backup_path):
-        messagebox.showinfo("Comparar Arquivos", f"Backup '{os.path.basename(backup_path)}' não encontrado.", parent=app_instance.root)
-        return
-
-    try:
-        with open(backup_path, 'r', encoding=DEFAULT_ENCODING, errors='replace') as f_bak: backup_content = f_bak.readlines()
-        with open(file_path, 'r', encoding=DEFAULT_ENCODING, errors='replace') as f_curr: current_content = f_curr.readlines()
-    except Exception as e:
-        messagebox.showerror("Erro de Leitura", f"Erro ao ler arquivos:\n{e}", parent=app_instance.root)
+    versions = _backup_versions(file_path)
+    if not versions:
+        messagebox.showinfo("Comparar Arquivos", f"Nenhum backup de '{arquivo_base}' encontrado.", parent=app_instance.root)
         return
 
     # --- Criação da Janela Toplevel ---
@@ -102,8 +76,26 @@ def show_comparison_window(app_instance: 'XMLVerifier'):
     diff_main_frame = Frame(diff_window)
     diff_main_frame.pack(fill=BOTH, expand=True, padx=5, pady=5)
 
-    Label(diff_main_frame, text=f"Original ({os.path.basename(backup_path)})", font=("Arial", 10, "bold")).grid(row=0, column=0, padx=5, pady=2, sticky=W)
-    Label(diff_main_frame, text=f"Corrigido ({arquivo_base})", font=("Arial", 10, "bold")).grid(row=0, column=1, padx=5, pady=2, sticky=W)
+    version_frame = Frame(diff_main_frame)
+    version_frame.grid(row=0, column=0, columnspan=3, sticky=EW, pady=(0, 5))
+    Label(version_frame, text="Comparar com a versão:").pack(side=LEFT, padx=5)
+    version_var = StringVar()
+    version_combo = ttk.Combobox(version_frame, textvariable=version_var, state="readonly", width=70,
+                                 values=[description for description, _ in versions])
+    version_combo.pack(side=LEFT, padx=5)
+    restore_button = Button(version_frame, text="Restaurar esta versão")
+    restore_button.pack(side=LEFT, padx=10)
+    mode_var = StringVar(value="lines")
+    Label(version_frame, text="Modo:").pack(side=LEFT, padx=(10, 2))
+    Radiobutton(version_frame, text="Linhas", variable=mode_var, value="lines").pack(side=LEFT)
+    Radiobutton(version_frame, text="PECAs (campos, IDs, POSICAOs)", variable=mode_var, value="pecas").pack(side=LEFT)
+    progress_var = DoubleVar(value=0)
+    progress_bar = ttk.Progressbar(version_frame, variable=progress_var, maximum=100, length=150)
+    progress_label = Label(version_frame, text="")
+
+    original_label = Label(diff_main_frame, font=("Arial", 10, "bold"))
+    original_label.grid(row=1, column=0, padx=5, pady=2, sticky=W)
+    Label(diff_main_frame, text=f"Corrigido ({arquivo_base})", font=("Arial", 10, "bold")).grid(row=1, column=1, padx=5, pady=2, sticky=W)
 
     original_text = Text(diff_main_frame, wrap=NONE, font=("Courier New", 9), borderwidth=1, relief="solid")
     corrected_text = Text(diff_main_frame, wrap=NONE, font=("Courier New", 9), borderwidth=1, relief="solid")
@@ -111,44 +103,49 @@ def show_comparison_window(app_instance: 'XMLVerifier'):
     scroll_y = Scrollbar(diff_main_frame, orient=VERTICAL)
     scroll_x = Scrollbar(diff_main_frame, orient=HORIZONTAL)
 
-    original_text.config(yscrollcommand=scroll_y.set, xscrollcommand=scroll_x.set)
-    corrected_text.config(yscrollcommand=scroll_y.set, xscrollcommand=scroll_x.set)
+    state = {"generation": 0, "view": None, "closed": False, "highlight_pending": False}
+
+    def schedule_highlight():
+        """Destaque por caractere das linhas visíveis, uma vez por rodada de eventos."""
+        if state["highlight_pending"]: return
+        state["highlight_pending"] = True
+        def run():
+            state["highlight_pending"] = False
+            _highlight_visible(original_text, corrected_text, state["view"])
+        diff_window.after_idle(run)
+
+    def on_scroll_y(*args):
+        scroll_y.set(*args)
+        schedule_highlight()
+
+    original_text.config(yscrollcommand=on_scroll_y, xscrollcommand=scroll_x.set)
+    corrected_text.config(yscrollcommand=on_scroll_y, xscrollcommand=scroll_x.set)
     scroll_y.config(command=_sync_scroll(original_text, corrected_text)) # Chama helper local
     scroll_x.config(command=_sync_scroll_x(original_text, corrected_text)) # Chama helper local
 
-    original_text.grid(row=1, column=0, sticky="nsew", padx=(5,0), pady=(0,5))
-    corrected_text.grid(row=1, column=1, sticky="nsew", padx=(5,5), pady=(0,5))
-    scroll_y.grid(row=1, column=2, sticky="ns", pady=(0,5))
-    scroll_x.grid(row=2, column=0, columnspan=2, sticky="ew", padx=(5,0))
+    original_text.grid(row=2, column=0, sticky="nsew", padx=(5,0), pady=(0,5))
+    corrected_text.grid(row=2, column=1, sticky="nsew", padx=(5,5), pady=(0,5))
+    scroll_y.grid(row=2, column=2, sticky="ns", pady=(0,5))
+    scroll_x.grid(row=3, column=0, columnspan=2, sticky="ew", padx=(5,0))
+    line_widgets = (original_text, corrected_text, scroll_y, scroll_x)
+
+    # Modo PECAs: tabela de alterações no lugar dos painéis de linhas
+    peca_frame = Frame(diff_main_frame)
+    peca_summary_var = StringVar()
+    Label(peca_frame, textvariable=peca_summary_var, anchor=W, justify=LEFT, wraplength=1050).pack(fill=X, padx=5, pady=(0, 5))
+    peca_tree = ttk.Treeview(peca_frame, columns=_PECA_COLUMNS, show="headings")
+    for column, width in zip(_PECA_COLUMNS, (130, 200, 220, 250, 250)):
+        peca_tree.heading(column, text=column)
+        peca_tree.column(column, width=width, anchor=W)
+    peca_scroll = Scrollbar(peca_frame, orient=VERTICAL, command=peca_tree.yview)
+    peca_tree.config(yscrollcommand=peca_scroll.set)
+    peca_scroll.pack(side=RIGHT, fill=Y)
+    peca_tree.pack(fill=BOTH, expand=True)
 
-    diff_main_frame.grid_rowconfigure(1, weight=1)
+    diff_main_frame.grid_rowconfigure(2, weight=1)
     diff_main_frame.grid_columnconfigure(0, weight=1)
     diff_main_frame.grid_columnconfigure(1, weight=1)
 
-    # --- Cálculo e Exibição das Diferenças ---
-    diff_result = list(difflib.ndiff(backup_content, current_content))
-    original_line_num = 1
-    corrected_line_num = 1
-
-    for line in diff_result:
-        code = line[:2]
-        text_content = line[2:]
-        if code == '  ':
-            original_text.insert(END, f"{original_line_num:<4d}  {text_content}")
-            corrected_text.insert(END, f"{corrected_line_num:<4d}  {text_content}")
-            original_line_num += 1; corrected_line_num += 1
-        elif code == '- ':
-            original_text.insert(END, f"{original_line_num:<4d}- {text_content}", "removed")
-            corrected_text.insert(END, "\n", "placeholder")
-            original_line_num += 1
-        elif code == '+ ':
-            original_text.insert(END, "\n", "placeholder")
-            corrected_text.insert(END, f"{corrected_line_num:<4d}+ {text_content}", "added")
-            corrected_line_num += 1
-        elif code == '? ':
-             _highlight_inline_diff(original_text, original_line_num -1, text_content, "diff_char_orig") # Chama helper local
-             _highlight_inline_diff(corrected_text, corrected_line_num -1, text_content, "diff_char_corr") # Chama helper local
-
     # Configuração das Tags
     original_text.tag_configure("removed", background="#ffdddd", foreground="#a00000")
     corrected_text.tag_configure("added", background="#ddffdd", foreground="#006400")
@@ -157,7 +154,234 @@ def show_comparison_window(app_instance: 'XMLVerifier'):
     original_text.tag_configure("placeholder", background="#f0f0f0")
     corrected_text.tag_configure("placeholder", background="#f0f0f0")
 
-    original_text.config(state=DISABLED)
-    corrected_text.config(state=DISABLED)
+    def show_version(event=None):
+        """Refaz a comparação com a versão escolhida, em uma thread (a janela continua respondendo)."""
+        description, load = versions[version_combo.current()]
+        mode = mode_var.get()
+        state["generation"] += 1
+        generation = state["generation"]
+        should_continue = lambda: state["generation"] == generation and not state["closed"]
+        original_label.config(text=f"Original ({description})")
+        if mode == "pecas":
+            for widget in line_widgets: widget.grid_remove()
+            peca_frame.grid(row=2, column=0, columnspan=3, rowspan=2, sticky="nsew")
+        else:
+            peca_frame.grid_remove()
+            for widget in line_widgets: widget.grid()
+        restore_button.config(state=DISABLED)
+        progress_var.set(0)
+        progress_label.config(text="Comparando...")
+        progress_bar.pack(side=LEFT, padx=5)
+        progress_label.pack(side=LEFT)
+        last_reported = [0.0]
+
+        def post(callback, *args):
+            """Agenda callback na thread da interface (a janela pode ter sido fechada)."""
+            try: diff_window.after(0, callback, *args)
+            except (TclError, RuntimeError): pass
+
+        def progress(fraction):
+            # Poucas atualizações: só a cada 1% (chamado pela thread)
+            if fraction - last_reported[0] >= 0.01 or fraction >= 1.0:
+                last_reported[0] = fraction
+                post(lambda: should_continue() and progress_var.set(fraction * 100))
+
+        def worker():
+            try:
+                if mode == "pecas":
+                    view = diff_pecas(load(), file_path, should_continue, progress)
+                else:
+                    backup_content = _decode_lines(load())
+                    with open(file_path, 'rb') as f_curr: current_content = _decode_lines(f_curr.read())
+                    view = _build_diff_view(backup_content, current_content, should_continue, progress)
+                error = None
+            except Exception as e:
+                view, error = None, e
+            if should_continue():
+                post(finish, view, error)
+
+        def finish(view, error):
+            if not should_continue(): return # Outra versão escolhida ou janela fechada
+            progress_bar.pack_forget()
+            progress_label.pack_forget()
+            restore_button.config(state=NORMAL)
+            if error is not None:
+                messagebox.showerror("Erro de Leitura", f"Erro ao ler arquivos:\n{error}", parent=diff_window)
+                return
+            if mode == "pecas":
+                _show_peca_diff(peca_tree, peca_summary_var, view)
+                return
+            state["view"] = view
+            _show_diff(original_text, corrected_text, view)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def restore_version():
+        description, load = versions[version_combo.current()]
+        if not messagebox.askyesno("Restaurar Versão", f"Substituir '{arquivo_base}' pela versão:\n{description}?\n\n"
+                                   "O conteúdo atual será guardado como nova geração de backup.", parent=diff_window):
+            return
+        try:
+            get_backup_store().restore_data(file_path, load())
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao restaurar:\n{e}", parent=diff_window)
+            return
+        # A lista de versões ganhou a geração "Antes da restauração"
+        versions[:] = _backup_versions(file_path)
+        version_combo.config(values=[description for description, _ in versions])
+        version_combo.current(0)
+        show_version()
+        app_instance.update_status(f"'{arquivo_base}' restaurado ({description}). Verifique novamente o arquivo.")
+
+    def on_destroy(event):
+        if event.widget is diff_window: state["closed"] = True # Descarta a comparação em andamento
+
+    diff_window.bind("<Destroy>", on_destroy)
+    corrected_text.bind("<Configure>", lambda event: schedule_highlight())
+    version_combo.bind("<<ComboboxSelected>>", show_version)
+    mode_var.trace_add("write", lambda *args: show_version())
+    restore_button.config(command=restore_version)
+    version_combo.current(0)
+    show_version()
+
+    Button(diff_window, text="Fechar", command=diff_window.destroy).pack(pady=5)
+
+def _decode_lines(data: bytes):
+    """Linhas do conteúdo, como em open(..., 'r', encoding=DEFAULT_ENCODING).readlines()."""
+    return io.TextIOWrapper(io.BytesIO(data), encoding=DEFAULT_ENCODING, errors='replace').readlines()
+
+def _backup_versions(file_path: str):
+    """Versões disponíveis do arquivo: [(descrição, função que lê os bytes)],
+    gerações do repositório da mais recente para a mais antiga e, por último, um .bak antigo."""
+    versions = []
+    try:
+        store = get_backup_store()
+        for generation in store.generations(file_path):
+            versions.append((generation.describe(), functools.partial(store.read, generation)))
+    except Exception as e:
+        print(f"Repositório de backups indisponível: {e}")
+    legacy_path = file_path + ".bak"
+    if os.path.exists(legacy_path):
+        def read_legacy():
+            with open(legacy_path, 'rb') as f: return f.read()
+        versions.append((f"{os.path.basename(legacy_path)} (backup antigo)", read_legacy))
+    return versions
+
+# Pares de índices (Tk) passados por chamada a tag_add
+_TAG_BATCH = 1000
+# Modo PECAs: colunas da tabela e máximo de linhas exibidas
+_PECA_COLUMNS = ("Alteração", "PECA", "Item", "Anterior", "Atual")
+MAX_PECA_ROWS = 20000
+
+class _DiffView:
+    """
+    Conteúdo dos dois painéis montado a partir dos opcodes: texto de cada painel,
+    linhas (do widget) de cada tag e os blocos de substituição, cujas linhas
+    lado a lado recebem o destaque por caractere só quando ficam visíveis.
+    """
+    def __init__(self, backup_lines: List[str], current_lines: List[str], opcodes):
+        self.backup_lines = backup_lines
+        self.current_lines = current_lines
+        width = max(4, len(str(max(len(backup_lines), len(current_lines)))))
+        self.prefix_chars = width + 2 # 'NNNN- '
+        left: List[str] = []
+        right: List[str] = []
+        self.left_tags: Dict[str, List[Tuple[int, int]]] = {"removed": [], "placeholder": []}
+        self.right_tags: Dict[str, List[Tuple[int, int]]] = {"added": [], "placeholder": []}
+        # Blocos de substituição: (linha inicial no widget, i1, j1, nº de pares lado a lado)
+        self.replace_rows: List[Tuple[int, int, int, int]] = []
+        self.highlighted: Set[int] = set()
+
+        def lines(target, source, first, last, marker):
+            target.extend(f"{n + 1:<{width}d}{marker} {source[n]}" if source[n].endswith("\n")
+                          else f"{n + 1:<{width}d}{marker} {source[n]}\n" for n in range(first, last))
+
+        row = 1
+        for tag, i1, i2, j1, j2 in opcodes:
+            rows = max(i2 - i1, j2 - j1)
+            if tag == "equal":
+                lines(left, backup_lines, i1, i2, " ")
+                lines(right, current_lines, j1, j2, " ")
+            else:
+                lines(left, backup_lines, i1, i2, "-")
+                lines(right, current_lines, j1, j2, "+")
+                left.append("\n" * (rows - (i2 - i1)))
+                right.append("\n" * (rows - (j2 - j1)))
+                if i2 > i1: self.left_tags["removed"].append((row, row + i2 - i1))
+                if i2 - i1 < rows: self.left_tags["placeholder"].append((row + i2 - i1, row + rows))
+                if j2 > j1: self.right_tags["added"].append((row, row + j2 - j1))
+                if j2 - j1 < rows: self.right_tags["placeholder"].append((row + j2 - j1, row + rows))
+                if tag == "replace":
+                    self.replace_rows.append((row, i1, j1, min(i2 - i1, j2 - j1)))
+            row += rows
+        self.left_text = "".join(left)
+        self.right_text = "".join(right)
+        self._replace_starts = [start for start, _, _, _ in self.replace_rows]
+
+    def pairs_in(self, first_row: int, last_row: int):
+        """Linhas lado a lado de blocos de substituição entre first_row e last_row: (linha, i, j)."""
+        k = max(bisect.bisect_right(self._replace_starts, first_row) - 1, 0)
+        while k < len(self.replace_rows):
+            start, i1, j1, count = self.replace_rows[k]
+            if start > last_row: break
+            for row in range(max(start, first_row), min(start + count, last_row + 1)):
+                yield row, i1 + row - start, j1 + row - start
+            k += 1
+
+def _build_diff_view(backup_lines: List[str], current_lines: List[str], should_continue: Callable[[], bool],
+                     progress: Callable[[float], None]) -> Optional[_DiffView]:
+    """Compara as linhas (fora da thread da interface) e monta os painéis; None se cancelado."""
+    opcodes = diff_lines(backup_lines, current_lines, should_continue, progress)
+    if opcodes is None or not should_continue():
+        return None
+    return _DiffView(backup_lines, current_lines, opcodes)
+
+def _add_tag_ranges(text_widget, tag: str, ranges: List[Tuple[int, int]]):
+    """Aplica tag às faixas de linhas [início, fim) em lotes (menos chamadas ao Tk)."""
+    for k in range(0, len(ranges), _TAG_BATCH):
+        indices = []
+        for first, last in ranges[k:k + _TAG_BATCH]:
+            indices += (f"{first}.0", f"{last}.0")
+        text_widget.tag_add(tag, *indices)
+
+def _show_diff(original_text, corrected_text, view: _DiffView):
+    """Preenche os dois painéis com a comparação já calculada."""
+    for text_widget, content, tags in ((original_text, view.left_text, view.left_tags),
+                                       (corrected_text, view.right_text, view.right_tags)):
+        text_widget.config(state=NORMAL)
+        text_widget.delete("1.0", END)
+        text_widget.insert("1.0", content)
+        for tag, ranges in tags.items():
+            _add_tag_ranges(text_widget, tag, ranges)
+        text_widget.config(state=DISABLED)
+    _highlight_visible(original_text, corrected_text, view)
+
+def _highlight_visible(original_text, corrected_text, view: Optional[_DiffView]):
+    """Destaca os caracteres diferentes só nas linhas substituídas visíveis (calculados uma vez por linha)."""
+    if view is None or not view.replace_rows:
+        return
+    offset = view.prefix_chars
+    for visible in (original_text, corrected_text): # A roda do mouse rola só um dos painéis
+        try:
+            first_row = int(visible.index("@0,0").split(".")[0])
+            last_row = int(visible.index(f"@0,{visible.winfo_height()}").split(".")[0])
+        except (TclError, ValueError):
+            continue
+        for row, i, j in view.pairs_in(first_row, last_row):
+            if row in view.highlighted: continue
+            view.highlighted.add(row)
+            left_spans, right_spans = intraline_spans(view.backup_lines[i], view.current_lines[j])
+            for text_widget, spans, tag in ((original_text, left_spans, "diff_char_orig"),
+                                            (corrected_text, right_spans, "diff_char_corr")):
+                for start, end in spans:
+                    text_widget.tag_add(tag, f"{row}.{start + offset}", f"{row}.{end + offset}")
 
-    Button(diff_window, text="Fechar", command=diff_window.destroy).pack(pady=5)
\ No newline at end of file
+def _show_peca_diff(peca_tree, summary_var, diff: PecaDiff):
+    """Preenche a tabela do modo PECAs (no máximo MAX_PECA_ROWS alterações)."""
+    peca_tree.delete(*peca_tree.get_children())
+    for change in diff.changes[:MAX_PECA_ROWS]:
+        peca_tree.insert("", END, values=change)
+    summary = diff.summary()
+    if len(diff.changes) > MAX_PECA_ROWS:
+        summary += f" (exibindo as primeiras {MAX_PECA_ROWS} de {len(diff.changes)} alterações)"
+    summary_var.set(summary)
@@ -1,5 +1,7 @@
 # constants.py
 
+import os
+
 # Constantes para nomes de campos
 REQUIRED_FIELDS = [
     "NOMEPECA", "TIPOPRODUTO", "GRUPO", "SECAO", "QUANTIDADE",
@@ -18,5 +20,16 @@ DEFAULT_ENCODING = 'ISO-8859-1'
 # Tags que são permitidas ter múltiplas ocorrências diretas sob PECA
 ALLOWED_MULTIPLE_PECA_CHILDREN = {"TABELAACO", "LISTAID"}
 
+# Tamanho (bytes) a partir do qual a verificação usa o modo streaming (iterparse)
+STREAMING_THRESHOLD_BYTES = 50 * 1024 * 1024
+
+# Cache persistente de resultados de verificação
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".xml_verifier_cache")
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Repositório de backups (conteúdo comprimido, endereçado pelo hash) e gerações guardadas por arquivo
+BACKUP_DIR = os.path.join(os.path.expanduser("~"), ".xml_verifier_backups")
+BACKUP_MAX_GENERATIONS = 20
+
 # Tag raiz esperada (para correção manual de estrutura)
 DEFAULT_ROOT_TAG = "DETALHAMENTOTEKLA"
\ No newline at end of file
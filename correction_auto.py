@@ -0,0 +1,118 @@
+# correction_auto.py
+
+import os
+import functools
+import threading
+from tkinter import *
+from tkinter import messagebox
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+# Importa do projeto local
+from .auto_fixes import AUTO_FIX_RULES, AutoFixReport, auto_fix_file, summarize_reports
+from .correction_structural import _unique_paths
+from .parallel import order_largest_first, run_in_process_pool
+from .result_store import ResultStore
+
+# Evita importação circular para type hinting
+if TYPE_CHECKING:
+    from .main_app import XMLVerifier
+
+# --- Funções de Orquestração (Chamadas pela UI) ---
+
+def start_auto_correction(app_instance: 'XMLVerifier'):
+    """Abre a escolha das regras da correção automática (chamado pelo botão)."""
+    if app_instance.is_fixing or app_instance.is_verifying or app_instance.is_correcting_value:
+        messagebox.showwarning("Aguarde", "Outra operação já está em andamento.", parent=app_instance.root)
+        return
+    if not app_instance.file_paths:
+        messagebox.showerror("Erro", "Por favor, selecione pelo menos um arquivo XML para corrigir.", parent=app_instance.root)
+        return
+
+    window = Toplevel(app_instance.root)
+    window.title("Correção Automática de Valores")
+    window.transient(app_instance.root)
+    Label(window, text=f"Regras a aplicar em todos os {len(app_instance.file_paths)} arquivo(s) selecionado(s):",
+          anchor=W).pack(fill=X, padx=10, pady=(10, 5))
+    rule_vars = {}
+    for name, (label, description) in AUTO_FIX_RULES.items():
+        rule_vars[name] = BooleanVar(value=False) # Nenhuma regra é aplicada sem ser marcada
+        Checkbutton(window, text=f"{label}: {description}", variable=rule_vars[name], anchor=W,
+                    justify=LEFT, wraplength=560).pack(fill=X, padx=20)
+    backup_var = BooleanVar(value=True)
+    Checkbutton(window, text="Guardar backup dos arquivos alterados (repositório de backups)", variable=backup_var, anchor=W).pack(fill=X, padx=10, pady=(10, 0))
+
+    def apply():
+        rules = tuple(name for name, var in rule_vars.items() if var.get())
+        if not rules:
+            messagebox.showerror("Erro", "Marque pelo menos uma regra.", parent=window)
+            return
+        backup = backup_var.get()
+        window.destroy()
+        app_instance.is_fixing = True
+        app_instance.disable_buttons()
+        app_instance.progress_frame.pack(fill=X, padx=5, pady=5)
+        app_instance.progress_var.set(0)
+        threading.Thread(target=auto_correction_thread, args=(app_instance, rules, backup, app_instance.get_worker_count()),
+                         daemon=True).start()
+
+    button_frame = Frame(window)
+    button_frame.pack(fill=X, padx=10, pady=10)
+    Button(button_frame, text="Aplicar", command=apply, bg="#4682B4", fg="white").pack(side=RIGHT, padx=5)
+    Button(button_frame, text="Cancelar", command=window.destroy).pack(side=RIGHT)
+
+def auto_correction_thread(app_instance: 'XMLVerifier', rules: Tuple[str, ...], backup: bool, max_workers: Optional[int] = None):
+    """
+    Thread da correção automática: cada arquivo é analisado uma vez em um processo,
+    recebe todas as regras escolhidas em uma única passada pela árvore, é gravado
+    (se mudou) e revalidado em memória. Desmarcar is_fixing descarta os pendentes.
+    """
+    file_paths = order_largest_first(_unique_paths(app_instance.file_paths))
+    total_files = len(file_paths)
+    reports: List[AutoFixReport] = []
+    final_results = [] # Alterações feitas + resultados da revalidação
+
+    try:
+        worker = functools.partial(auto_fix_file, rules=rules, backup=backup)
+        app_instance.update_status(f"Aplicando correção automática em {total_files} arquivo(s)...")
+        for i, (file_path, output, error) in enumerate(run_in_process_pool(worker, file_paths, max_workers,
+                                                                           lambda: app_instance.is_fixing)):
+            base_name = os.path.basename(file_path)
+            app_instance.progress_var.set(((i + 1) / total_files) * 100)
+            if error is not None:
+                final_results.append((base_name, "Erro", f"Erro crítico na correção automática: {str(error)}", "Correção Automática"))
+                continue
+            report, validation_results = output
+            reports.append(report)
+            final_results.extend((base_name, r_type, desc, loc) for r_type, desc, loc in report.messages())
+            if validation_results is not None:
+                final_results.extend(validation_results)
+            app_instance.update_status(f"Correção automática {i+1}/{total_files}: {base_name} "
+                                       f"({len(report.changes)} alteração(ões))")
+
+        app_instance.root.after(0, finalize_auto_correction, app_instance, reports, total_files, final_results)
+
+    except Exception as e:
+         print(f"Erro na thread de correção automática: {e}")
+         app_instance.root.after(0, lambda: messagebox.showerror("Erro Fatal", f"Ocorreu um erro inesperado durante a correção automática:\n{e}", parent=app_instance.root))
+         app_instance.root.after(0, app_instance.reset_ui_state)
+
+def finalize_auto_correction(app_instance: 'XMLVerifier', reports: List[AutoFixReport], total_files: int,
+                             final_results: List[Tuple[str, str, str, str]]):
+    """Atualiza a UI após a correção automática, com o resumo por regra."""
+    app_instance.results = ResultStore(final_results)
+    app_instance.auto_fix_reports = reports # Exportados junto com os resultados
+    app_instance.apply_filters()
+
+    summary = summarize_reports(reports)
+    written = sum(1 for report in reports if report.written)
+    failed = sum(1 for report in reports if report.error is not None)
+    lines = [f"{AUTO_FIX_RULES[rule][0]}: {changes} alteração(ões) em {files} arquivo(s)"
+             for rule, (changes, files) in summary.items()] or ["Nenhuma alteração necessária."]
+    msg = f"Correção Automática concluída. {written}/{total_files} arquivo(s) alterado(s).\n\n" + "\n".join(lines)
+    if failed:
+        msg += f"\n\n{failed} arquivo(s) não puderam ser corrigidos (veja os erros na tabela)."
+
+    app_instance.status_var.set(f"Correção Automática concluída. {written} arquivo(s) alterado(s), "
+                                f"{sum(changes for changes, _ in summary.values())} alteração(ões).")
+    messagebox.showinfo("Correção Automática Concluída", msg, parent=app_instance.root)
+    app_instance.reset_ui_state()
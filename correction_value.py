@@ -1,15 +1,18 @@
 # correction_value.py
 
+import io
 import os
-import shutil
 import re
 import threading
 from tkinter import messagebox
 from lxml import etree
-from typing import List, Tuple, Dict, TYPE_CHECKING
+from typing import List, Tuple, Dict, Union, TYPE_CHECKING
 
 # Importa do projeto local
 from .constants import DEFAULT_ENCODING
+from .location import Location, LINE_EXACT, as_location
+from .backup_store import backup_file
+from .splice_writer import SpliceWriter
 
 # Evita importação circular para type hinting
 if TYPE_CHECKING:
@@ -61,6 +64,65 @@ def _find_element_by_location(root: etree._Element, location_str: str) -> etree.
         print(f"Erro ao tentar encontrar elemento por localização '{location_str}': {e}")
         return None
 
+_STEP_RE = re.compile(r"([a-zA-Z0-9_:]+)(?:\[(\d+)\])?")
+
+class _LocationIndex:
+    """
+    Índice das localizações de um arquivo, montado uma vez por arquivo na correção:
+    as PECAs ficam em uma lista (ordinal = ordem do documento, como na verificação)
+    e os filhos de cada elemento visitado são agrupados por tag na primeira consulta.
+    Cada localização é resolvida em O(profundidade do caminho), sem XPath no documento.
+    Segue as regras da busca passo a passo de _find_element_by_location: TAG = primeiro
+    filho com a tag, TAG[i] = i-ésimo. O trecho "..." (IDs duplicados) procura entre os
+    descendentes o elemento da linha informada.
+    Recebe a Location dos resultados (campos já separados, sem reinterpretar texto);
+    localizações em texto também são aceitas. As que não apontam para uma PECA
+    usam _find_element_by_location (memorizado).
+    """
+    def __init__(self, root: etree._Element):
+        self.root = root
+        self.pecas = root.findall(".//PECA")
+        self._children: Dict[etree._Element, Dict[str, List[etree._Element]]] = {}
+        self._fallback: Dict[str, etree._Element | None] = {}
+
+    def find(self, location: Union[Location, str]) -> etree._Element | None:
+        location = as_location(location)
+        if location.peca is None:
+            location_str = str(location)
+            if location_str not in self._fallback:
+                self._fallback[location_str] = _find_element_by_location(self.root, location_str)
+            return self._fallback[location_str]
+        if location.peca > len(self.pecas): return None
+        element = self.pecas[location.peca - 1]
+        steps = location.path.split('/')[1:]
+        for position, step in enumerate(steps):
+            if step == "...":
+                # Descendente com a tag do passo seguinte (na linha exata, se conhecida)
+                if position + 1 >= len(steps): return None
+                tag = steps[position + 1]
+                candidates = [e for e in element.iter(tag) if e is not element]
+                if location.kind == LINE_EXACT:
+                    candidates = [e for e in candidates if e.sourceline == location.line]
+                return candidates[0] if candidates and position + 2 == len(steps) else None
+            step_match = _STEP_RE.fullmatch(step)
+            if step_match is None: return None
+            children = self._children_by_tag(element).get(step_match.group(1))
+            if not children: return None
+            index = int(step_match.group(2) or 1)
+            if index > len(children): return None
+            element = children[index - 1]
+        return element
+
+    def _children_by_tag(self, element: etree._Element) -> Dict[str, List[etree._Element]]:
+        groups = self._children.get(element)
+        if groups is None:
+            groups = {}
+            for child in element:
+                if isinstance(child.tag, str):
+                    groups.setdefault(child.tag, []).append(child)
+            self._children[element] = groups
+        return groups
+
 # --- Funções de Orquestração (Chamadas pela UI) ---
 
 def start_manual_value_correction(app_instance: 'XMLVerifier'):
@@ -69,22 +131,21 @@ def start_manual_value_correction(app_instance: 'XMLVerifier'):
         messagebox.showwarning("Aguarde", "Outra operação já está em andamento.", parent=app_instance.root)
         return
 
-    selected_ids = app_instance.result_tree.selection()
-    if not selected_ids:
+    selected_results = app_instance.get_selected_results()
+    if not selected_results:
         messagebox.showerror("Erro", "Selecione um ou mais itens na tabela de resultados para corrigir.", parent=app_instance.root)
         return
 
     correction_value = app_instance.correction_value_var.get()
 
-    tasks_to_process: List[Tuple[str, str, str, str]] = [] # (file_path, location_str, new_value, item_id)
+    tasks_to_process: List[Tuple[str, Location, str, int]] = [] # (file_path, location, new_value, item_id)
     files_involved = set()
     path_map = {os.path.basename(p): p for p in app_instance.file_paths}
 
-    for item_id in selected_ids:
+    for item_id, item_values in selected_results:
         try:
-            item_values = app_instance.result_tree.item(item_id, "values")
-            if not item_values: continue
-            arquivo_base, _, _, localizacao = item_values
+            arquivo_base = item_values[0]
+            localizacao = app_instance.results.location_object(item_id) # Campos já separados
             file_path = path_map.get(arquivo_base)
             if not file_path or not os.path.exists(file_path): continue
             files_involved.add(arquivo_base)
@@ -102,7 +163,7 @@ def start_manual_value_correction(app_instance: 'XMLVerifier'):
     if not messagebox.askyesno("Confirmar Correção de Valor",
                                f"Você selecionou {num_items} item(ns) em {num_files} arquivo(s).\n\n"
                                f"O valor em cada localização selecionada será substituído por:\n'{correction_value}'\n\n"
-                               f"Deseja continuar? (Serão criados backups .bak)", parent=app_instance.root):
+                               f"Deseja continuar? (Os originais serão guardados no repositório de backups)", parent=app_instance.root):
         return
 
     app_instance.is_correcting_value = True
@@ -113,10 +174,10 @@ def start_manual_value_correction(app_instance: 'XMLVerifier'):
                      args=(app_instance, tasks_to_process,),
                      daemon=True).start()
 
-def manual_value_correction_thread(app_instance: 'XMLVerifier', tasks: List[Tuple[str, str, str, str]]):
+def manual_value_correction_thread(app_instance: 'XMLVerifier', tasks: List[Tuple[str, Location, str, int]]):
     """Thread para realizar a correção de múltiplos valores em arquivos XML."""
     results: Dict[str, List] = {'success': [], 'failed': []}
-    tasks_by_file: Dict[str, List[Tuple[str, str, str]]] = {}
+    tasks_by_file: Dict[str, List[Tuple[Location, str, int]]] = {}
 
     for file_path, loc, val, item_id in tasks:
         if file_path not in tasks_by_file: tasks_by_file[file_path] = []
@@ -124,7 +185,6 @@ def manual_value_correction_thread(app_instance: 'XMLVerifier', tasks: List[Tupl
 
     for file_path, file_tasks in tasks_by_file.items():
         made_changes_in_file = False
-        backup_path = file_path + '.bak'
         tree = None
         root = None
         file_success_items = []
@@ -132,8 +192,10 @@ def manual_value_correction_thread(app_instance: 'XMLVerifier', tasks: List[Tupl
         base_name = os.path.basename(file_path) # Para mensagens de erro
 
         try:
-            # Backup
-            try: shutil.copy2(file_path, backup_path)
+            # Backup (os bytes lidos uma vez servem ao backup e ao parsing)
+            try:
+                with open(file_path, 'rb') as f: data = f.read()
+                backup_file(file_path, data, "Correção de Valor")
             except Exception as e:
                 err_msg = f"Falha ao criar backup '{base_name}': {e}"
                 for loc, val, item_id in file_tasks: file_failed_items.append((item_id, loc, err_msg, base_name))
@@ -143,7 +205,7 @@ def manual_value_correction_thread(app_instance: 'XMLVerifier', tasks: List[Tupl
             # Parse
             try:
                 parser = etree.XMLParser(remove_blank_text=False, encoding=DEFAULT_ENCODING)
-                tree = etree.parse(file_path, parser)
+                tree = etree.parse(io.BytesIO(data), parser, base_url=file_path)
                 root = tree.getroot()
             except Exception as e:
                 err_msg = f"Falha ao analisar XML '{base_name}': {e}"
@@ -151,22 +213,23 @@ def manual_value_correction_thread(app_instance: 'XMLVerifier', tasks: List[Tupl
                 results['failed'].extend(file_failed_items)
                 continue
 
-            # Processar tarefas no arquivo
+            # Processar tarefas no arquivo (índice montado uma vez por arquivo)
+            location_index = _LocationIndex(root)
+            writer = SpliceWriter(data)
             for loc, new_value, item_id in file_tasks:
                 try:
-                    target_element = _find_element_by_location(root, loc)
+                    target_element = location_index.find(loc)
                     if target_element is None: raise Exception(f"Elemento não encontrado: {loc}")
-                    target_element.text = new_value
+                    writer.set_text(target_element, new_value)
                     made_changes_in_file = True
                     file_success_items.append((item_id, loc, base_name)) # Adiciona basename para finalize
                 except Exception as e:
                     file_failed_items.append((item_id, loc, str(e), base_name)) # Adiciona basename
 
-            # Salvar se houve mudanças
+            # Salvar se houve mudanças (só os textos alterados são trocados no arquivo)
             if made_changes_in_file:
                 try:
-                    etree.indent(tree, space="  ")
-                    tree.write(file_path, encoding=DEFAULT_ENCODING, xml_declaration=True, pretty_print=False)
+                    writer.write(file_path, tree)
                     results['success'].extend(file_success_items)
                     results['failed'].extend(file_failed_items)
                 except Exception as e:
@@ -207,10 +270,10 @@ def finalize_manual_value_correction(app_instance: 'XMLVerifier', results: Dict[
                  msg_details += "- ... (mais falhas omitidas)\n"
 
     if num_failed == 0:
-        messagebox.showinfo(msg_title, msg_details + "\nBackups (.bak) foram criados.", parent=app_instance.root)
+        messagebox.showinfo(msg_title, msg_details + "\nBackups guardados (veja 'Comparar Original/Corrigido').", parent=app_instance.root)
         app_instance.status_var.set(f"{num_success} valor(es) corrigido(s).")
     elif num_success > 0:
-        messagebox.showwarning(msg_title, msg_details + "\nVerifique os detalhes. Backups (.bak) foram criados.", parent=app_instance.root)
+        messagebox.showwarning(msg_title, msg_details + "\nVerifique os detalhes. Backups guardados (veja 'Comparar Original/Corrigido').", parent=app_instance.root)
         app_instance.status_var.set(f"{num_success} sucesso(s), {num_failed} falha(s).")
     else:
         messagebox.showerror(msg_title, msg_details + "\nNenhum valor corrigido.", parent=app_instance.root)
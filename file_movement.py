@@ -16,7 +16,7 @@ def show_move_files_dialog(app_instance: 'XMLVerifier'):
         messagebox.showwarning("Aguarde", "Outra operação já está em andamento.", parent=app_instance.root)
         return
     
-    selected_items = app_instance.result_tree.selection()
+    selected_items = app_instance.get_selected_results()
     if not selected_items:
         selected_files = app_instance.file_paths.copy() if app_instance.file_paths else []
         if not selected_files:
@@ -24,15 +24,7 @@ def show_move_files_dialog(app_instance: 'XMLVerifier'):
             return
     else:
         # Extrai nomes de arquivos únicos dos itens selecionados
-        unique_files = set()
-        for item_id in selected_items:
-            try:
-                item_values = app_instance.result_tree.item(item_id, "values")
-                if item_values:
-                    file_name = item_values[0]  # O nome do arquivo é o primeiro valor
-                    unique_files.add(file_name)
-            except Exception:
-                continue
+        unique_files = set(item_values[0] for _, item_values in selected_items)  # O nome do arquivo é o primeiro valor
         
         # Mapeia nomes de arquivo para caminhos completos
         selected_files = []
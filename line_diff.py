@@ -0,0 +1,130 @@
+# line_diff.py
+# Comparação linha a linha (patience diff sobre linhas convertidas em inteiros).
+# Não importa tkinter: roda em uma thread da janela de comparação.
+
+import bisect
+import difflib
+from collections import Counter
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# Trecho sem linhas únicas em comum só é comparado em detalhe (SequenceMatcher) até este
+# produto de tamanhos; acima disso vira um bloco de substituição
+SMALL_REGION_CELLS = 250_000
+# Linhas mais longas que isto não têm detalhe por caractere
+INTRALINE_MAX_CHARS = 2000
+
+Opcode = Tuple[str, int, int, int, int] # (tag, i1, i2, j1, j2), como SequenceMatcher.get_opcodes()
+
+def _patience_anchors(a: List[int], alo: int, ahi: int, b: List[int], blo: int, bhi: int) -> List[Tuple[int, int]]:
+    """Pares (i, j) de linhas únicas nos dois trechos, na maior sequência crescente (patience)."""
+    count_a = Counter(a[alo:ahi])
+    count_b = Counter(b[blo:bhi])
+    b_position = {b[j]: j for j in range(blo, bhi) if count_b[b[j]] == 1 and count_a[b[j]] == 1}
+    if not b_position:
+        return []
+    pairs = [(i, b_position[a[i]]) for i in range(alo, ahi) if a[i] in b_position]
+    # Maior subsequência crescente de j (pilhas do patience sort)
+    tops: List[int] = []        # menor j no topo de cada pilha
+    top_index: List[int] = []   # índice em pairs desse topo
+    previous = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pile = bisect.bisect_left(tops, j)
+        if pile:
+            previous[k] = top_index[pile - 1]
+        if pile == len(tops):
+            tops.append(j); top_index.append(k)
+        else:
+            tops[pile] = j; top_index[pile] = k
+    anchors = []
+    k = top_index[-1]
+    while k >= 0:
+        anchors.append(pairs[k])
+        k = previous[k]
+    anchors.reverse()
+    return anchors
+
+def diff_lines(a: Sequence[str], b: Sequence[str], should_continue: Optional[Callable[[], bool]] = None,
+               progress: Optional[Callable[[float], None]] = None) -> Optional[List[Opcode]]:
+    """
+    Compara duas listas de linhas e retorna os opcodes (equal/delete/insert/replace).
+    Cada linha vira um inteiro (dicionário de linhas distintas), então as comparações
+    são entre inteiros. Prefixo e sufixo iguais são descartados, as linhas únicas nos
+    dois lados servem de âncora (patience diff) e os trechos entre âncoras são
+    tratados da mesma forma. O custo é quase linear para arquivos parecidos e para
+    arquivos reformatados por inteiro. progress recebe a fração já resolvida de a;
+    retorna None se should_continue() ficar falso.
+    """
+    ids = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    total = max(len(a_ids), 1)
+    matches: List[Tuple[int, int]] = []
+    done = 0
+    stack = [(0, len(a_ids), 0, len(b_ids))]
+    while stack:
+        if should_continue is not None and not should_continue():
+            return None
+        alo, ahi, blo, bhi = stack.pop()
+        # Prefixo e sufixo iguais
+        while alo < ahi and blo < bhi and a_ids[alo] == b_ids[blo]:
+            matches.append((alo, blo)); alo += 1; blo += 1; done += 1
+        while alo < ahi and blo < bhi and a_ids[ahi - 1] == b_ids[bhi - 1]:
+            ahi -= 1; bhi -= 1; matches.append((ahi, bhi)); done += 1
+        if alo == ahi or blo == bhi:
+            done += ahi - alo
+        else:
+            anchors = _patience_anchors(a_ids, alo, ahi, b_ids, blo, bhi)
+            if anchors:
+                matches.extend(anchors)
+                done += len(anchors)
+                for (i, j), (next_i, next_j) in zip([(alo - 1, blo - 1)] + anchors, anchors + [(ahi, bhi)]):
+                    if i + 1 < next_i or j + 1 < next_j:
+                        stack.append((i + 1, next_i, j + 1, next_j))
+            else:
+                if (ahi - alo) * (bhi - blo) <= SMALL_REGION_CELLS:
+                    matcher = difflib.SequenceMatcher(None, a_ids[alo:ahi], b_ids[blo:bhi], autojunk=False)
+                    for i, j, size in matcher.get_matching_blocks():
+                        matches.extend((alo + i + k, blo + j + k) for k in range(size))
+                done += ahi - alo
+        if progress is not None:
+            progress(min(done / total, 1.0))
+    matches.sort()
+    return _opcodes(matches, len(a_ids), len(b_ids))
+
+def _opcodes(matches: List[Tuple[int, int]], len_a: int, len_b: int) -> List[Opcode]:
+    """Converte os pares de linhas iguais (ordenados) em opcodes."""
+    opcodes: List[Opcode] = []
+    i = j = 0
+    k = 0
+    while k <= len(matches):
+        mi, mj = matches[k] if k < len(matches) else (len_a, len_b)
+        if i < mi and j < mj:
+            opcodes.append(("replace", i, mi, j, mj))
+        elif i < mi:
+            opcodes.append(("delete", i, mi, j, j))
+        elif j < mj:
+            opcodes.append(("insert", i, i, j, mj))
+        if k == len(matches):
+            break
+        # Sequência de pares na mesma diagonal
+        end = k + 1
+        while end < len(matches) and matches[end] == (mi + end - k, mj + end - k):
+            end += 1
+        size = end - k
+        opcodes.append(("equal", mi, mi + size, mj, mj + size))
+        i, j = mi + size, mj + size
+        k = end
+    return opcodes
+
+def intraline_spans(a_line: str, b_line: str) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    """Trechos (início, fim) de caracteres diferentes em cada uma das duas linhas."""
+    a_line = a_line.rstrip("\r\n")
+    b_line = b_line.rstrip("\r\n")
+    if len(a_line) > INTRALINE_MAX_CHARS or len(b_line) > INTRALINE_MAX_CHARS:
+        return [], []
+    a_spans, b_spans = [], []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a_line, b_line, autojunk=False).get_opcodes():
+        if tag == "equal": continue
+        if i1 < i2: a_spans.append((i1, i2))
+        if j1 < j2: b_spans.append((j1, j2))
+    return a_spans, b_spans
@@ -0,0 +1,114 @@
+# location.py
+# Localização estruturada dos resultados da verificação. Não importa tkinter.
+
+import re
+from typing import Optional, Union
+
+# Formas de linha na localização
+LINE_NONE = 0      # "PECA[n]/CAMPO"
+LINE_EXACT = 1     # "... (Linha L)"
+LINE_NEAR = 2      # "... (Próximo à Linha L)"
+LINE_COLUMN = 3    # "Linha L, Coluna C" (erros do parser)
+LINE_ONLY = 4      # "Linha L" (erro fatal)
+
+# Números sem zeros à esquerda, para a conversão int <-> str ser exata
+_NUM = r"(0|[1-9]\d*)"
+_LOCATION_RE = re.compile(r"(?:PECA\[([1-9]\d*)\])?(.*?)(?: \((Linha|Próximo à Linha) " + _NUM + r"\))?", re.DOTALL)
+_LINE_COLUMN_RE = re.compile(r"Linha " + _NUM + r", Coluna " + _NUM)
+_LINE_ONLY_RE = re.compile(r"Linha " + _NUM)
+
+def _element_line(element) -> Optional[int]:
+    try:
+        return getattr(element, 'sourceline', None)
+    except Exception:
+        return None
+
+class Location:
+    """
+    Localização de um resultado em campos: ordinal da PECA (base 1, None fora de
+    PECA), restante do caminho de tags (ex.: "/TABELAACO/POSICAO[2]/QTDE"), forma
+    da linha (LINE_*), linha e coluna. Só vira texto em str(), no formato exibido
+    ("PECA[3]/QUANTIDADE (Linha 42)"). Imutável na prática, comparável e picklable.
+    O deslocamento em bytes não é guardado: o lxml não o informa por elemento.
+    """
+    __slots__ = ("peca", "path", "kind", "line", "column")
+
+    def __init__(self, peca: Optional[int] = None, path: str = "", kind: int = LINE_NONE,
+                 line: Optional[int] = None, column: Optional[int] = None):
+        self.peca = peca
+        self.path = path
+        self.kind = kind
+        self.line = line
+        self.column = column
+
+    @classmethod
+    def of(cls, element, peca: Optional[int], path: str = "") -> 'Location':
+        """Localização de um elemento lxml: linha do elemento ou, sem ela, a do pai."""
+        line = _element_line(element)
+        if line is not None:
+            return cls(peca, path, LINE_EXACT, line)
+        parent = element.getparent()
+        if parent is not None:
+            line = _element_line(parent)
+            if line is not None:
+                return cls(peca, path, LINE_NEAR, line)
+        return cls(peca, path)
+
+    @classmethod
+    def parse(cls, text: str) -> 'Location':
+        """Decompõe uma localização em texto (ex.: vinda de versões antigas do cache).
+        Textos livres ("Geral") ficam inteiros em path."""
+        if text.startswith("Linha "): # Só erros do parser começam assim
+            match = _LINE_COLUMN_RE.fullmatch(text)
+            if match:
+                return cls(None, "", LINE_COLUMN, int(match.group(1)), int(match.group(2)))
+            match = _LINE_ONLY_RE.fullmatch(text)
+            if match:
+                return cls(None, "", LINE_ONLY, int(match.group(1)))
+        peca_text, path, line_label, line_text = _LOCATION_RE.fullmatch(text).groups()
+        peca = int(peca_text) if peca_text else None
+        if line_label:
+            return cls(peca, path, LINE_EXACT if line_label == "Linha" else LINE_NEAR, int(line_text))
+        return cls(peca, path)
+
+    def __str__(self) -> str:
+        kind = self.kind
+        if kind == LINE_COLUMN:
+            return f"Linha {self.line}, Coluna {self.column}"
+        if kind == LINE_ONLY:
+            return f"Linha {self.line}"
+        text = self.path if self.peca is None else f"PECA[{self.peca}]{self.path}"
+        if kind == LINE_EXACT:
+            return f"{text} (Linha {self.line})"
+        if kind == LINE_NEAR:
+            return f"{text} (Próximo à Linha {self.line})"
+        return text
+
+    def fields(self):
+        return (self.peca, self.path, self.kind, self.line, self.column)
+
+    def __repr__(self) -> str:
+        return f"Location{self.fields()!r}"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Location) and self.fields() == other.fields()
+
+    def __hash__(self) -> int:
+        return hash(self.fields())
+
+    def __reduce__(self):
+        # Forma compacta ao atravessar processos (pickle)
+        return (Location, self.fields())
+
+    def to_json(self) -> list:
+        """Forma serializável em JSON ([peca, caminho, forma, linha, coluna]); ver from_json."""
+        return list(self.fields())
+
+    @classmethod
+    def from_json(cls, value) -> Union['Location', str]:
+        """Inverso de to_json; textos livres (ex.: "Geral") são devolvidos como estão."""
+        return cls(*value) if isinstance(value, list) else value
+
+def as_location(value: Union[Location, str]) -> Location:
+    """Aceita uma Location ou a localização em texto."""
+    return value if isinstance(value, Location) else Location.parse(str(value))
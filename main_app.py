@@ -2,17 +2,42 @@
 
 import os
 import csv
+import queue
 import threading
 from tkinter import *
 from tkinter import filedialog, messagebox, ttk
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 # --- Importações dos módulos locais ---
 from .constants import DEFAULT_ENCODING # Apenas o necessário aqui
-from .verification import run_verification_checks
+from .verification import run_verification_batch, VerificationLimits
+from .parallel import default_worker_count
+from .cache import VerificationCache
+from .batch_index import BatchIdIndex
+from .result_store import ResultStore
+from .result_view import VirtualResultView
 from .correction_structural import start_structural_correction
 from .correction_value import start_manual_value_correction
+from .correction_auto import start_auto_correction
 from .comparison import show_comparison_window
+from .profiling import write_profiles_csv
+from .performance_window import show_performance_window
+from .prescreen import write_triage_csv
+from .auto_fixes import write_auto_fix_csv
+
+# Espera após a última tecla antes de filtrar pela pesquisa
+FILTER_DEBOUNCE_MS = 200
+# Entrega dos resultados à tabela durante a verificação: intervalo e máximo de linhas por vez
+RESULTS_DRAIN_INTERVAL_MS = 150
+RESULTS_DRAIN_MAX_ROWS = 20000
+
+class _VerificationDone:
+    """Marca, na fila de resultados, o fim da verificação (com os dados para finalizar)."""
+    def __init__(self, cache_status: str = "", profiles=None, error: Optional[Exception] = None, triage=None):
+        self.cache_status = cache_status
+        self.profiles = profiles
+        self.triage = triage
+        self.error = error
 
 class XMLVerifier:
     def __init__(self, root):
@@ -22,10 +47,20 @@ class XMLVerifier:
 
         # Variáveis de estado
         self.file_paths: List[str] = []
-        self.results: List[Tuple[str, str, str, str]] = [] # (filename, type, description, location)
+        self.results = ResultStore() # Sequência de (filename, type, description, location)
         self.is_verifying = False
         self.is_fixing = False # Para correção estrutural
         self.is_correcting_value = False # Para correção manual de valor
+        self.performance_profiles = [] # Perfis (VerificationProfile) da última verificação medida
+        self.triage_reports = [] # Relatórios (PrescreenReport) da triagem rápida da última verificação
+        self.auto_fix_reports = [] # Relatórios (AutoFixReport) da última correção automática
+        self._filter_after_id: Optional[str] = None # Filtragem agendada (debounce da pesquisa)
+        self._filter_generation = 0 # Descarta resultados de filtragens já superadas
+        self._last_filter = None # (store, filtros, índices, linhas) da última filtragem exibida
+        # Resultados da verificação em andamento: a thread enfileira, a thread principal consome
+        self._result_queue: "queue.Queue" = queue.Queue()
+        self._pending_rows = None # (lista, posição) do lote sendo transferido aos poucos
+        self._progress_text = ""
 
         # --- Configuração da UI (Widgets) ---
         self._setup_ui()
@@ -45,8 +80,28 @@ class XMLVerifier:
         self.verify_button.grid(row=0, column=3, padx=5, pady=5)
         self.fix_button = Button(file_frame, text="Corrigir Estrutura", command=self.start_fixing_ui, bg="#FFA500", fg="white")
         self.fix_button.grid(row=0, column=4, padx=5, pady=5)
+        Label(file_frame, text="Processos:").grid(row=0, column=5, padx=(15, 2), pady=5)
+        self.workers_var = IntVar(value=default_worker_count())
+        Spinbox(file_frame, from_=1, to=max(64, default_worker_count()), textvariable=self.workers_var, width=4).grid(row=0, column=6, padx=2, pady=5)
+        self.use_cache_var = BooleanVar(value=True)
+        Checkbutton(file_frame, text="Usar cache", variable=self.use_cache_var).grid(row=0, column=7, padx=5, pady=5)
+        self.profile_var = BooleanVar(value=False)
+        Checkbutton(file_frame, text="Medir desempenho", variable=self.profile_var).grid(row=0, column=8, padx=5, pady=5)
+        self.prescreen_var = BooleanVar(value=False)
+        Checkbutton(file_frame, text="Triagem rápida", variable=self.prescreen_var).grid(row=0, column=9, padx=5, pady=5)
+        # Limites por arquivo (em branco = sem limite)
+        limits_frame = Frame(file_frame)
+        limits_frame.grid(row=1, column=0, columnspan=10, padx=5, sticky=W)
+        self.max_issues_var = StringVar()
+        self.max_issues_per_check_var = StringVar()
+        self.max_seconds_var = StringVar()
+        for label, var in (("Máx. problemas por arquivo:", self.max_issues_var),
+                           ("Máx. por verificação:", self.max_issues_per_check_var),
+                           ("Máx. segundos por arquivo:", self.max_seconds_var)):
+            Label(limits_frame, text=label).pack(side=LEFT, padx=(0, 2))
+            Entry(limits_frame, textvariable=var, width=7).pack(side=LEFT, padx=(0, 15))
         self.file_label = Label(file_frame, text="Nenhum arquivo selecionado")
-        self.file_label.grid(row=1, column=0, columnspan=5, padx=5, pady=5, sticky=W)
+        self.file_label.grid(row=2, column=0, columnspan=10, padx=5, pady=5, sticky=W)
 
         # --- Barra de Progresso ---
         self.progress_var = DoubleVar()
@@ -72,35 +127,15 @@ class XMLVerifier:
         self.search_var = StringVar()
         search_entry = Entry(filter_frame, textvariable=self.search_var, width=30)
         search_entry.grid(row=0, column=5, padx=5, pady=5)
-        search_entry.bind("<KeyRelease>", self.apply_filters)
+        search_entry.bind("<KeyRelease>", self._schedule_filters)
         Button(filter_frame, text="Aplicar Filtros", command=self.apply_filters).grid(row=0, column=6, padx=5, pady=5)
         Button(filter_frame, text="Limpar Filtros", command=self.clear_filters).grid(row=0, column=7, padx=5, pady=5)
 
         # --- Frame de Resultados (Treeview) ---
         result_frame = LabelFrame(main_frame, text="Resultados da Verificação")
         result_frame.pack(fill=BOTH, expand=True, padx=5, pady=5)
-        self.result_tree = ttk.Treeview(result_frame, columns=("Arquivo", "Tipo", "Descrição", "Localização"),
-                                        show="headings", selectmode='extended')
-        self.result_tree.heading("Arquivo", text="Arquivo")
-        self.result_tree.heading("Tipo", text="Tipo")
-        self.result_tree.heading("Descrição", text="Descrição")
-        self.result_tree.heading("Localização", text="Localização")
-        self.result_tree.column("Arquivo", width=150, anchor=W)
-        self.result_tree.column("Tipo", width=80, anchor=W)
-        self.result_tree.column("Descrição", width=500, anchor=W)
-        self.result_tree.column("Localização", width=250, anchor=W)
-        y_scrollbar = ttk.Scrollbar(result_frame, orient=VERTICAL, command=self.result_tree.yview)
-        self.result_tree.configure(yscroll=y_scrollbar.set)
-        x_scrollbar = ttk.Scrollbar(result_frame, orient=HORIZONTAL, command=self.result_tree.xview)
-        self.result_tree.configure(xscroll=x_scrollbar.set)
-        self.result_tree.grid(row=0, column=0, sticky=(N, S, E, W))
-        y_scrollbar.grid(row=0, column=1, sticky=(N, S))
-        x_scrollbar.grid(row=1, column=0, sticky=(E, W))
-        result_frame.grid_rowconfigure(0, weight=1)
-        result_frame.grid_columnconfigure(0, weight=1)
-        self.result_tree.tag_configure("erro", background="#ffcccc")
-        self.result_tree.tag_configure("aviso", background="#ffffcc")
-        self.result_tree.tag_configure("info", background="#ccffcc")
+        # Tabela virtualizada: só as linhas visíveis existem na Treeview
+        self.result_view = VirtualResultView(result_frame)
 
         # --- Frame de Correção Manual ---
         correction_frame = LabelFrame(main_frame, text="Correção Manual de Valor (para item(ns) selecionado(s))")
@@ -111,6 +146,8 @@ class XMLVerifier:
         self.correction_entry.grid(row=0, column=1, padx=5, pady=5, sticky=W)
         self.correct_value_button = Button(correction_frame, text="Corrigir Valor Selecionado(s)", command=self.start_value_correction_ui, bg="#4682B4", fg="white")
         self.correct_value_button.grid(row=0, column=2, padx=10, pady=5)
+        self.auto_fix_button = Button(correction_frame, text="Correção Automática...", command=self.start_auto_correction_ui, bg="#4682B4", fg="white")
+        self.auto_fix_button.grid(row=0, column=3, padx=10, pady=5)
 
         # --- Frame de Botões de Ação ---
         button_frame = Frame(main_frame)
@@ -118,6 +155,7 @@ class XMLVerifier:
         Button(button_frame, text="Exportar Resultados", command=self.export_results).pack(side=LEFT, padx=5)
         Button(button_frame, text="Limpar Resultados", command=self.clear_results_ui).pack(side=LEFT, padx=5)
         Button(button_frame, text="Comparar Original/Corrigido", command=self.compare_files_ui).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Desempenho", command=self.show_performance_ui).pack(side=LEFT, padx=5)
         self.count_var = StringVar(value="0")
         Label(button_frame, textvariable=self.count_var, font=("Arial", 10, "bold")).pack(side=RIGHT)
         Label(button_frame, text="Problemas exibidos: ").pack(side=RIGHT, padx=5)
@@ -175,12 +213,27 @@ class XMLVerifier:
         if not self.file_paths:
             messagebox.showerror("Erro", "Por favor, selecione pelo menos um arquivo XML.", parent=self.root)
             return
+        try:
+            limits = self.get_verification_limits()
+        except ValueError as e:
+            messagebox.showerror("Erro", f"Limite inválido: {e}", parent=self.root)
+            return
         self.is_verifying = True
         self.disable_buttons()
         self.progress_frame.pack(fill=X, padx=5, pady=5)
         self.progress_var.set(0)
         self.clear_results() # Limpa resultados antes de verificar
-        threading.Thread(target=self._verification_thread_runner, daemon=True).start()
+        self.performance_profiles = []
+        self.triage_reports = []
+        self.auto_fix_reports = []
+        self._result_queue = queue.Queue()
+        self._pending_rows = None
+        self._progress_text = "Verificando..."
+        self.root.after(RESULTS_DRAIN_INTERVAL_MS, self._drain_result_queue)
+        threading.Thread(target=self._verification_thread_runner,
+                         args=(self.get_worker_count(), self.use_cache_var.get(), self.profile_var.get(), limits,
+                               self.prescreen_var.get()),
+                         daemon=True).start()
 
     def start_fixing_ui(self):
         """Inicia a correção estrutural a partir do botão da UI."""
@@ -192,11 +245,19 @@ class XMLVerifier:
         # Chama a função do módulo correction_value, passando a instância atual
         start_manual_value_correction(self)
 
+    def start_auto_correction_ui(self):
+        """Abre a correção automática por regras (todos os arquivos selecionados)."""
+        start_auto_correction(self)
+
     def compare_files_ui(self):
         """Mostra a janela de comparação a partir do botão da UI."""
         # Chama a função do módulo comparison, passando a instância atual
         show_comparison_window(self)
 
+    def show_performance_ui(self):
+        """Mostra o painel de desempenho da última verificação medida."""
+        show_performance_window(self)
+
     def clear_results_ui(self):
         """Limpa os resultados da UI."""
         self.clear_results()
@@ -219,12 +280,37 @@ class XMLVerifier:
         self.verify_button.config(state=DISABLED)
         self.fix_button.config(state=DISABLED)
         self.correct_value_button.config(state=DISABLED)
+        self.auto_fix_button.config(state=DISABLED)
 
     def enable_buttons(self):
         """Habilita botões após operações."""
         self.verify_button.config(state=NORMAL)
         self.fix_button.config(state=NORMAL)
         self.correct_value_button.config(state=NORMAL)
+        self.auto_fix_button.config(state=NORMAL)
+
+    def get_worker_count(self) -> int:
+        """Lê o número de processos configurado (chamar na thread principal)."""
+        try:
+            return max(1, int(self.workers_var.get()))
+        except (TclError, ValueError):
+            return default_worker_count()
+
+    def get_verification_limits(self) -> VerificationLimits:
+        """Lê os limites de verificação (campos em branco = sem limite). Levanta ValueError se inválidos."""
+        def read(var, convert, name):
+            text = var.get().strip().replace(",", ".")
+            if not text: return None
+            try:
+                value = convert(text)
+            except ValueError:
+                raise ValueError(f"'{text}' em '{name}'")
+            if value <= 0:
+                raise ValueError(f"'{name}' deve ser maior que zero")
+            return value
+        return VerificationLimits(read(self.max_issues_var, int, "Máx. problemas por arquivo"),
+                                  read(self.max_issues_per_check_var, int, "Máx. por verificação"),
+                                  read(self.max_seconds_var, float, "Máx. segundos por arquivo"))
 
     def update_status(self, text):
         """Atualiza a barra de status (thread-safe)."""
@@ -236,30 +322,70 @@ class XMLVerifier:
 
     def clear_results(self):
         """Limpa a lista interna de resultados e a Treeview."""
-        self.results = []
-        for item in self.result_tree.get_children():
-            self.result_tree.delete(item)
+        self.results = ResultStore()
+        self._filter_generation += 1
+        self._last_filter = None
+        self.result_view.clear()
         self.count_var.set("0")
         # Não reseta o status aqui necessariamente
 
+    def _schedule_filters(self, event=None):
+        """Agenda a filtragem para quando a digitação na pesquisa parar."""
+        if self._filter_after_id is not None:
+            self.root.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.root.after(FILTER_DEBOUNCE_MS, self.apply_filters)
+
     def apply_filters(self, event=None):
-        """Aplica os filtros selecionados à Treeview."""
-        for item in self.result_tree.get_children(): self.result_tree.delete(item)
-        filtered_results = []
+        """
+        Aplica os filtros selecionados à tabela (só a página visível é montada).
+        A filtragem roda em uma thread; quando o texto pesquisado apenas ganhou
+        caracteres, só os resultados da filtragem anterior são testados.
+        """
+        if self._filter_after_id is not None:
+            self.root.after_cancel(self._filter_after_id)
+            self._filter_after_id = None
         tipo_filter = self.tipo_var.get()
         arquivo_filter = self.arquivo_var.get()
         search_filter = self.search_var.get().lower().strip()
-        for result in self.results: # Usa a lista interna self.results
-            arquivo, tipo, descricao, localizacao = result
-            if tipo_filter != "Todos" and tipo != tipo_filter: continue
-            if arquivo_filter != "Todos" and arquivo != arquivo_filter: continue
-            if search_filter and search_filter not in descricao.lower() and search_filter not in localizacao.lower(): continue
-            filtered_results.append(result)
-        for result in filtered_results:
-            arquivo, tipo, descricao, localizacao = result
-            tag = tipo.lower()
-            self.result_tree.insert("", END, values=(arquivo, tipo, descricao, localizacao), tags=(tag,))
-        self.count_var.set(str(len(filtered_results))) # Atualiza contador para itens *exibidos*
+        filters = (None if tipo_filter == "Todos" else tipo_filter,
+                   None if arquivo_filter == "Todos" else arquivo_filter,
+                   search_filter)
+        store = self.results
+        within = None
+        if self._last_filter is not None:
+            last_store, last_filters, last_indices, last_rows = self._last_filter
+            if (last_store is store and last_rows == len(store) and last_filters[:2] == filters[:2]
+                    and last_filters[2] in search_filter):
+                within = last_indices
+        self._filter_generation += 1
+        threading.Thread(target=self._filter_thread_runner,
+                         args=(self._filter_generation, store, filters, within), daemon=True).start()
+
+    def _filter_thread_runner(self, generation: int, store: ResultStore, filters, within):
+        """Filtra os resultados fora da thread da UI e entrega os índices à thread principal."""
+        try:
+            rows = len(store)
+            indices = store.filter_indices(*filters, within=within, stop=rows)
+        except Exception as e:
+            print(f"Erro ao filtrar resultados: {e}")
+            return
+        self.root.after(0, self._show_filtered_results, generation, store, filters, indices, rows)
+
+    def _show_filtered_results(self, generation: int, store: ResultStore, filters, indices: List[int], rows: int):
+        """Exibe (na thread principal) o resultado da filtragem mais recente."""
+        if generation != self._filter_generation:
+            return # Filtros mudaram enquanto a thread trabalhava
+        if len(store) > rows:
+            # Resultados que chegaram durante a filtragem (verificação em andamento)
+            indices = indices + store.filter_indices(*filters, start=rows)
+            rows = len(store)
+        self._last_filter = (store, filters, indices, rows)
+        self.result_view.set_rows(store, indices)
+        self.count_var.set(str(len(indices))) # Atualiza contador para itens *exibidos*
+
+    def get_selected_results(self) -> List[Tuple[int, Tuple[str, str, str, str]]]:
+        """Itens selecionados na tabela (inclusive fora da área visível): [(índice, resultado)]."""
+        return self.result_view.selected_rows()
 
     def clear_filters(self):
         """Limpa os filtros e reaplica."""
@@ -286,51 +412,152 @@ class XMLVerifier:
                 writer.writerow(["Arquivo", "Tipo", "Descrição", "Localização"])
                 for result in self.results: # Exporta todos os resultados internos
                     writer.writerow(result)
-            messagebox.showinfo("Exportar", f"Resultados exportados com sucesso para:\n{file_path}", parent=self.root)
+            message = f"Resultados exportados com sucesso para:\n{file_path}"
+            if self.performance_profiles:
+                # Medições de desempenho vão para um CSV ao lado
+                profile_path = os.path.splitext(file_path)[0] + "_desempenho.csv"
+                write_profiles_csv(self.performance_profiles, profile_path)
+                message += f"\n\nDesempenho exportado para:\n{profile_path}"
+            if self.triage_reports:
+                triage_path = os.path.splitext(file_path)[0] + "_triagem.csv"
+                with open(triage_path, 'w', encoding='utf-8', newline='') as f:
+                    write_triage_csv(self.triage_reports, f)
+                message += f"\n\nTriagem exportada para:\n{triage_path}"
+            if self.auto_fix_reports:
+                fixes_path = os.path.splitext(file_path)[0] + "_correcoes.csv"
+                with open(fixes_path, 'w', encoding='utf-8', newline='') as f:
+                    write_auto_fix_csv(self.auto_fix_reports, f)
+                message += f"\n\nCorreções automáticas exportadas para:\n{fixes_path}"
+            messagebox.showinfo("Exportar", message, parent=self.root)
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao exportar resultados: {str(e)}", parent=self.root)
 
     # --- Lógica de Thread de Verificação ---
 
-    def _verification_thread_runner(self):
-        """Executa a lógica de verificação em uma thread separada."""
-        all_results = []
+    def _verification_thread_runner(self, max_workers: int, use_cache: bool, measure: bool = False,
+                                    limits: Optional[VerificationLimits] = None, prescreen: bool = False):
+        """
+        Executa a lógica de verificação em uma thread separada, distribuindo os arquivos em processos.
+        Os resultados de cada arquivo vão para a fila consumida por _drain_result_queue
+        (a lista é repassada sem cópia e descartada depois de entrar no ResultStore).
+        """
+        cache = None
+        id_index = None
+        profiles = [] if measure else None
+        triage = [] if prescreen else None
+        result_queue = self._result_queue
         try:
+            if use_cache:
+                try:
+                    cache = VerificationCache()
+                except Exception as e:
+                    print(f"Cache de verificação indisponível: {e}")
             total_files = len(self.file_paths)
-            for i, file_path in enumerate(self.file_paths):
-                if not self.is_verifying: break
+            if total_files > 1:
+                id_index = BatchIdIndex() # IDs repetidos entre arquivos do lote
+            if triage is not None:
+                self._progress_text = "Triagem rápida dos arquivos..."
+            for i, (file_path, file_results) in enumerate(run_verification_batch(self.file_paths, max_workers, lambda: self.is_verifying,
+                                                                                      cache, id_index, profiles, limits, triage)):
                 base_name = os.path.basename(file_path)
-                self.update_status(f"Verificando arquivo {i+1}/{total_files}: {base_name}")
+                self._progress_text = f"Verificado arquivo {i+1}/{total_files}: {base_name}{self._cache_status_suffix(cache)}"
                 self.progress_var.set(((i + 1) / total_files) * 100)
-                try:
-                    # Chama a função de verificação do módulo verification
-                    file_results = run_verification_checks(file_path)
-                    all_results.extend(file_results)
-                except Exception as e:
-                    # Adiciona erro se a própria função run_verification_checks falhar
-                    all_results.append((base_name, "Erro", f"Erro inesperado ao processar arquivo: {str(e)}", "Geral"))
+                # Entrega os resultados do arquivo à thread principal assim que ele termina
+                result_queue.put(file_results)
+
+            if id_index is not None and self.is_verifying:
+                self._progress_text = "Procurando IDs duplicados entre arquivos..."
+                result_queue.put(list(id_index.duplicate_results()))
 
-            # Atualiza a UI após o término (na thread principal)
-            self.root.after(0, self._finalize_verification, all_results)
+            # Marca o fim: a UI finaliza depois de consumir todos os resultados
+            result_queue.put(_VerificationDone(self._cache_status_suffix(cache), profiles, triage=triage))
 
         except Exception as e:
              print(f"Erro na thread de verificação: {e}")
-             self.root.after(0, lambda: messagebox.showerror("Erro Fatal", f"Ocorreu um erro inesperado durante a verificação:\n{e}", parent=self.root))
-             self.root.after(0, self.reset_ui_state)
+             result_queue.put(_VerificationDone(error=e))
+        finally:
+            if cache is not None:
+                try: cache.close()
+                except Exception as e: print(f"Erro ao gravar cache de verificação: {e}")
+            if id_index is not None:
+                id_index.close()
+
+    @staticmethod
+    def _cache_status_suffix(cache) -> str:
+        """Texto com acertos/falhas do cache para a barra de status."""
+        if cache is None: return ""
+        return f" | Cache: {cache.hits} acerto(s), {cache.misses} falha(s)"
+
+    def _drain_result_queue(self):
+        """
+        Consome (na thread principal) a fila de resultados da verificação, no máximo
+        RESULTS_DRAIN_MAX_ROWS linhas por vez para a interface continuar responsiva,
+        e atualiza tabela e contadores. Reagenda-se até encontrar o fim da verificação.
+        """
+        first_new_row = len(self.results)
+        budget = RESULTS_DRAIN_MAX_ROWS
+        done = None
+        while budget > 0:
+            if self._pending_rows is None:
+                try:
+                    item = self._result_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, _VerificationDone):
+                    done = item
+                    break
+                self._pending_rows = (item, 0)
+            rows, position = self._pending_rows
+            chunk = rows[position:position + budget] if position or len(rows) > budget else rows
+            self.results.extend(chunk)
+            budget -= len(chunk)
+            position += len(chunk)
+            self._pending_rows = (rows, position) if position < len(rows) else None
+
+        if len(self.results) > first_new_row:
+            self._show_new_results(first_new_row)
+        if done is None:
+            if self.is_verifying:
+                self.status_var.set(f"{self._progress_text} | {self._results_summary()}")
+            self.root.after(RESULTS_DRAIN_INTERVAL_MS, self._drain_result_queue)
+        elif done.error is not None:
+            messagebox.showerror("Erro Fatal", f"Ocorreu um erro inesperado durante a verificação:\n{done.error}", parent=self.root)
+            self.reset_ui_state()
+        else:
+            self._finalize_verification(done.cache_status, done.profiles, done.triage)
 
-    def _finalize_verification(self, verification_results: List[Tuple[str, str, str, str]]):
-        """Atualiza a UI após a conclusão da verificação."""
-        self.results = verification_results # Atualiza a lista principal de resultados
-        self.update_status("Atualizando resultados na tabela...")
-        self.apply_filters() # Exibe os resultados filtrados
+    def _show_new_results(self, first_new_row: int):
+        """Acrescenta à tabela as linhas novas que passam nos filtros atuais."""
+        tipo_filter = self.tipo_var.get()
+        arquivo_filter = self.arquivo_var.get()
+        filters = (None if tipo_filter == "Todos" else tipo_filter,
+                   None if arquivo_filter == "Todos" else arquivo_filter,
+                   self.search_var.get().lower().strip())
+        self._last_filter = None # O conjunto exibido cresceu; não serve de base para refinamento
+        self.result_view.extend_rows(self.results, self.results.filter_indices(*filters, start=first_new_row))
+        self.count_var.set(str(len(self.result_view.indices)))
+
+    def _results_summary(self) -> str:
+        num_erros = self.results.count("Erro")
+        num_avisos = self.results.count("Aviso")
+        return f"{len(self.results)} problemas ({num_erros} erros, {num_avisos} avisos)"
+
+    def _finalize_verification(self, cache_status: str = "", profiles=None, triage=None):
+        """Atualiza a UI após a conclusão da verificação (os resultados já estão na tabela)."""
+        if profiles:
+            self.performance_profiles = profiles
+        if triage:
+            self.triage_reports = triage
+            suspicious = sum(1 for report in triage if report.is_suspicious)
+            cache_status += f" | Triagem: {suspicious} suspeito(s) de {len(triage)}"
 
         if not self.results:
-            self.status_var.set("Verificação concluída. Nenhum problema encontrado!")
+            self.status_var.set("Verificação concluída. Nenhum problema encontrado!" + cache_status)
         else:
-            num_erros = sum(1 for r in self.results if r[1] == "Erro")
-            num_avisos = sum(1 for r in self.results if r[1] == "Aviso")
+            num_erros = self.results.count("Erro")
+            num_avisos = self.results.count("Aviso")
             msg = f"Verificação concluída. {len(self.results)} problemas encontrados ({num_erros} erros, {num_avisos} avisos)."
-            self.status_var.set(msg)
+            self.status_var.set(msg + cache_status)
 
         self.reset_ui_state()
 
@@ -0,0 +1,59 @@
+# parallel.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+# Intervalo (s) entre verificações do sinal de cancelamento enquanto se espera um worker
+CANCEL_POLL_INTERVAL = 0.2
+
+def default_worker_count() -> int:
+    """Número padrão de processos: um por núcleo disponível."""
+    return os.cpu_count() or 1
+
+def order_largest_first(file_paths: Iterable[str]) -> List[str]:
+    """Ordena os arquivos do maior para o menor (reduz a latência da cauda no pool)."""
+    def _size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+    return sorted(file_paths, key=_size, reverse=True)
+
+def run_in_process_pool(func: Callable, items: Iterable[Any], max_workers: Optional[int] = None,
+                        should_continue: Optional[Callable[[], bool]] = None) -> Iterator[Tuple[Any, Any, Optional[BaseException]]]:
+    """
+    Executa func(item) para cada item em um ProcessPoolExecutor.
+    Gera (item, resultado, exceção) na ordem de conclusão; exceção é None em caso de sucesso.
+    Os itens são submetidos na ordem recebida. Se should_continue() retornar False,
+    as tarefas pendentes são canceladas e a iteração termina.
+    func precisa ser uma função de módulo (picklable).
+    """
+    items = list(items)
+    if max_workers is None:
+        max_workers = default_worker_count()
+    max_workers = max(1, min(max_workers, len(items) or 1))
+
+    if max_workers == 1:
+        # Sem ganho em criar processos: executa na própria thread
+        for item in items:
+            if should_continue is not None and not should_continue(): return
+            try:
+                yield item, func(item), None
+            except Exception as e:
+                yield item, None, e
+        return
+
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        pending = {executor.submit(func, item): item for item in items}
+        while pending:
+            if should_continue is not None and not should_continue(): return
+            done, _ = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                yield item, (future.result() if error is None else None), error
+    finally:
+        # Em caso de cancelamento não espera os arquivos que ainda estão em processamento
+        executor.shutdown(wait=False, cancel_futures=True)
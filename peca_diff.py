@@ -0,0 +1,337 @@
+# peca_diff.py
+# Comparação estrutural de dois XMLs Tekla por PECA (campos, IDs e POSICAOs).
+# Não importa tkinter: roda em uma thread da janela de comparação.
+
+import hashlib
+import io
+import os
+import re
+from collections import Counter
+from lxml import etree
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+# Importa do projeto local
+from .constants import DEFAULT_ENCODING
+
+# Tipos de alteração
+PECA_ADDED = "PECA adicionada"
+PECA_REMOVED = "PECA removida"
+FIELD_CHANGED = "Campo alterado"
+FIELD_ADDED = "Campo adicionado"
+FIELD_REMOVED = "Campo removido"
+ID_MOVED = "ID movido"
+ID_ADDED = "ID adicionado"
+ID_REMOVED = "ID removido"
+POSICAO_MOVED = "POSICAO movida"
+POSICAO_ADDED = "POSICAO adicionada"
+POSICAO_REMOVED = "POSICAO removida"
+
+# Alteração: (tipo, PECA, item, valor anterior, valor novo)
+Change = Tuple[str, str, str, str, str]
+
+# PECAs entre verificações de cancelamento
+_CHECK_EVERY = 500
+
+# Espaços de indentação na PECA serializada: antes de uma tag de abertura e entre uma
+# tag de fechamento e a seguinte. O texto só de espaços de um campo (<A>  </A>) é mantido.
+_BEFORE_START_TAG_RE = re.compile(rb"(?<=>)\s+(?=<[^/])")
+_BETWEEN_END_TAGS_RE = re.compile(rb"(</[^<>]*>|/>)\s+(?=</)") # Poucos: só no fim dos contêineres
+
+def _normalized(data: bytes) -> bytes:
+    return _BETWEEN_END_TAGS_RE.sub(rb"\1", _BEFORE_START_TAG_RE.sub(b"", data))
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+class _ProgressReader:
+    """Arquivo lido pelo iterparse que informa a fração já lida."""
+    def __init__(self, stream, size: int, progress: Optional[Callable[[float], None]]):
+        self.stream = stream
+        self.size = max(size, 1)
+        self.progress = progress
+        self.position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.position += len(data)
+        if self.progress is not None:
+            self.progress(self.position / self.size)
+        return data
+
+class _PecaSummary:
+    """Resumo de uma PECA: o que a comparação usa, sem guardar a subárvore."""
+    __slots__ = ("ordinal", "name", "fields", "ids", "posicoes")
+
+    def __init__(self, ordinal: int, data: bytes):
+        self.ordinal = ordinal
+        peca = etree.fromstring(data)
+        self.fields: Dict[str, str] = {}               # caminho -> texto
+        self.ids: List[Tuple[str, str]] = []            # (valor, contêiner: "" ou "LISTAID")
+        self.posicoes: Dict[str, Tuple[str, Dict[str, str]]] = {} # chave -> (contêiner, campos)
+        self._collect(peca, "")
+        name = self.fields.get("NOMEPECA")
+        self.name = name.strip() if name else ""
+
+    def label(self) -> str:
+        return f"PECA[{self.ordinal}] {self.name}" if self.name else f"PECA[{self.ordinal}]"
+
+    def _collect(self, element: etree._Element, prefix: str):
+        seen: Dict[str, int] = {}
+        for child in element:
+            tag = child.tag
+            if not isinstance(tag, str) or tag == "PECA": continue # Comentários / PECAs internas
+            if tag == "ID":
+                self.ids.append(((child.text or "").strip(), prefix.rstrip("/")))
+            elif tag == "POSICAO":
+                self._add_posicao(child, prefix.rstrip("/"))
+            else:
+                seen[tag] = seen.get(tag, 0) + 1
+                path = prefix + (tag if seen[tag] == 1 else f"{tag}[{seen[tag]}]")
+                if len(child):
+                    # IDs e POSICAOs são identificados pelo valor: o contêiner não leva índice
+                    self._collect(child, (tag if tag in ("LISTAID", "TABELAACO") else path) + "/")
+                else:
+                    self.fields[path] = child.text or ""
+
+    def _add_posicao(self, posicao: etree._Element, container: str):
+        fields: Dict[str, str] = {}
+        seen: Dict[str, int] = {}
+        for child in posicao.iter():
+            if child is posicao or not isinstance(child.tag, str) or len(child): continue
+            seen[child.tag] = seen.get(child.tag, 0) + 1
+            fields[child.tag if seen[child.tag] == 1 else f"{child.tag}[{seen[child.tag]}]"] = child.text or ""
+        pos = fields.get("POS", "").strip() or f"#{len(self.posicoes) + 1}"
+        key, n = pos, 1
+        while key in self.posicoes:
+            n += 1
+            key = f"{pos}[{n}]"
+        self.posicoes[key] = (container, fields)
+
+def _iter_pecas(source: Union[str, bytes], should_continue: Optional[Callable[[], bool]],
+                progress: Optional[Callable[[float], None]], ordinals: Optional[Set[int]] = None):
+    """
+    PECAs do XML (caminho ou bytes), em uma passada com iterparse: (ordinal, NOMEPECA,
+    PECA serializada). Com ordinals, só as PECAs cujo ordinal está no conjunto quando
+    são lidas são serializadas e devolvidas (sem NOMEPECA).
+    """
+    if isinstance(source, bytes):
+        stream, size = io.BytesIO(source), len(source)
+    else:
+        stream, size = open(source, 'rb'), os.path.getsize(source)
+    try:
+        context = etree.iterparse(_ProgressReader(stream, size, progress), events=("start", "end"), tag="PECA",
+                                  remove_blank_text=False, recover=True, encoding=DEFAULT_ENCODING)
+        stack = []
+        count = 0
+        for event, elem in context:
+            if event == "start":
+                count += 1
+                stack.append(count)
+                continue
+            ordinal = stack.pop()
+            if ordinal % _CHECK_EVERY == 0 and should_continue is not None and not should_continue():
+                return
+            if ordinals is None:
+                yield ordinal, (elem.findtext("NOMEPECA") or "").strip(), etree.tostring(elem, with_tail=False)
+            elif ordinal in ordinals:
+                yield ordinal, "", etree.tostring(elem, with_tail=False)
+            # Libera a subárvore já resumida (também das PECAs aninhadas, que o resumo da
+            # externa ignora) e, no nível de cima, as irmãs anteriores
+            elem.clear(keep_tail=True)
+            if not stack:
+                parent = elem.getparent()
+                if parent is not None:
+                    while elem.getprevious() is not None:
+                        del parent[0]
+    finally:
+        stream.close()
+
+def _key(ordinal: int, name: str, occurrences: Counter) -> Tuple[str, int]:
+    """Chave de pareamento: NOMEPECA e a ocorrência desse nome; sem nome, a posição."""
+    if not name:
+        return ("", ordinal)
+    occurrences[name] += 1
+    return (name, occurrences[name])
+
+class PecaDiff:
+    """Resultado da comparação: alterações em ordem e totais."""
+    def __init__(self):
+        self.changes: List[Change] = []
+        self.original_pecas = 0
+        self.current_pecas = 0
+        self.unchanged_pecas = 0
+
+    def counts(self) -> Dict[str, int]:
+        """Número de alterações por tipo."""
+        return dict(Counter(kind for kind, _, _, _, _ in self.changes))
+
+    def summary(self) -> str:
+        counts = self.counts()
+        parts = [f"{count} {kind.lower()}" for kind, count in counts.items()]
+        return (f"PECAs: {self.original_pecas} no original, {self.current_pecas} no atual, "
+                f"{self.unchanged_pecas} sem alteração. " + (", ".join(parts) if parts else "Nenhuma diferença."))
+
+def _compare_fields(label: str, prefix: str, old: Dict[str, str], new: Dict[str, str], changes: List[Change]):
+    for path, old_value in old.items():
+        new_value = new.get(path)
+        if new_value is None:
+            changes.append((FIELD_REMOVED, label, prefix + path, old_value, ""))
+        elif new_value != old_value:
+            changes.append((FIELD_CHANGED, label, prefix + path, old_value, new_value))
+    for path, new_value in new.items():
+        if path not in old:
+            changes.append((FIELD_ADDED, label, prefix + path, "", new_value))
+
+def _container_label(container: str, tag: str) -> str:
+    return f"PECA/{container}/{tag}" if container else f"PECA/{tag}"
+
+class _OriginalReader:
+    """
+    Segunda leitura do original, sob demanda e na ordem do arquivo: devolve os bytes de
+    uma PECA pelo ordinal. Só PECAs ainda não pareadas (unmatched) são serializadas; as
+    lidas antes de serem pedidas ficam guardadas até serem pedidas ou pareadas. Com a
+    ordem das PECAs mantida entre os arquivos, quase nada fica guardado.
+    """
+    def __init__(self, source: Union[str, bytes], unmatched: Set[int],
+                 should_continue: Optional[Callable[[], bool]]):
+        self.source = source
+        self.unmatched = unmatched
+        self.should_continue = should_continue
+        self.held: Dict[int, bytes] = {}
+        self._pecas = None
+
+    def get(self, ordinal: int) -> Optional[bytes]:
+        """Bytes da PECA (None se a leitura foi cancelada)."""
+        if ordinal not in self.held:
+            if self._pecas is None:
+                self._pecas = _iter_pecas(self.source, self.should_continue, None, self.unmatched)
+            for passed, _, data in self._pecas:
+                self.held[passed] = data
+                if passed == ordinal: break
+        return self.held.pop(ordinal, None)
+
+    def matched(self, ordinal: int):
+        """A PECA foi pareada: não será pedida nem precisa ser lida."""
+        self.unmatched.discard(ordinal)
+        self.held.pop(ordinal, None)
+
+    def close(self):
+        if self._pecas is not None:
+            self._pecas.close()
+
+def diff_pecas(original: Union[str, bytes], current: Union[str, bytes],
+               should_continue: Optional[Callable[[], bool]] = None,
+               progress: Optional[Callable[[float], None]] = None) -> Optional[PecaDiff]:
+    """
+    Compara dois XMLs (caminho ou bytes) por PECA. Do original só se guarda, por PECA,
+    o hash da serialização (e da serialização sem indentação); o atual é lido uma vez e
+    cada PECA é comparada pelo hash com a de mesma chave (NOMEPECA e ocorrência; sem
+    NOMEPECA, a posição). Só as PECAs com hash diferente são resumidas (campos, IDs e
+    POSICAOs), relendo o original para elas (_OriginalReader); a memória não cresce
+    com o tamanho das PECAs. IDs que saem de uma PECA e entram em outra são
+    informados como movidos. progress recebe a fração lida (original até 0.5, atual
+    até 1.0); retorna None se should_continue() ficar falso.
+    """
+    result = PecaDiff()
+    changes = result.changes
+    # Original: chave -> (ordinal, hash dos bytes, hash sem a indentação)
+    original_by_key: Dict[Tuple[str, int], Tuple[int, bytes, bytes]] = {}
+    occurrences: Counter = Counter()
+    for ordinal, name, data in _iter_pecas(original, should_continue, progress and (lambda f: progress(f / 2))):
+        original_by_key[_key(ordinal, name, occurrences)] = (ordinal, _digest(data), _digest(_normalized(data)))
+    if should_continue is not None and not should_continue():
+        return None
+    result.original_pecas = len(original_by_key)
+
+    reader = _OriginalReader(original, {old[0] for old in original_by_key.values()}, should_continue)
+    try:
+        return _diff_current(result, original_by_key, reader, current, should_continue, progress)
+    finally:
+        reader.close()
+
+def _diff_current(result: PecaDiff, original_by_key: Dict[Tuple[str, int], Tuple[int, bytes, bytes]],
+                  reader: _OriginalReader, current: Union[str, bytes],
+                  should_continue: Optional[Callable[[], bool]],
+                  progress: Optional[Callable[[float], None]]) -> Optional[PecaDiff]:
+    changes = result.changes
+    removed_ids: Dict[str, List[str]] = {} # ID -> PECAs (originais) de onde saiu
+    added_ids: Dict[str, List[str]] = {}   # ID -> PECAs (atuais) onde entrou
+    occurrences = Counter()
+    for ordinal, name, data in _iter_pecas(current, should_continue, progress and (lambda f: progress(0.5 + f / 2))):
+        result.current_pecas += 1
+        old = original_by_key.pop(_key(ordinal, name, occurrences), None)
+        # Mesmos bytes (formatação mantida) ou iguais a menos da indentação: sem alteração
+        if old is not None and (old[1] == _digest(data) or old[2] == _digest(_normalized(data))):
+            reader.matched(old[0])
+            result.unchanged_pecas += 1
+            continue
+        new = _PecaSummary(ordinal, data)
+        label = new.label()
+        if old is None:
+            changes.append((PECA_ADDED, label, "", "", ""))
+            for value, _ in new.ids:
+                added_ids.setdefault(value, []).append(label)
+            continue
+        old_data = reader.get(old[0])
+        reader.matched(old[0])
+        if old_data is None:
+            return None # Cancelado
+        old = _PecaSummary(old[0], old_data)
+        before = len(changes)
+        _compare_fields(label, "", old.fields, new.fields, changes)
+
+        # IDs: mesmos valores em outro contêiner (ex.: soltos -> LISTAID) foram movidos na PECA
+        old_ids = Counter(value for value, _ in old.ids)
+        new_ids = Counter(value for value, _ in new.ids)
+        old_containers = {value: container for value, container in old.ids}
+        for value, container in new.ids:
+            if value in old_ids and old_containers[value] != container:
+                changes.append((ID_MOVED, label, value, _container_label(old_containers[value], "ID"),
+                                _container_label(container, "ID")))
+                old_containers[value] = container # Informa cada ID uma vez
+        for value, count in (old_ids - new_ids).items():
+            removed_ids.setdefault(value, []).extend([old.label()] * count)
+        for value, count in (new_ids - old_ids).items():
+            added_ids.setdefault(value, []).extend([label] * count)
+
+        for key, (old_container, old_fields) in old.posicoes.items():
+            if key not in new.posicoes:
+                changes.append((POSICAO_REMOVED, label, f"POSICAO[{key}]", "", ""))
+                continue
+            new_container, new_fields = new.posicoes[key]
+            if new_container != old_container:
+                changes.append((POSICAO_MOVED, label, f"POSICAO[{key}]", _container_label(old_container, "POSICAO"),
+                                _container_label(new_container, "POSICAO")))
+            _compare_fields(label, f"POSICAO[{key}]/", old_fields, new_fields, changes)
+        for key in new.posicoes:
+            if key not in old.posicoes:
+                changes.append((POSICAO_ADDED, label, f"POSICAO[{key}]", "", ""))
+
+        if len(changes) == before and len(old.ids) == len(new.ids) and old_ids == new_ids:
+            result.unchanged_pecas += 1
+    if should_continue is not None and not should_continue():
+        return None
+
+    for old_ordinal in sorted(old[0] for old in original_by_key.values()):
+        old_data = reader.get(old_ordinal)
+        if old_data is None:
+            return None # Cancelado
+        old = _PecaSummary(old_ordinal, old_data)
+        changes.append((PECA_REMOVED, old.label() + " (original)", "", "", ""))
+        for value, _ in old.ids:
+            removed_ids.setdefault(value, []).append(old.label())
+
+    # IDs que saíram de uma PECA e entraram em outra
+    for value, sources in removed_ids.items():
+        targets = added_ids.get(value, [])
+        moved = min(len(sources), len(targets))
+        for source, target in zip(sources, targets):
+            changes.append((ID_MOVED, target, value, source + " (original)", target))
+        for source in sources[moved:]:
+            changes.append((ID_REMOVED, source + " (original)", value, value, ""))
+        if targets:
+            del targets[:moved]
+    for value, targets in added_ids.items():
+        for target in targets:
+            changes.append((ID_ADDED, target, value, "", value))
+    return result
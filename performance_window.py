@@ -0,0 +1,51 @@
+# performance_window.py
+
+from tkinter import *
+from tkinter import ttk, messagebox
+from typing import TYPE_CHECKING
+
+# Importa do projeto local
+from .profiling import profile_steps, profile_header, profile_row, total_profile
+
+# Evita importação circular para type hinting
+if TYPE_CHECKING:
+    from .main_app import XMLVerifier
+
+def show_performance_window(app_instance: 'XMLVerifier'):
+    """Mostra os tempos por arquivo e por etapa da última verificação medida."""
+    profiles = app_instance.performance_profiles
+    if not profiles:
+        messagebox.showinfo("Desempenho", "Nenhuma medição disponível.\nMarque 'Medir desempenho' e execute a verificação.",
+                            parent=app_instance.root)
+        return
+
+    steps = profile_steps(profiles)
+    columns = profile_header(steps)
+
+    window = Toplevel(app_instance.root)
+    window.title(f"Desempenho da Verificação ({len(profiles)} arquivo(s))")
+    window.geometry("1100x450")
+
+    frame = Frame(window)
+    frame.pack(fill=BOTH, expand=True, padx=10, pady=10)
+    tree = ttk.Treeview(frame, columns=columns, show="headings")
+    for i, column in enumerate(columns):
+        tree.heading(column, text=column)
+        tree.column(column, width=160 if i == 0 else 110, anchor=W if i < 2 else E, stretch=False)
+    y_scrollbar = ttk.Scrollbar(frame, orient=VERTICAL, command=tree.yview)
+    x_scrollbar = ttk.Scrollbar(frame, orient=HORIZONTAL, command=tree.xview)
+    tree.configure(yscroll=y_scrollbar.set, xscroll=x_scrollbar.set)
+    tree.grid(row=0, column=0, sticky=(N, S, E, W))
+    y_scrollbar.grid(row=0, column=1, sticky=(N, S))
+    x_scrollbar.grid(row=1, column=0, sticky=(E, W))
+    frame.grid_rowconfigure(0, weight=1)
+    frame.grid_columnconfigure(0, weight=1)
+    tree.tag_configure("total", font=("Arial", 9, "bold"))
+
+    # Arquivos mais lentos primeiro
+    for profile in sorted(profiles, key=lambda p: p.total_seconds, reverse=True):
+        tree.insert("", END, values=profile_row(profile, steps))
+    tree.insert("", END, values=profile_row(total_profile(profiles), steps, origin=""), tags=("total",))
+
+    Label(window, text="Tempos de parede somados por arquivo (com vários processos, o total excede o tempo real).",
+          anchor=W).pack(fill=X, padx=10, pady=(0, 10))
@@ -0,0 +1,168 @@
+# prescreen.py
+# Triagem rápida dos arquivos sobre os bytes brutos (mmap + regex de bytes), sem
+# montar a árvore XML. Não importa tkinter.
+
+import csv
+import mmap
+import os
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Importa do projeto local
+from .constants import DEFAULT_ROOT_TAG
+from .parallel import run_in_process_pool
+
+# Tags acompanhadas pela triagem (nomes ASCII: valem para qualquer codificação compatível)
+_TRACKED_TAGS = (DEFAULT_ROOT_TAG, "PECA", "LISTAID", "ID", "TABELAACO", "POSICAO")
+_TAG_RE = re.compile(rb"<(/?)(" + b"|".join(t.encode("ascii") for t in _TRACKED_TAGS) + rb")(?=[\s/>])[^>]*?(/?)>")
+_ZERO_QTDE_RE = re.compile(rb"<QTDE>\s*0+(?:[.,]0*)?\s*</QTDE>")
+
+# Pesos da pontuação de suspeita: problemas estruturais impedem o parsing normal
+_WEIGHT_STRUCTURAL = 1000
+_WEIGHT_HIERARCHY = 10
+_WEIGHT_ZERO_QTDE = 1
+
+class PrescreenReport:
+    """
+    Resultado da triagem de um arquivo: contagem de aberturas/fechamentos das tags
+    principais e indícios de problemas (tags desbalanceadas, PECA aberta dentro de
+    outra, <ID>/<POSICAO> fora do contêiner, QTDE zero). É uma estimativa: tags em
+    comentários/CDATA também são contadas. Objeto simples (picklable).
+    """
+    def __init__(self, file_path: str, file_size: int = 0):
+        self.file_path = file_path
+        self.file_size = file_size
+        self.tag_counts: Dict[str, List[int]] = {tag: [0, 0] for tag in _TRACKED_TAGS} # tag -> [aberturas, fechamentos]
+        self.nested_pecas = 0     # <PECA> aberta antes do fechamento da anterior
+        self.direct_ids = 0       # <ID> dentro de PECA mas fora de LISTAID
+        self.direct_posicoes = 0  # <POSICAO> dentro de PECA mas fora de TABELAACO
+        self.zero_qty = 0
+        self.error: Optional[str] = None
+        self.seconds = 0.0
+
+    @property
+    def pecas(self) -> int:
+        return self.tag_counts["PECA"][0]
+
+    @property
+    def ids(self) -> int:
+        return self.tag_counts["ID"][0]
+
+    def unbalanced_tags(self) -> List[str]:
+        return [tag for tag, (opened, closed) in self.tag_counts.items() if opened != closed]
+
+    @property
+    def score(self) -> int:
+        """Pontuação de suspeita (0 = nenhum indício)."""
+        if self.error is not None:
+            return _WEIGHT_STRUCTURAL * 10
+        return (_WEIGHT_STRUCTURAL * (len(self.unbalanced_tags()) + self.nested_pecas)
+                + _WEIGHT_HIERARCHY * (self.direct_ids + self.direct_posicoes)
+                + _WEIGHT_ZERO_QTDE * self.zero_qty)
+
+    @property
+    def severity(self) -> int:
+        """2 = estrutura comprometida (ou ilegível), 1 = outros indícios, 0 = limpo."""
+        if self.error is not None or self.nested_pecas or self.unbalanced_tags():
+            return 2
+        return 1 if self.score else 0
+
+    @property
+    def is_suspicious(self) -> bool:
+        return self.score > 0
+
+    def reasons(self) -> List[str]:
+        """Descrição dos indícios encontrados."""
+        if self.error is not None:
+            return [self.error]
+        reasons = []
+        for tag in self.unbalanced_tags():
+            opened, closed = self.tag_counts[tag]
+            reasons.append(f"<{tag}> desbalanceada ({opened} aberturas, {closed} fechamentos)")
+        if self.nested_pecas:
+            reasons.append(f"{self.nested_pecas} <PECA> aberta(s) antes do fechamento da anterior")
+        if self.direct_ids:
+            reasons.append(f"{self.direct_ids} <ID> fora de <LISTAID>")
+        if self.direct_posicoes:
+            reasons.append(f"{self.direct_posicoes} <POSICAO> fora de <TABELAACO>")
+        if self.zero_qty:
+            reasons.append(f"{self.zero_qty} QTDE igual a zero")
+        return reasons
+
+def _scan(data, report: PrescreenReport):
+    """Percorre as tags acompanhadas em ordem, mantendo quais contêineres estão abertos."""
+    counts = report.tag_counts
+    open_now = dict.fromkeys(_TRACKED_TAGS, 0)
+    names = {tag.encode("ascii"): tag for tag in _TRACKED_TAGS}
+    nested = direct_ids = direct_posicoes = 0
+    for match in _TAG_RE.finditer(data): # Sem montar a lista de todas as tags do arquivo
+        closing, raw_name, empty = match.groups()
+        name = names[raw_name]
+        if closing:
+            counts[name][1] += 1
+            if open_now[name]:
+                open_now[name] -= 1
+            continue
+        counts[name][0] += 1
+        if name == "ID":
+            if open_now["PECA"] and not open_now["LISTAID"]: direct_ids += 1
+        elif name == "POSICAO":
+            if open_now["PECA"] and not open_now["TABELAACO"]: direct_posicoes += 1
+        elif name == "PECA" and open_now["PECA"]:
+            nested += 1
+            open_now["PECA"] = 0 # Considera a anterior fechada
+            open_now["LISTAID"] = open_now["TABELAACO"] = 0
+        if empty:
+            counts[name][1] += 1 # <TAG/> abre e fecha
+        else:
+            open_now[name] += 1
+    report.nested_pecas = nested
+    report.direct_ids = direct_ids
+    report.direct_posicoes = direct_posicoes
+    report.zero_qty = sum(1 for _ in _ZERO_QTDE_RE.finditer(data))
+
+def prescreen_file(file_path: str) -> PrescreenReport:
+    """Triagem de um arquivo a partir dos bytes mapeados em memória."""
+    start = time.perf_counter()
+    report = PrescreenReport(file_path)
+    try:
+        report.file_size = os.path.getsize(file_path)
+        if report.file_size == 0:
+            report.error = "Arquivo vazio"
+        else:
+            with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                _scan(data, report)
+    except (OSError, ValueError) as e:
+        report.error = f"Erro ao ler arquivo: {e}"
+    report.seconds = time.perf_counter() - start
+    return report
+
+def order_by_suspicion(reports: Iterable[PrescreenReport]) -> List[PrescreenReport]:
+    """Estrutura comprometida primeiro, depois outros indícios e por fim os limpos; em cada grupo,
+    maior pontuação e depois maior arquivo primeiro."""
+    return sorted(reports, key=lambda r: (r.severity, r.score, r.file_size), reverse=True)
+
+def prescreen_files(file_paths: Iterable[str], max_workers: Optional[int] = None,
+                    should_continue: Optional[Callable[[], bool]] = None) -> List[PrescreenReport]:
+    """Triagem de vários arquivos em paralelo; retorna os relatórios ordenados por suspeita."""
+    reports = []
+    for file_path, report, error in run_in_process_pool(prescreen_file, file_paths, max_workers, should_continue):
+        if error is not None:
+            report = PrescreenReport(file_path)
+            report.error = f"Erro inesperado na triagem: {error}"
+        reports.append(report)
+    return order_by_suspicion(reports)
+
+TRIAGE_HEADER = ["Arquivo", "Suspeito", "Pontuação", "Tamanho (bytes)", "PECAs", "IDs", "Indícios", "Tempo (s)"]
+
+def triage_row(report: PrescreenReport) -> List[str]:
+    return [report.file_path, "sim" if report.is_suspicious else "não", str(report.score), str(report.file_size),
+            str(report.pecas), str(report.ids), "; ".join(report.reasons()), f"{report.seconds:.4f}"]
+
+def write_triage_csv(reports: List[PrescreenReport], stream):
+    """Grava o relatório de triagem (uma linha por arquivo, na ordem dada) em um stream de texto."""
+    writer = csv.writer(stream, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+    writer.writerow(TRIAGE_HEADER)
+    for report in reports:
+        writer.writerow(triage_row(report))
@@ -0,0 +1,80 @@
+# profiling.py
+# Medições de desempenho (opcionais) da verificação. Não importa tkinter.
+
+import csv
+from typing import Dict, Iterable, List, Optional
+
+class VerificationProfile:
+    """
+    Tempo de parede e número de chamadas por etapa da verificação de um arquivo
+    (hash, parsing, índice de IDs, cada regra _check_*). Objeto simples, que
+    atravessa processos (pickle) junto com os resultados do worker.
+    """
+    def __init__(self, file_name: str, file_size: int = 0):
+        self.file_name = file_name
+        self.file_size = file_size
+        self.pecas = 0
+        self.total_seconds = 0.0
+        self.from_cache = False
+        self.steps: Dict[str, List] = {} # etapa -> [segundos, chamadas], na ordem da 1ª medição
+
+    def add(self, step: str, seconds: float, calls: int = 1):
+        entry = self.steps.get(step)
+        if entry is None:
+            self.steps[step] = [seconds, calls]
+        else:
+            entry[0] += seconds
+            entry[1] += calls
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.file_size / self.total_seconds if self.total_seconds > 0 else 0.0
+
+    @property
+    def pecas_per_second(self) -> float:
+        return self.pecas / self.total_seconds if self.total_seconds > 0 else 0.0
+
+def profile_steps(profiles: Iterable[VerificationProfile]) -> List[str]:
+    """Etapas presentes nos perfis, na ordem em que aparecem."""
+    steps = {}
+    for profile in profiles:
+        steps.update(dict.fromkeys(profile.steps))
+    return list(steps)
+
+def total_profile(profiles: Iterable[VerificationProfile], label: str = "TOTAL") -> VerificationProfile:
+    """Soma os perfis de vários arquivos em um único perfil."""
+    total = VerificationProfile(label)
+    for profile in profiles:
+        total.file_size += profile.file_size
+        total.pecas += profile.pecas
+        total.total_seconds += profile.total_seconds
+        for step, (seconds, calls) in profile.steps.items():
+            total.add(step, seconds, calls)
+    return total
+
+def profile_header(steps: List[str]) -> List[str]:
+    header = ["Arquivo", "Origem", "Tamanho (bytes)", "PECAs", "Total (s)", "MB/s", "PECAs/s"]
+    for step in steps:
+        header += [f"{step} (s)", f"{step} (chamadas)"]
+    return header
+
+def profile_row(profile: VerificationProfile, steps: List[str], origin: Optional[str] = None) -> List[str]:
+    if origin is None:
+        origin = "cache" if profile.from_cache else "verificado"
+    row = [profile.file_name, origin, str(profile.file_size), str(profile.pecas),
+           f"{profile.total_seconds:.4f}", f"{profile.bytes_per_second / (1024 * 1024):.2f}",
+           f"{profile.pecas_per_second:.1f}"]
+    for step in steps:
+        seconds, calls = profile.steps.get(step, (0.0, 0))
+        row += [f"{seconds:.4f}", str(calls)]
+    return row
+
+def write_profiles_csv(profiles: List[VerificationProfile], file_path: str):
+    """Grava um CSV com uma linha por arquivo e uma linha de total."""
+    steps = profile_steps(profiles)
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(profile_header(steps))
+        for profile in profiles:
+            writer.writerow(profile_row(profile, steps))
+        writer.writerow(profile_row(total_profile(profiles), steps, origin=""))
@@ -0,0 +1,288 @@
+# result_store.py
+# Armazenamento compacto (em colunas) dos resultados da verificação. Não importa tkinter.
+
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Importa do projeto local
+from .location import Location
+
+# Tipos conhecidos recebem os menores códigos; outros são acrescentados sob demanda
+RESULT_TYPES = ("Erro", "Aviso", "Info")
+
+class _Interner:
+    """Mapeia strings repetidas para índices inteiros (cada string é guardada uma vez)."""
+    def __init__(self, initial: Iterable[str] = ()):
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+        # Chave de ordenação alfabética de cada valor (sem diferenciar maiúsculas), montada
+        # ao internar: ordenar não exige reclassificar todos os valores a cada novo lote
+        self.sort_keys: List[Tuple[str, int]] = []
+        for value in initial:
+            self.id(value)
+
+    def id(self, value: str) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+            self.sort_keys.append((value.lower(), value_id))
+        return value_id
+
+class _SearchText:
+    """
+    Textos em minúsculas concatenados em um único buffer UTF-8, um por item e
+    separados por quebra de linha, para buscas de substring em velocidade de C
+    (bytearray.find) sem manter uma string Python por item.
+    """
+    def __init__(self):
+        self.text = bytearray()
+        self.offsets = array('Q', [0]) # Início de cada item (+ fim do último)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def add(self, value: str):
+        self.text += value.lower().encode('utf-8')
+        self.text += b"\n"
+        self.offsets.append(len(self.text))
+
+    def find_all(self, needle: bytes, first: int, last: int) -> Iterator[int]:
+        """Itens em [first, last) que contêm needle, em ordem crescente."""
+        text, offsets = self.text, self.offsets
+        end = offsets[last]
+        pos = text.find(needle, offsets[first], end)
+        while pos >= 0:
+            item = bisect_right(offsets, pos) - 1
+            yield item
+            pos = text.find(needle, offsets[item + 1], end) # Próximo item
+
+    def contains(self, item: int, needle: bytes) -> bool:
+        return self.text.find(needle, self.offsets[item], self.offsets[item + 1]) >= 0
+
+def _mask_and(a: bytes, b: bytes) -> bytes:
+    """E lógico de duas máscaras de 0/1 (uma operação sobre inteiros grandes)."""
+    return (int.from_bytes(a, 'little') & int.from_bytes(b, 'little')).to_bytes(len(a), 'little')
+
+class ResultStore:
+    """
+    Resultados da verificação guardados em colunas (array) em vez de uma lista de
+    tuplas de 4 strings. Nome do arquivo, tipo, descrição e trecho de caminho são
+    internados (cada valor distinto é guardado uma única vez) e a localização é
+    decomposta em campos numéricos: ordinal da PECA, caminho, linha e coluna.
+    Comporta-se como uma sequência de tuplas (arquivo, tipo, descrição, localização):
+    len(), iteração, store[i], append() e extend() funcionam como na lista.
+
+    Para a filtragem, o tipo fica em um bytearray (filtro por tipo = um translate),
+    cada arquivo guarda suas faixas contíguas de linhas (listas de postagem em
+    forma de intervalos) e a busca textual usa índices _SearchText das descrições
+    distintas e das localizações, mais as linhas de cada descrição; esses índices
+    são construídos sob demanda na primeira busca e estendidos conforme novos
+    resultados chegam.
+    """
+    def __init__(self, rows: Iterable[Tuple[str, str, str, str]] = ()):
+        self.clear()
+        self.extend(rows)
+
+    def clear(self):
+        self._files = _Interner()
+        self._types = _Interner(RESULT_TYPES)
+        self._descriptions = _Interner()
+        self._paths = _Interner()
+        self._file_ids = array('I')
+        self._file_runs: Dict[int, List[List[int]]] = {} # arquivo -> [[início, fim), ...]
+        self._type_ids = bytearray() # Até 256 tipos distintos (na prática, 3)
+        self._description_ids = array('I')
+        self._pecas = array('i')      # Ordinal da PECA (base 1) ou -1
+        self._path_ids = array('I')   # Restante do caminho (ex.: "/LISTAID/ID")
+        self._line_kinds = array('B')
+        self._lines = array('i')      # -1 quando não há linha
+        self._columns = array('i')    # -1 quando não há coluna
+        self._description_text = _SearchText()
+        self._location_text = _SearchText()
+        self._description_rows: List[array] = [] # descrição -> linhas em que aparece
+        self._search_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._file_ids)
+
+    def __iter__(self) -> Iterator[Tuple[str, str, str, str]]:
+        for i in range(len(self._file_ids)):
+            yield self[i]
+
+    def __getitem__(self, index: int) -> Tuple[str, str, str, str]:
+        return (self._files.values[self._file_ids[index]], self._types.values[self._type_ids[index]],
+                self._descriptions.values[self._description_ids[index]], self.location(index))
+
+    def append(self, row: Tuple[str, str, str, str]):
+        file_name, r_type, description, location = row
+        file_id = self._files.id(file_name)
+        row_index = len(self._file_ids)
+        runs = self._file_runs.get(file_id)
+        if runs is None:
+            self._file_runs[file_id] = [[row_index, row_index + 1]]
+        elif runs[-1][1] == row_index:
+            runs[-1][1] += 1
+        else:
+            runs.append([row_index, row_index + 1])
+        self._file_ids.append(file_id)
+        self._type_ids.append(self._types.id(r_type))
+        self._description_ids.append(self._descriptions.id(description))
+        self._add_location(location if isinstance(location, Location) else Location.parse(str(location)))
+
+    def extend(self, rows: Iterable[Tuple[str, str, str, str]]):
+        for row in rows:
+            self.append(row)
+
+    def _add_location(self, location: Location):
+        # Localizações estruturadas entram campo a campo; só textos são decompostos
+        self._pecas.append(location.peca if location.peca is not None else -1)
+        self._path_ids.append(self._paths.id(location.path))
+        self._line_kinds.append(location.kind)
+        self._lines.append(location.line if location.line is not None else -1)
+        self._columns.append(location.column if location.column is not None else -1)
+
+    # --- Acesso por campo (sem montar a tupla inteira) ---
+
+    def file_name(self, index: int) -> str:
+        return self._files.values[self._file_ids[index]]
+
+    def result_type(self, index: int) -> str:
+        return self._types.values[self._type_ids[index]]
+
+    def description(self, index: int) -> str:
+        return self._descriptions.values[self._description_ids[index]]
+
+    def location(self, index: int) -> str:
+        """Monta a string de localização (mesmo texto que foi armazenado)."""
+        return str(self.location_object(index))
+
+    def location_object(self, index: int) -> Location:
+        """Localização estruturada do resultado (sem passar por texto)."""
+        peca, line, column = self._pecas[index], self._lines[index], self._columns[index]
+        return Location(peca if peca >= 0 else None, self._paths.values[self._path_ids[index]], self._line_kinds[index],
+                        line if line >= 0 else None, column if column >= 0 else None)
+
+    def sort_key(self, field: str) -> Callable[[int], object]:
+        """
+        Chave de ordenação de índices por campo ("file", "type", "description" ou
+        "location"). Strings internadas são comparadas pela chave alfabética
+        guardada ao interná-las; o tipo segue a ordem de RESULT_TYPES (gravidade) e a localização
+        é ordenada numericamente por PECA, caminho, linha e coluna.
+        """
+        if field == "type":
+            return self._type_ids.__getitem__
+        if field == "location":
+            path_keys = self._paths.sort_keys
+            pecas, path_ids, lines, columns = self._pecas, self._path_ids, self._lines, self._columns
+            return lambda i: (pecas[i], path_keys[path_ids[i]], lines[i], columns[i])
+        interner, ids = {"file": (self._files, self._file_ids),
+                         "description": (self._descriptions, self._description_ids)}[field]
+        keys = interner.sort_keys
+        return lambda i: keys[ids[i]]
+
+    # --- Consultas ---
+
+    def count(self, r_type: Optional[str] = None, file_name: Optional[str] = None) -> int:
+        """Conta os resultados, opcionalmente de um tipo e/ou de um arquivo."""
+        type_id = self._types.ids.get(r_type) if r_type is not None else None
+        file_id = self._files.ids.get(file_name) if file_name is not None else None
+        if (r_type is not None and type_id is None) or (file_name is not None and file_id is None):
+            return 0
+        if file_id is None:
+            return len(self) if type_id is None else self._type_ids.count(type_id)
+        runs = self._file_runs.get(file_id, [])
+        if type_id is None:
+            return sum(end - start for start, end in runs)
+        return sum(self._type_ids.count(type_id, start, end) for start, end in runs)
+
+    def count_by_file(self, r_type: Optional[str] = None) -> Dict[str, int]:
+        """Número de resultados (opcionalmente de um tipo) por nome de arquivo."""
+        counts = {name: self.count(r_type, name) for name in self._files.values}
+        return {name: count for name, count in counts.items() if count}
+
+    def _update_search_index(self, n: int):
+        """Estende os índices de busca até a linha n (e todas as descrições conhecidas)."""
+        with self._search_lock:
+            descriptions = self._descriptions.values
+            for i in range(len(self._description_text), len(descriptions)):
+                self._description_text.add(descriptions[i])
+                self._description_rows.append(array('I'))
+            description_ids, description_rows = self._description_ids, self._description_rows
+            for i in range(len(self._location_text), n):
+                self._location_text.add(self.location(i))
+                description_rows[description_ids[i]].append(i)
+
+    def filter_indices(self, r_type: Optional[str] = None, file_name: Optional[str] = None,
+                       search: str = "", within: Optional[List[int]] = None,
+                       start: int = 0, stop: Optional[int] = None) -> List[int]:
+        """
+        Índices dos resultados que passam nos filtros (tipo, arquivo e texto, sem
+        diferenciar maiúsculas, na descrição ou na localização).
+        within restringe a busca a candidatos que já satisfazem tipo e arquivo
+        (ex.: o resultado anterior quando o texto pesquisado só ganhou caracteres).
+        Com muitos candidatos a varredura completa pelas máscaras é mais rápida que
+        testá-los um a um, e within é ignorado.
+        start/stop limitam as linhas consideradas (ex.: só as recém-chegadas).
+        """
+        n = len(self._file_ids) if stop is None else min(stop, len(self._file_ids))
+        type_id = self._types.ids.get(r_type, -1) if r_type is not None else None
+        file_id = self._files.ids.get(file_name, -1) if file_name is not None else None
+        if type_id == -1 or file_id == -1:
+            return []
+        needle = search.lower().encode('utf-8')
+        descriptions = set()
+        if needle:
+            self._update_search_index(n)
+            # Descrições distintas que contêm o texto (busca no índice, sem percorrer as linhas)
+            descriptions = set(self._description_text.find_all(needle, 0, len(self._description_text)))
+
+        if within is not None and len(within) * 8 < n - start:
+            # Refinamento incremental: só os candidatos são testados
+            if not needle:
+                return list(within)
+            description_ids, location_text = self._description_ids, self._location_text
+            return [i for i in within if description_ids[i] in descriptions or location_text.contains(i, needle)]
+
+        if file_id is not None:
+            ranges = [(max(first, start), min(last, n)) for first, last in self._file_runs.get(file_id, [])
+                      if first < n and last > start]
+        else:
+            ranges = [(start, n)] if start < n else []
+        type_table = None
+        if type_id is not None:
+            type_table = bytearray(256)
+            type_table[type_id] = 1
+        description_row_count = sum(len(self._description_rows[d]) for d in descriptions)
+
+        indices = []
+        for first, last in ranges:
+            mask = bytes(self._type_ids[first:last]).translate(type_table) if type_table is not None else None
+            if needle:
+                search_mask = self._search_mask(needle, descriptions, description_row_count, first, last)
+                mask = search_mask if mask is None else _mask_and(mask, search_mask)
+            indices.extend(compress(range(first, last), mask) if mask is not None else range(first, last))
+        return indices
+
+    def _search_mask(self, needle: bytes, descriptions, description_row_count: int, start: int, end: int) -> bytes:
+        """Máscara 0/1 das linhas [start, end) cuja descrição ou localização contém needle."""
+        size = end - start
+        if not descriptions:
+            mask = bytearray(size)
+        elif description_row_count * 8 < size:
+            # Poucas linhas com descrição compatível: marca pelas listas de postagem
+            mask = bytearray(size)
+            for description_id in descriptions:
+                rows = self._description_rows[description_id]
+                for i in rows[bisect_left(rows, start):bisect_left(rows, end)]:
+                    mask[i - start] = 1
+        else:
+            mask = bytearray(map(descriptions.__contains__, self._description_ids[start:end]))
+        if mask.count(0):
+            # Só procura na localização se ainda há linhas não marcadas
+            for i in self._location_text.find_all(needle, start, end):
+                mask[i - start] = 1
+        return bytes(mask)
@@ -0,0 +1,281 @@
+# result_view.py
+
+from tkinter import *
+from tkinter import ttk
+from typing import List, Optional, Sequence, Tuple
+
+# Importa do projeto local
+from .result_store import ResultStore
+
+# Coluna exibida -> campo de ordenação do ResultStore
+COLUMNS = (("Arquivo", "file", 150), ("Tipo", "type", 80), ("Descrição", "description", 500), ("Localização", "location", 250))
+
+# Bits de event.state
+_SHIFT = 0x0001
+_CONTROL = 0x0004
+
+class VirtualResultView:
+    """
+    Tabela de resultados virtualizada: a Treeview só contém as linhas visíveis
+    (uma "página"), montadas a partir do ResultStore conforme a rolagem. A barra
+    de rolagem, a roda do mouse, o teclado, a ordenação pelos cabeçalhos e a
+    seleção (guardada como índices do ResultStore) são tratados aqui, de modo que
+    o custo de exibir não depende do total de resultados.
+    """
+    def __init__(self, parent):
+        self.store: Optional[ResultStore] = None
+        self.indices: List[int] = []  # Índices do store na ordem exibida
+        self.selected = set()         # Índices do store selecionados (inclusive fora da página)
+        self.top = 0                  # Posição da primeira linha da página
+        self.page_size = 20
+        self.anchor: Optional[int] = None # Posição de referência para Shift+clique/seta
+        self.cursor: Optional[int] = None # Posição com o foco do teclado
+        self.sort_field: Optional[str] = None
+        self.sort_reverse = False
+        self._row_height = 20
+        self._header_height = 25
+
+        self.tree = ttk.Treeview(parent, columns=[c for c, _, _ in COLUMNS], show="headings",
+                                 selectmode='extended', height=self.page_size)
+        for column, field, width in COLUMNS:
+            self.tree.heading(column, text=column, command=lambda f=field: self.sort_by(f))
+            self.tree.column(column, width=width, anchor=W)
+        self.y_scrollbar = ttk.Scrollbar(parent, orient=VERTICAL, command=self._on_scrollbar)
+        x_scrollbar = ttk.Scrollbar(parent, orient=HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(xscroll=x_scrollbar.set)
+        self.tree.grid(row=0, column=0, sticky=(N, S, E, W))
+        self.y_scrollbar.grid(row=0, column=1, sticky=(N, S))
+        x_scrollbar.grid(row=1, column=0, sticky=(E, W))
+        parent.grid_rowconfigure(0, weight=1)
+        parent.grid_columnconfigure(0, weight=1)
+        self.tree.tag_configure("erro", background="#ffcccc")
+        self.tree.tag_configure("aviso", background="#ffffcc")
+        self.tree.tag_configure("info", background="#ccffcc")
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<ButtonPress-1>", self._on_click)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        for key in ("Up", "Down", "Prior", "Next", "Home", "End"):
+            self.tree.bind(f"<KeyPress-{key}>", self._on_key)
+        self.tree.bind("<Control-a>", self._select_all)
+
+    # --- Dados ---
+
+    def set_rows(self, store: ResultStore, indices: Sequence[int]):
+        """Exibe os índices de store (já filtrados), aplicando a ordenação atual."""
+        if store is not self.store:
+            self.selected = set()
+            self.top = 0
+        elif self.selected:
+            # Itens que saíram do filtro deixam de estar selecionados
+            shown = set(indices)
+            self.selected = {i for i in self.selected if i in shown}
+        self.store = store
+        self.indices = self._sorted(list(indices))
+        self.anchor = self.cursor = None
+        self._render()
+
+    def extend_rows(self, store: ResultStore, indices: Sequence[int]):
+        """Acrescenta índices (já filtrados) de resultados recém-chegados, mantendo a seleção."""
+        if store is not self.store:
+            self.set_rows(store, indices)
+            return
+        if not indices: return
+        if self.sort_field is None:
+            self.indices.extend(indices)
+        else:
+            self._merge_sorted(indices)
+            self.anchor = self.cursor = None # Posições de âncora/cursor mudam
+        self._render()
+
+    def clear(self):
+        self.store = None
+        self.indices = []
+        self.selected = set()
+        self.top = 0
+        self.anchor = self.cursor = None
+        self._render()
+
+    def selected_indices(self) -> List[int]:
+        """Índices do store selecionados, na ordem exibida."""
+        if not self.selected: return []
+        return [i for i in self.indices if i in self.selected]
+
+    def selected_rows(self) -> List[Tuple[int, Tuple[str, str, str, str]]]:
+        """[(índice no store, (arquivo, tipo, descrição, localização))] dos itens selecionados."""
+        return [(i, self.store[i]) for i in self.selected_indices()]
+
+    # --- Ordenação ---
+
+    def sort_by(self, field: str):
+        """Ordena pelo campo (clicar de novo no mesmo cabeçalho inverte a ordem)."""
+        self.sort_reverse = not self.sort_reverse if self.sort_field == field else False
+        self.sort_field = field
+        self.indices = self._sorted(self.indices)
+        for column, column_field, _ in COLUMNS:
+            arrow = (" ▼" if self.sort_reverse else " ▲") if column_field == field else ""
+            self.tree.heading(column, text=column + arrow)
+        self.anchor = self.cursor = None
+        self.top = 0
+        self._render()
+
+    def _sorted(self, indices: List[int]) -> List[int]:
+        if self.sort_field is None or self.store is None:
+            return indices
+        # Ordenação estável: empates mantêm a ordem original (de verificação)
+        indices.sort(key=self.store.sort_key(self.sort_field), reverse=self.sort_reverse)
+        return indices
+
+    def _merge_sorted(self, new_indices: Sequence[int]):
+        """
+        Intercala índices novos na lista já ordenada: só o lote novo é ordenado e só o
+        trecho a partir da primeira posição alterada é remontado. Lotes pequenos entram
+        por busca binária; os grandes, por um Timsort do trecho. Empates: os já exibidos
+        vêm antes.
+        """
+        key, reverse, indices = self.store.sort_key(self.sort_field), self.sort_reverse, self.indices
+        batch = sorted(new_indices, key=key, reverse=reverse)
+        first = self._insertion_point(key(batch[0]), key, 0)
+        if len(batch) * max(len(indices), 2).bit_length() < len(indices) - first:
+            # Posições de inserção na lista atual; o trecho é remontado uma única vez
+            tail, previous, position = [], first, first
+            for index in batch:
+                position = self._insertion_point(key(index), key, position)
+                tail.extend(indices[previous:position])
+                tail.append(index)
+                previous = position
+            tail.extend(indices[previous:])
+        else:
+            tail = indices[first:]
+            tail.extend(batch)
+            tail.sort(key=key, reverse=reverse) # Duas sequências já ordenadas: o Timsort só as intercala
+        indices[first:] = tail
+
+    def _insertion_point(self, item_key, key, low: int) -> int:
+        """Posição (a partir de low) depois dos itens que vêm antes ou empatam com item_key."""
+        indices, reverse = self.indices, self.sort_reverse
+        high = len(indices)
+        while low < high:
+            middle = (low + high) // 2
+            current = key(indices[middle])
+            if (current < item_key) if reverse else (item_key < current):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    # --- Página visível ---
+
+    def _render(self):
+        total = len(self.indices)
+        self.top = max(0, min(self.top, total - self.page_size))
+        tree = self.tree
+        tree.delete(*tree.get_children())
+        page = self.indices[self.top:self.top + self.page_size]
+        for index in page:
+            row = self.store[index]
+            tree.insert("", END, iid=str(index), values=row, tags=(row[1].lower(),))
+        tree.selection_set([str(i) for i in page if i in self.selected])
+        if self.cursor is not None and self.top <= self.cursor < self.top + len(page):
+            tree.focus(str(self.indices[self.cursor]))
+        if total:
+            self.y_scrollbar.set(self.top / total, min(1.0, (self.top + len(page)) / total))
+        else:
+            self.y_scrollbar.set(0.0, 1.0)
+
+    def scroll(self, rows: int):
+        self.top += rows
+        self._render()
+        return "break"
+
+    def _ensure_visible(self, position: int):
+        if position < self.top:
+            self.top = position
+        elif position >= self.top + self.page_size:
+            self.top = position - self.page_size + 1
+
+    def _position_of(self, item_id: str) -> int:
+        return self.top + self.tree.index(item_id)
+
+    # --- Eventos ---
+
+    def _on_configure(self, event):
+        page = self.tree.get_children()
+        if page:
+            # Mede a altura real das linhas e do cabeçalho pela primeira linha exibida
+            bbox = self.tree.bbox(page[0])
+            if bbox:
+                self._header_height, self._row_height = bbox[1], max(1, bbox[3])
+        page_size = max(1, (event.height - self._header_height) // self._row_height)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self._render()
+
+    def _on_scrollbar(self, action, *args):
+        total = len(self.indices)
+        if action == "moveto":
+            self.top = int(float(args[0]) * total)
+        elif action == "scroll":
+            amount = int(args[0])
+            self.top += amount * (self.page_size if args[1] == "pages" else 1)
+        self._render()
+
+    def _on_wheel(self, event):
+        # Windows usa múltiplos de 120; macOS envia valores pequenos
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll(-3 * delta)
+
+    def _on_select(self, event=None):
+        """Sincroniza a seleção da página visível com o conjunto de índices."""
+        tree_selection = set(self.tree.selection())
+        for item_id in self.tree.get_children():
+            if item_id in tree_selection:
+                self.selected.add(int(item_id))
+            else:
+                self.selected.discard(int(item_id))
+
+    def _on_click(self, event):
+        if self.tree.identify_region(event.x, event.y) not in ("cell", "tree"):
+            return None
+        item_id = self.tree.identify_row(event.y)
+        if not item_id:
+            return None
+        position = self._position_of(item_id)
+        if event.state & _SHIFT and self.anchor is not None:
+            self._select_range(self.anchor, position)
+            self.cursor = position
+            self._render()
+            return "break"
+        if not event.state & _CONTROL:
+            self.selected = set() # Clique simples também desmarca itens fora da página
+        self.anchor = self.cursor = position
+        return None # A Treeview trata o clique; _on_select sincroniza
+
+    def _on_key(self, event):
+        total = len(self.indices)
+        if not total: return "break"
+        current = self.cursor if self.cursor is not None else self.top
+        step = {"Up": -1, "Down": 1, "Prior": -self.page_size, "Next": self.page_size,
+                "Home": -total, "End": total}[event.keysym]
+        position = max(0, min(total - 1, current + step))
+        if event.state & _SHIFT and self.anchor is not None:
+            self._select_range(self.anchor, position)
+        else:
+            self.selected = {self.indices[position]}
+            self.anchor = position
+        self.cursor = position
+        self._ensure_visible(position)
+        self._render()
+        return "break"
+
+    def _select_range(self, start: int, end: int):
+        if start > end: start, end = end, start
+        self.selected = set(self.indices[start:end + 1])
+
+    def _select_all(self, event=None):
+        self.selected = set(self.indices)
+        self._render()
+        return "break"
@@ -0,0 +1,287 @@
+# splice_writer.py
+# Gravação com edição mínima: só os trechos alterados são trocados nos bytes
+# originais do arquivo. Não importa tkinter.
+
+import io
+import os
+import re
+import shutil
+import tempfile
+from lxml import etree
+from typing import Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+# Importa do projeto local
+from .constants import DEFAULT_ENCODING
+
+# Bloco em que as quebras de linha são contadas de uma vez (em C) ao procurar uma linha
+_LINE_SKIP_BYTES = 64 * 1024
+_NEAR_LINES = 256 # Linhas próximas são alcançadas quebra a quebra
+# Linhas maiores que isto (ex.: XML todo em uma linha) não são procuradas: grava-se o arquivo inteiro
+_MAX_LINE_BYTES = 1024 * 1024
+
+_ENTITY_RE = re.compile(r"&(#x[0-9A-Fa-f]+|#[0-9]+|lt|gt|amp|quot|apos);")
+_ENTITIES = {"lt": "<", "gt": ">", "amp": "&", "quot": '"', "apos": "'"}
+
+def _unescape(text: str) -> str:
+    """Texto de um nó como o parser o entrega (entidades e quebras de linha normalizadas)."""
+    def replace(match):
+        name = match.group(1)
+        if name[0] != "#":
+            return _ENTITIES[name]
+        return chr(int(name[2:], 16) if name[1] == "x" else int(name[1:]))
+    return _ENTITY_RE.sub(replace, text.replace("\r\n", "\n").replace("\r", "\n"))
+
+def _line_offsets(data: bytes, lines: Iterable[int]) -> Dict[int, int]:
+    """Deslocamento do início de cada linha pedida (base 1), em uma passada só para a frente."""
+    offsets = {}
+    size = len(data)
+    pos, current = 0, 1 # pos é o início da linha current
+    for line in sorted(set(lines)):
+        while line - current > _NEAR_LINES:
+            end = min(pos + _LINE_SKIP_BYTES, size)
+            count = data.count(b"\n", pos, end)
+            if not count or current + count >= line:
+                break
+            # Bloco inteiro antes da linha: pula-o sem olhar quebra a quebra
+            pos = data.rfind(b"\n", pos, end) + 1
+            current += count
+        for _ in range(line - current):
+            newline = data.find(b"\n", pos)
+            if newline < 0:
+                return offsets # Linhas além do fim do arquivo
+            pos = newline + 1
+        current = line
+        offsets[line] = pos
+    return offsets
+
+class SpliceWriter:
+    """
+    Registra as alterações feitas em uma árvore lida de data (os bytes do arquivo) e
+    as grava trocando só os trechos correspondentes: o texto de um elemento
+    (set_text) ou o elemento inteiro, reserializado (replace_element). O resto do
+    arquivo, inclusive a formatação, é copiado byte a byte para um temporário que
+    substitui o original de forma atômica.
+    O lxml não informa deslocamentos em bytes: o trecho de cada elemento é achado
+    pela linha (sourceline, a do '>' da tag de abertura) e pela ordem das tags iguais
+    nessa linha, e o texto antigo é conferido nos bytes. Se algum trecho não é achado,
+    o arquivo é serializado inteiro, como antes.
+    """
+    def __init__(self, data: bytes, encoding: str = DEFAULT_ENCODING):
+        self.data = data
+        self.encoding = encoding
+        self._texts: Dict[etree._Element, Optional[str]] = {} # elemento -> texto original
+        self._elements: List[etree._Element] = []
+        # Linhas lidas antes das alterações: acima de 65535 a libxml2 guarda a linha no
+        # nó de texto do elemento, que se perde quando o texto é trocado
+        self._lines: Dict[etree._Element, Optional[int]] = {}
+        self._ordinals: Dict[Tuple[int, str], Dict[etree._Element, int]] = {}
+        self.spliced = False # Após write: True se só os trechos alterados foram trocados
+        self.tree: Optional[etree._ElementTree] = None # Após write: árvore do arquivo gravado, se conhecida
+
+    def set_text(self, element: etree._Element, text: Optional[str]):
+        """Troca o texto do elemento na árvore e registra a alteração."""
+        if element not in self._texts:
+            self._lines[element] = element.sourceline
+            self._texts[element] = element.text
+        element.text = text
+
+    def replace_element(self, element: etree._Element):
+        """Registra que element foi alterado por dentro (filhos movidos/criados): é regravado inteiro."""
+        self._lines.setdefault(element, element.sourceline)
+        self._elements.append(element)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self._texts or self._elements)
+
+    # --- Localização dos trechos nos bytes originais ---
+
+    def _line(self, element: etree._Element) -> Optional[int]:
+        return self._lines[element] if element in self._lines else element.sourceline
+
+    def _tag_starts(self, element: etree._Element, line_start: int) -> Optional[Tuple[int, int]]:
+        """(início de '<TAG', posição do '>') da tag de abertura de element, que termina na sua linha."""
+        data = self.data
+        tag = element.tag
+        if not isinstance(tag, str) or tag.startswith("{"):
+            return None
+        line = self._lines[element]
+        line_end = data.find(b"\n", line_start)
+        if line_end < 0:
+            line_end = len(data)
+        if line_end - line_start > _MAX_LINE_BYTES:
+            return None
+        # Uma tag de abertura quebrada em várias linhas começa antes da sua linha
+        window = line_start
+        previous_lt = data.rfind(b"<", max(0, line_start - _MAX_LINE_BYTES), line_start)
+        if previous_lt >= 0 and data.find(b">", previous_lt, line_start) < 0:
+            window = previous_lt
+        pattern = re.compile(b"<" + re.escape(tag.encode(self.encoding)) + rb"(?=[\s/>])")
+        candidates = []
+        for match in pattern.finditer(data, window, line_end):
+            gt = data.find(b">", match.end(), line_end + 1)
+            if gt < line_start: continue
+            if data.rfind(b"<!--", window, match.start()) > data.rfind(b"-->", window, match.start()):
+                continue # Dentro de um comentário
+            candidates.append((match.start(), gt))
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+        # Várias tags iguais na linha: a ordem de element entre os elementos dessa tag
+        # que terminam a abertura na mesma linha (calculada uma vez por linha e tag)
+        ordinals = self._ordinals.get((line, tag))
+        if ordinals is None:
+            # Estão todos sob o ancestral mais próximo que começa em linha anterior (ou sob a raiz)
+            scope = element
+            for scope in element.iterancestors():
+                if self._line(scope) != line: break
+            ordinals = self._ordinals[(line, tag)] = {}
+            for other in scope.iter(tag):
+                if self._line(other) == line: ordinals[other] = len(ordinals)
+        ordinal = ordinals.get(element)
+        return candidates[ordinal] if ordinal is not None and ordinal < len(candidates) else None
+
+    def _text_patch(self, element: etree._Element, old_text: Optional[str], line_start: int) -> Optional[Tuple[int, int, bytes]]:
+        """(início, fim, bytes novos) do texto de element; None se os bytes não conferem com old_text."""
+        found = self._tag_starts(element, line_start)
+        if found is None:
+            return None
+        start, gt = found
+        data = self.data
+        new = escape(element.text or "", {"\r": "&#13;"}).encode(self.encoding, "xmlcharrefreplace")
+        if data[gt - 1:gt] == b"/":
+            # <TAG/>: vira <TAG>texto</TAG>
+            if old_text:
+                return None
+            if not new:
+                return gt, gt, b""
+            open_tag = data[start:gt - 1].rstrip()
+            return start, gt + 1, open_tag + b">" + new + b"</" + element.tag.encode(self.encoding) + b">"
+        text_end = data.find(b"<", gt + 1)
+        if text_end < 0:
+            return None
+        if _unescape(data[gt + 1:text_end].decode(self.encoding)) != (old_text or ""):
+            return None
+        return gt + 1, text_end, new
+
+    def _element_patch(self, element: etree._Element, line_start: int) -> Optional[Tuple[int, int, bytes]]:
+        """(início, fim, bytes novos) do elemento inteiro, reserializado com a indentação da sua profundidade."""
+        found = self._tag_starts(element, line_start)
+        if found is None:
+            return None
+        start, gt = found
+        data = self.data
+        end = None
+        if data[gt - 1:gt] == b"/":
+            end = gt + 1
+        else:
+            name = re.escape(element.tag.encode(self.encoding))
+            depth = 1
+            for match in re.compile(b"<(/?)" + name + rb"(?=[\s/>])").finditer(data, gt + 1):
+                close = data.find(b">", match.end())
+                if close < 0: return None
+                if match.group(1):
+                    depth -= 1
+                    if depth == 0:
+                        end = close + 1
+                        break
+                elif data[close - 1:close] != b"/":
+                    depth += 1
+        if end is None:
+            return None
+        level = sum(1 for _ in element.iterancestors())
+        etree.indent(element, space="  ", level=level)
+        new = etree.tostring(element, encoding=self.encoding, xml_declaration=False, with_tail=False)
+        return start, end, new
+
+    def _patches(self) -> Optional[List[Tuple[int, int, bytes]]]:
+        """Trechos a trocar, em ordem e sem sobreposição; None se algum não foi achado."""
+        lines = self._lines
+        if any(line is None for line in lines.values()):
+            return None
+        offsets = _line_offsets(self.data, lines.values())
+        patches = []
+        for element, old_text in self._texts.items():
+            if lines[element] not in offsets: return None
+            patch = self._text_patch(element, old_text, offsets[lines[element]])
+            if patch is None: return None
+            patches.append(patch)
+        for element in self._elements:
+            if lines[element] not in offsets: return None
+            patch = self._element_patch(element, offsets[lines[element]])
+            if patch is None: return None
+            patches.append(patch)
+        # Um elemento reserializado já contém as alterações feitas dentro dele
+        patches.sort(key=lambda patch: (patch[0], -patch[1]))
+        merged = []
+        for patch in patches:
+            if merged and patch[0] < merged[-1][1]:
+                if patch[1] <= merged[-1][1]: continue
+                return None # Sobreposição parcial: não deveria acontecer
+            merged.append(patch)
+        return merged
+
+    # --- Gravação ---
+
+    def write(self, file_path: str, tree: etree._ElementTree, want_tree: bool = False, splice: bool = True):
+        """
+        Grava as alterações em file_path (temporário no mesmo diretório + os.replace).
+        Sem trechos localizáveis (ou com splice=False, ex.: árvore recuperada de um
+        XML mal formado, que não corresponde aos bytes), serializa a árvore inteira
+        (indentada), como antes.
+        Com want_tree, self.tree fica com a árvore correspondente ao arquivo gravado:
+        a própria tree se as linhas não mudaram, senão a dos bytes gravados (um
+        arquivo emendado só substitui o original se esse parse funciona).
+        """
+        self.tree = None
+        patches = self._patches() if splice else None
+        directory = os.path.dirname(os.path.abspath(file_path))
+        if patches is not None:
+            data = memoryview(self.data)
+            lines_kept = all(new.count(b"\n") == self.data.count(b"\n", start, end) for start, end, new in patches)
+            temp_path = None
+            try:
+                with tempfile.NamedTemporaryFile('wb', dir=directory, suffix='.tmp', delete=False) as dst:
+                    temp_path = dst.name
+                    position = 0
+                    for start, end, new in patches:
+                        dst.write(data[position:start])
+                        dst.write(new)
+                        position = end
+                    dst.write(data[position:])
+                if want_tree or self._elements:
+                    if lines_kept and not self._elements and max(self._lines.values()) < 65535:
+                        # Só textos trocados, sem mudar linhas: a árvore em memória é a do arquivo
+                        self.tree = tree
+                    else:
+                        # Linhas mudaram ou há elementos reserializados: analisa o arquivo emendado,
+                        # o que também o confere antes de trocar o original
+                        parser = etree.XMLParser(remove_blank_text=False, encoding=self.encoding)
+                        self.tree = etree.parse(temp_path, parser, base_url=file_path)
+                shutil.copymode(file_path, temp_path)
+                os.replace(temp_path, file_path)
+                temp_path = None
+                self.spliced = True
+                return
+            except etree.XMLSyntaxError:
+                self.tree = None # Emenda inválida: grava o arquivo inteiro abaixo
+            finally:
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+        etree.indent(tree, space="  ")
+        data = etree.tostring(tree, encoding=self.encoding, xml_declaration=True, pretty_print=False)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f: f.write(data)
+            shutil.copymode(file_path, temp_path)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            try: os.remove(temp_path)
+            except OSError: pass
+            raise
+        self.spliced = False
+        if want_tree:
+            # A indentação muda as linhas: a árvore é a dos bytes gravados
+            parser = etree.XMLParser(remove_blank_text=False, encoding=self.encoding)
+            self.tree = etree.parse(io.BytesIO(data), parser, base_url=file_path)
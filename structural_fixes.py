@@ -0,0 +1,352 @@
+# structural_fixes.py
+
+import io
+import os
+import shutil
+import re
+import tempfile
+from lxml import etree
+from typing import Dict, List, Optional, Tuple
+
+# Importa do projeto local
+from .constants import DEFAULT_ENCODING
+from .verification import run_verification_checks, run_verification_checks_on_tree
+from .backup_store import backup_file
+from .splice_writer import SpliceWriter
+
+# Lógica de correção estrutural sem dependência de interface (usada pela UI e pela CLI)
+
+# --- Funções de Correção Estrutural (Lógica Interna) ---
+
+def _fix_xml_hierarchy_lxml(root: etree._Element, changed_pecas: Optional[List[etree._Element]] = None) -> bool:
+    """Tenta corrigir a hierarquia (IDs/POSICAOs) usando lxml. Retorna True se fez mudanças
+       (e acrescenta as PECAs alteradas em changed_pecas, se informado)."""
+    made_changes = False
+    for peca_idx, peca in enumerate(root.findall(".//PECA")):
+        peca_changed = False
+        # 1. Mover IDs soltos para LISTAID
+        ids_diretos = peca.xpath("./ID")
+        if ids_diretos:
+            listaid = peca.find("./LISTAID")
+            if listaid is None:
+                listaid = etree.Element("LISTAID")
+                peca.insert(peca.index(ids_diretos[0]), listaid)
+                peca_changed = True
+            for id_elem in ids_diretos: listaid.append(id_elem)
+            peca_changed = True
+
+        # 2. Mover POSICAOs soltas para TABELAACO
+        posicoes_diretas = peca.xpath("./POSICAO")
+        if posicoes_diretas:
+            tabelaaco = peca.find("./TABELAACO")
+            if tabelaaco is None:
+                tabelaaco = etree.Element("TABELAACO")
+                peca.insert(peca.index(posicoes_diretas[0]), tabelaaco)
+                peca_changed = True
+            for pos_elem in posicoes_diretas: tabelaaco.append(pos_elem)
+            peca_changed = True
+
+        if peca_changed:
+            made_changes = True
+            if changed_pecas is not None: changed_pecas.append(peca)
+    return made_changes
+
+# --- Reparo Manual do Balanceamento de Tags (streaming) ---
+
+# Bloco lido por vez e tamanho máximo de um único token (tag, comentário, CDATA...)
+REPAIR_CHUNK_BYTES = 1024 * 1024
+_MAX_TOKEN_BYTES = 1024 * 1024
+
+# Marcação que começa em '<': comentário, CDATA, PI, declaração (<!DOCTYPE...) ou tag.
+# A última alternativa casa um '<' solto, de modo que todo '<' produz um token.
+_TOKEN_RE = re.compile(
+    rb"<(?:!--.*?-->|!\[CDATA\[.*?\]\]>|\?.*?\?>|!(?!--|\[CDATA\[)(?:[^>\[]|\[[^\]]*\])*>"
+    rb"|(/?)([A-Za-z_:][-\w.:]*)((?:[^<>\"']|\"[^\"<]*\"|'[^'<]*')*|[^<>]*)>|)", re.S)
+_TAG_START_RE = re.compile(rb"<[/!?A-Za-z_:]")
+# Atributos válidos de uma tag de abertura (inclusive a barra de <TAG/>)
+_ATTRS_RE = re.compile(rb"(?:\s+[A-Za-z_:][-\w.:]*\s*=\s*(?:\"[^\"<]*\"|'[^'<]*'))*\s*/?")
+
+class _TagBalanceRepairer:
+    """
+    Reescreve um XML em uma única passada, em blocos, mantendo a pilha de tags abertas:
+    - fechamento de um ancestral fecha antes os elementos internos ainda abertos;
+    - abertura de uma tag já aberta (nenhum elemento Tekla contém a si mesmo) ou
+      abertura logo após o texto de uma folha (não há conteúdo misto) fecha os
+      elementos pendentes;
+    - fechamentos sem abertura correspondente são removidos;
+    - no fim do arquivo (ex.: exportação truncada), uma tag incompleta é descartada
+      e as tags ainda abertas são fechadas.
+    Trechos sem alteração são copiados em bloco. A memória usada não depende do
+    tamanho do arquivo (só da profundidade e do bloco).
+    """
+    def __init__(self, src, dst, chunk_bytes: int = REPAIR_CHUNK_BYTES):
+        self.src = src
+        self.dst = dst
+        self.chunk_bytes = chunk_bytes
+        self.stack: List[bytes] = []      # Tags abertas (a mais interna no fim)
+        self.has_text: List[Optional[bool]] = [] # Elemento já tem texto (None: tem filhos, regra não se aplica)
+        self.open_counts: Dict[bytes, int] = {}
+        self.inserted: Dict[str, int] = {} # tag -> fechamentos inseridos
+        self.removed: Dict[str, int] = {}  # tag -> fechamentos sem abertura removidos
+        self.truncated_token = False
+        self.escaped_lt = 0
+        self.invalid_tags = 0
+        self._buf = b""
+        self._copy_from = 0 # Início do trecho do bloco ainda não copiado para dst
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.removed or self.truncated_token or self.escaped_lt or self.invalid_tags)
+
+    def run(self):
+        carry = b""
+        eof = False
+        while not eof:
+            chunk = self.src.read(self.chunk_bytes)
+            eof = not chunk
+            buf = self._buf = carry + chunk
+            self._copy_from = 0
+            # Sem o fim do arquivo, o último '<' pode iniciar um token incompleto
+            limit = len(buf) if eof else buf.rfind(b"<")
+            if limit < 0: limit = len(buf)
+            stop = self._scan(buf, limit, eof)
+            self._flush(stop)
+            carry = buf[stop:]
+            if not eof and len(carry) > _MAX_TOKEN_BYTES:
+                # Nunca se completa: trata o '<' como texto
+                self.dst.write(b"&lt;")
+                self.escaped_lt += 1
+                carry = carry[1:]
+        if self.stack:
+            self.dst.write(b"\n")
+            self._close_until(0, b"\n")
+
+    def _scan(self, buf: bytes, limit: int, eof: bool) -> int:
+        """Processa os tokens que começam antes de limit; retorna onde parou."""
+        stack = self.stack
+        has_text = self.has_text
+        pos = 0
+        for match in _TOKEN_RE.finditer(buf):
+            start = match.start()
+            if start > pos and has_text and has_text[-1] is False and not buf[pos:start].isspace():
+                has_text[-1] = True
+            if start >= limit:
+                return start
+            name = match.group(2)
+            if name is not None:
+                closing = match.group(1)
+                attrs = match.group(3)
+                if closing and not attrs and stack and stack[-1] == name:
+                    stack.pop() # Caso comum: fecha o elemento atual
+                    has_text.pop()
+                    self.open_counts[name] -= 1
+                else:
+                    empty = not closing and attrs.endswith(b"/")
+                    valid = not attrs or (not attrs.strip() if closing else _ATTRS_RE.fullmatch(attrs))
+                    kept = self._close(name, start, match.end()) if closing else self._open(name, start, empty)
+                    if kept and not valid:
+                        # Tag com lixo no lugar dos atributos: mantém só o nome
+                        self._flush(start)
+                        self.dst.write(b"<" + closing + name + (b"/>" if empty else b">"))
+                        self._copy_from = match.end()
+                        self.invalid_tags += 1
+            elif match.end() - start == 1:
+                # '<' que não forma token completo
+                next_char = buf[start + 1:start + 2]
+                if not eof and next_char in (b"!", b"?"):
+                    return start # Comentário/CDATA/PI incompleto: espera o próximo bloco
+                if eof and _TAG_START_RE.match(buf, start) and buf.find(b"<", start + 1) < 0:
+                    self.truncated_token = True # Tag cortada no fim do arquivo
+                    self._flush(start)
+                    self._copy_from = len(buf)
+                    return len(buf)
+                self._escape_lt(start)
+            elif has_text and has_text[-1] is False and buf.startswith(b"<![CDATA[", start):
+                has_text[-1] = True
+            pos = match.end()
+        if has_text and has_text[-1] is False and pos < len(buf) and not buf[pos:].isspace():
+            has_text[-1] = True
+        return len(buf)
+
+    def _flush(self, end: int):
+        """Copia para dst o trecho pendente do bloco até end."""
+        if end > self._copy_from:
+            self.dst.write(self._buf[self._copy_from:end])
+        self._copy_from = max(self._copy_from, end)
+
+    def _escape_lt(self, start: int):
+        self._flush(start)
+        self.dst.write(b"&lt;")
+        self._copy_from = start + 1
+        self.escaped_lt += 1
+        if self.has_text and self.has_text[-1] is False: self.has_text[-1] = True
+
+    def _open(self, name: bytes, start: int, empty: bool) -> bool:
+        if len(self.stack) > 1 and self.has_text[-1]:
+            # Folha com texto seguida de abertura: a folha não foi fechada
+            self._flush(start)
+            self._close_until(len(self.stack) - 1)
+        if self.open_counts.get(name):
+            self._flush(start)
+            depth = len(self.stack) - 1
+            while self.stack[depth] != name: depth -= 1
+            self._close_until(depth)
+        if self.stack:
+            self.has_text[-1] = None
+        if not empty:
+            self.stack.append(name)
+            self.has_text.append(False)
+            self.open_counts[name] = self.open_counts.get(name, 0) + 1
+        return True
+
+    def _close(self, name: bytes, start: int, end: int) -> bool:
+        """Trata um fechamento fora do caso comum; retorna False se ele foi descartado."""
+        self._flush(start)
+        if not self.open_counts.get(name):
+            tag = name.decode(DEFAULT_ENCODING)
+            self.removed[tag] = self.removed.get(tag, 0) + 1
+            self._copy_from = end # Descarta o fechamento
+            return False
+        depth = len(self.stack) - 1
+        while self.stack[depth] != name: depth -= 1
+        self._close_until(depth + 1) # Fecha os internos ainda abertos
+        self._pop()
+        return True
+
+    def _close_until(self, depth: int, separator: bytes = b""):
+        """Insere fechamentos até a pilha ter 'depth' elementos."""
+        while len(self.stack) > depth:
+            name = self.stack[-1]
+            self.dst.write(b"</" + name + b">" + separator)
+            tag = name.decode(DEFAULT_ENCODING)
+            self.inserted[tag] = self.inserted.get(tag, 0) + 1
+            self._pop()
+
+    def _pop(self):
+        name = self.stack.pop()
+        self.has_text.pop()
+        self.open_counts[name] -= 1
+
+    def messages(self) -> List[Tuple[str, str, str]]:
+        location = "Correção Manual Estrutura"
+        messages = [("Info", f"Adicionada(s) {count} tag(s) de fechamento ausente(s) </{tag}>.", location)
+                    for tag, count in self.inserted.items()]
+        messages += [("Info", f"Removida(s) {count} tag(s) </{tag}> sem abertura correspondente.", location)
+                     for tag, count in self.removed.items()]
+        if self.truncated_token:
+            messages.append(("Info", "Removida tag incompleta no fim do arquivo (arquivo truncado).", location))
+        if self.escaped_lt:
+            messages.append(("Info", f"{self.escaped_lt} caractere(s) '<' sem tag válida substituído(s) por '&lt;'.", location))
+        if self.invalid_tags:
+            messages.append(("Info", f"{self.invalid_tags} tag(s) com atributos inválidos reescrita(s) só com o nome.", location))
+        return messages
+
+def _fix_xml_structure_manual_text(file_path: str) -> Tuple[bool, List[Tuple[str, str, str]]]:
+    """Tenta corrigir o balanceamento das tags via texto, em streaming (_TagBalanceRepairer),
+       gravando em um arquivo temporário que substitui o original só se houve mudança.
+       Retorna (True/False se mudou, lista de mensagens geradas)."""
+    messages = [] # (type, description, location)
+    temp_path = None
+    try:
+        directory = os.path.dirname(os.path.abspath(file_path))
+        with open(file_path, 'rb') as src, tempfile.NamedTemporaryFile('wb', dir=directory, suffix='.tmp', delete=False) as dst:
+            temp_path = dst.name
+            repairer = _TagBalanceRepairer(src, dst)
+            repairer.run()
+        messages.extend(repairer.messages())
+        if not repairer.changed:
+            return False, messages
+        try:
+            shutil.copymode(file_path, temp_path)
+            os.replace(temp_path, file_path)
+            temp_path = None
+            messages.append(("Info", "Arquivo modificado por correção estrutural manual.", "Correção Manual Estrutura"))
+            return True, messages
+        except Exception as e:
+            messages.append(("Erro", f"Erro ao salvar arquivo após correção manual: {e}", "Escrita Pós-Manual"))
+            return False, messages
+
+    except Exception as e:
+        messages.append(("Erro", f"Erro inesperado durante correção estrutural manual: {str(e)}", "Correção Manual Estrutura"))
+        return False, messages
+    finally:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def _fix_single_file_structure(file_path: str, backup: bool) -> Tuple[bool, List[Tuple[str, str, str]]]:
+    """Coordena a correção estrutural para um arquivo, tentando lxml e fallback manual.
+       Retorna (True/False se alguma correção foi feita e salva, lista de mensagens)."""
+    fixed, messages, _, _ = _fix_structure_in_memory(file_path, backup)
+    return fixed, messages
+
+def fix_and_verify_file_structure(file_path: str, backup: bool) -> Tuple[bool, List[Tuple[str, str, str]], List[Tuple[str, str, str, str]]]:
+    """
+    Corrige a estrutura e revalida o arquivo em uma única passada: o arquivo é lido
+    uma vez, a árvore corrigida é verificada em memória e gravada uma única vez.
+    Retorna (corrigido, mensagens da correção, resultados da verificação).
+    """
+    fixed, messages, tree, error_log = _fix_structure_in_memory(file_path, backup)
+    if tree is None:
+        # Sem árvore utilizável (fallback manual ou falha): verifica o que está no disco
+        return fixed, messages, run_verification_checks(file_path)
+    return fixed, messages, run_verification_checks_on_tree(file_path, tree, error_log)
+
+def _fix_structure_in_memory(file_path: str, backup: bool):
+    """
+    Lê o arquivo uma vez, guarda o backup desses bytes (backup_store), corrige a hierarquia
+    em memória e grava o resultado (só se houve mudança; só as PECAs alteradas são
+    reescritas, o resto do arquivo é mantido byte a byte).
+    Retorna (corrigido, mensagens, árvore correspondente ao arquivo gravado ou None, error_log).
+    """
+    messages = [] # (type, description, location)
+
+    try:
+        with open(file_path, 'rb') as f: data = f.read()
+    except Exception as e:
+        messages.append(("Erro", f"Erro ao ler arquivo: {e}. Correção estrutural abortada.", "Correção Estrutural"))
+        return False, messages, None, None
+
+    # --- Backup ---
+    if backup:
+        try:
+            backup_file(file_path, data, "Correção Estrutural")
+        except Exception as e:
+             messages.append(("Erro", f"Falha ao criar backup: {e}. Correção estrutural abortada.", "Backup"))
+             return False, messages, None, None
+
+    # --- Tentativa de Correção com lxml ---
+    try:
+        parser = etree.XMLParser(remove_blank_text=False, recover=True, encoding=DEFAULT_ENCODING)
+        tree = etree.parse(io.BytesIO(data), parser, base_url=file_path)
+        error_log = parser.error_log
+
+        changed_pecas = []
+        if not _fix_xml_hierarchy_lxml(tree.getroot(), changed_pecas):
+            # Nada a gravar: a árvore já corresponde ao arquivo
+            return False, messages, tree, error_log
+
+        try:
+            writer = SpliceWriter(data)
+            for peca in changed_pecas: writer.replace_element(peca)
+            # Árvore recuperada de XML mal formado não corresponde aos bytes: grava inteira
+            writer.write(file_path, tree, want_tree=True, splice=len(error_log) == 0)
+            messages.append(("Info", "Hierarquia XML corrigida (IDs/POSICAOs movidos).", "Correção Estrutural lxml"))
+        except Exception as e:
+             messages.append(("Erro", f"Erro ao salvar arquivo após correção lxml: {e}", "Escrita Pós-lxml"))
+             return False, messages, None, None # Falha crítica ao salvar
+
+        # As linhas mudam: a árvore verificada é a dos bytes gravados (já analisada pelo writer)
+        return True, messages, writer.tree, None
+
+    except etree.XMLSyntaxError as e:
+        # lxml falhou completamente, tentar correção manual
+        messages.append(("Aviso", f"lxml falhou no parsing inicial (Erro: {e}). Tentando correção estrutural manual.", "Correção Manual Fallback"))
+        manual_fixed, manual_messages = _fix_xml_structure_manual_text(file_path)
+        messages.extend(manual_messages)
+        return manual_fixed, messages, None, None # Retorna o resultado da tentativa manual
+
+    except Exception as e_lxml:
+        # Outro erro durante o processamento com lxml
+        messages.append(("Erro", f"Erro inesperado durante correção estrutural com lxml: {e_lxml}", "Correção Estrutural lxml"))
+        # Tentar correção manual mesmo assim? Ou considerar falha? Considerar falha por segurança.
+        return False, messages, None, None
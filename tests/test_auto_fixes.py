@@ -0,0 +1,41 @@
+# tests/test_auto_fixes.py
+
+from ..auto_fixes import auto_fix_file
+from ..structural_fixes import fix_and_verify_file_structure
+
+_MIXED_IDS = """<?xml version='1.0' encoding='ISO-8859-1'?>
+<DETALHAMENTOTEKLA>
+  <PECA>
+    <NOMEPECA>P1</NOMEPECA>
+    <QUANTIDADE>{quantidade}</QUANTIDADE>
+    <ID>ID3</ID>
+    <LISTAID>
+      <ID>ID1</ID>
+      <ID>ID2</ID>
+    </LISTAID>
+  </PECA>
+</DETALHAMENTOTEKLA>
+"""
+
+def _write(tmp_path, quantidade):
+    file_path = tmp_path / "misto.xml"
+    file_path.write_text(_MIXED_IDS.format(quantidade=quantidade), encoding="iso-8859-1")
+    return str(file_path)
+
+def _quantity_errors(results):
+    return [r for r in results if "não corresponde à QUANTIDADE" in r[2]]
+
+def test_quantidade_ids_counts_direct_ids(tmp_path):
+    # IDs soltos e em LISTAID: a quantidade correta (3) não é alterada
+    file_path = _write(tmp_path, 3)
+    report, _ = auto_fix_file(file_path, ("quantidade_ids",), verify=False)
+    assert report.changes == []
+    _, _, results = fix_and_verify_file_structure(file_path, backup=False)
+    assert _quantity_errors(results) == []
+
+def test_quantidade_ids_mixed_then_structural_fix(tmp_path):
+    file_path = _write(tmp_path, 5)
+    report, _ = auto_fix_file(file_path, ("quantidade_ids",), verify=False)
+    assert [(rule, new) for rule, _, _, new in report.changes] == [("quantidade_ids", "3")]
+    _, _, results = fix_and_verify_file_structure(file_path, backup=False)
+    assert _quantity_errors(results) == []
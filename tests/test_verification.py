@@ -0,0 +1,38 @@
+# tests/test_verification.py
+
+import pytest
+
+from ..verification import run_verification_checks
+
+def _peca(n):
+    return (f"  <PECA>\n    <NOMEPECA>P{n}</NOMEPECA>\n    <QUANTIDADE>2</QUANTIDADE>\n"
+            f"    <COMPRIMENTO>1,5</COMPRIMENTO>\n    <LISTAID>\n      <ID>ID{n}</ID>\n      <ID>ID{n % 3}</ID>\n"
+            f"    </LISTAID>\n    <TABELAACO>\n      <POSICAO><POS>N1</POS><QTDE>0</QTDE></POSICAO>\n"
+            f"    </TABELAACO>\n  </PECA>\n")
+
+_DOCUMENT = ("<?xml version='1.0' encoding='ISO-8859-1'?>\n<DETALHAMENTOTEKLA>\n"
+             + "".join(_peca(n) for n in range(6)) + "</DETALHAMENTOTEKLA>\n")
+
+def _both_modes(file_path):
+    def rows(streaming):
+        return [(r_type, desc, str(loc)) for _, r_type, desc, loc in run_verification_checks(file_path, streaming=streaming)]
+    return rows(False), rows(True)
+
+@pytest.mark.parametrize("cut", [
+    _DOCUMENT.index("<QUANTIDADE>", 400) + 4,            # Dentro de uma tag
+    _DOCUMENT.index("</TABELAACO>", 600),                 # Entre tags
+    len(_DOCUMENT) - len("</DETALHAMENTOTEKLA>\n") + 5,   # Na tag raiz
+])
+def test_streaming_matches_in_memory_on_truncated_file(tmp_path, cut):
+    file_path = tmp_path / "truncado.xml"
+    file_path.write_text(_DOCUMENT[:cut], encoding="iso-8859-1")
+    in_memory, streaming = _both_modes(str(file_path))
+    assert any("XML com problema" in desc for _, desc, _ in in_memory)
+    assert streaming == in_memory
+
+def test_streaming_matches_in_memory_on_nested_pecas(tmp_path):
+    # </PECA> ausente: as PECAs seguintes ficam aninhadas na primeira
+    file_path = tmp_path / "aninhado.xml"
+    file_path.write_text(_DOCUMENT.replace("</PECA>", "", 1), encoding="iso-8859-1")
+    in_memory, streaming = _both_modes(str(file_path))
+    assert streaming == in_memory
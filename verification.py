@@ -2,14 +2,25 @@
 
 import os
 import re
+import time
+import functools
 from lxml import etree
-from typing import List, Tuple, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
 
 # Importa constantes do módulo local
 from .constants import (
     REQUIRED_FIELDS, NUMERIC_FIELDS, DEFAULT_ENCODING,
-    ALLOWED_MULTIPLE_PECA_CHILDREN
+    ALLOWED_MULTIPLE_PECA_CHILDREN, STREAMING_THRESHOLD_BYTES
 )
+from .parallel import order_largest_first, run_in_process_pool
+from .cache import VerificationCache, file_digest, lookup_cached_results
+from .profiling import VerificationProfile
+from .prescreen import PrescreenReport, prescreen_files
+from .location import Location, LINE_COLUMN, LINE_EXACT, LINE_ONLY
+
+# Evita importação circular para type hinting
+if TYPE_CHECKING:
+    from .batch_index import BatchIdIndex
 
 # --- Funções Auxiliares (Específicas da Verificação) ---
 
@@ -20,39 +31,26 @@ def _get_element_line(element) -> Optional[int]:
     except Exception:
         return None
 
-def _format_location(element, base_path: str) -> str:
-    """Formata a string de localização incluindo a linha, se disponível."""
-    line = _get_element_line(element)
-    if line is not None:
-        return f"{base_path} (Linha {line})"
-    else:
-        # Tenta a linha do pai se a do elemento falhar
-        parent = element.getparent()
-        if parent is not None:
-            parent_line = _get_element_line(parent)
-            if parent_line is not None:
-                return f"{base_path} (Próximo à Linha {parent_line})"
-    return base_path # Retorna só o path se não achar linha
-
 # --- Funções de Verificação Específicas (Checks) ---
 # Estas funções agora retornam uma lista de tuplas de erro/aviso encontradas
-# (type: str, description: str, location_str: str)
+# (type: str, description: str, location: Location); a localização só é montada
+# quando há problema e só vira texto ao ser exibida
 
-def _check_ids_vs_pecas(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, str]]:
+def _check_ids_vs_pecas(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, Location]]:
     results = []
-    peca_location_base = f"PECA[{peca_idx+1}]"
+    peca_no = peca_idx + 1
 
     quantidade_elem = peca.find("./QUANTIDADE")
     if quantidade_elem is None or not quantidade_elem.text:
-        loc = _format_location(peca, peca_location_base) # Localização da PECA se QUANTIDADE falta
+        loc = Location.of(peca, peca_no) # Localização da PECA se QUANTIDADE falta
         results.append(("Erro", "Campo 'QUANTIDADE' não encontrado ou vazio", loc))
         return results # Não pode continuar sem quantidade
 
     try:
         quantidade_text = quantidade_elem.text.strip().replace(',', '.')
         quantidade = int(float(quantidade_text))
-    except (ValueError, TypeError):
-        loc = _format_location(quantidade_elem, f"{peca_location_base}/QUANTIDADE")
+    except (ValueError, TypeError, OverflowError):
+        loc = Location.of(quantidade_elem, peca_no, "/QUANTIDADE")
         results.append(("Erro", f"Valor de QUANTIDADE ('{quantidade_elem.text}') não é um número inteiro válido", loc))
         return results # Não pode comparar IDs se quantidade é inválida
 
@@ -61,32 +59,28 @@ def _check_ids_vs_pecas(peca: etree._Element, peca_idx: int) -> List[Tuple[str,
 
     if num_ids_peca != quantidade:
         listaid_elem = peca.find("./LISTAID")
-        base_loc = f"{peca_location_base}/LISTAID"
-        loc = _format_location(listaid_elem, base_loc) if listaid_elem is not None else _format_location(peca, peca_location_base)
+        loc = Location.of(listaid_elem, peca_no, "/LISTAID") if listaid_elem is not None else Location.of(peca, peca_no)
         results.append(("Erro", f"Número de IDs em LISTAID ({num_ids_peca}) não corresponde à QUANTIDADE ({quantidade})", loc))
 
     return results
 
-def _check_required_fields(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, str]]:
+def _check_required_fields(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, Location]]:
     results = []
-    peca_location_base = f"PECA[{peca_idx+1}]"
+    peca_no = peca_idx + 1
     for field in REQUIRED_FIELDS:
         elem = peca.find(f"./{field}")
-        loc_path = f"{peca_location_base}/{field}"
         if elem is None:
-            loc = _format_location(peca, peca_location_base) # Localização da PECA se campo falta
+            loc = Location.of(peca, peca_no) # Localização da PECA se campo falta
             results.append(("Erro", f"Campo obrigatório '{field}' não encontrado", loc))
-        else:
-            loc = _format_location(elem, loc_path)
-            if elem.text is None:
-                results.append(("Erro", f"Campo obrigatório '{field}' está vazio (nulo)", loc))
-            elif not elem.text.strip():
-                results.append(("Erro", f"Campo obrigatório '{field}' contém apenas espaços", loc))
+        elif elem.text is None:
+            results.append(("Erro", f"Campo obrigatório '{field}' está vazio (nulo)", Location.of(elem, peca_no, f"/{field}")))
+        elif not elem.text.strip():
+            results.append(("Erro", f"Campo obrigatório '{field}' contém apenas espaços", Location.of(elem, peca_no, f"/{field}")))
     return results
 
-def _check_numeric_fields(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, str]]:
+def _check_numeric_fields(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, Location]]:
     results = []
-    peca_location_base = f"PECA[{peca_idx+1}]"
+    peca_no = peca_idx + 1
     for field in NUMERIC_FIELDS:
         elem = peca.find(f"./{field}")
         if elem is not None and elem.text:
@@ -94,15 +88,14 @@ def _check_numeric_fields(peca: etree._Element, peca_idx: int) -> List[Tuple[str
                 clean_text = elem.text.strip().replace(',', '.')
                 float(clean_text)
             except (ValueError, TypeError):
-                loc = _format_location(elem, f"{peca_location_base}/{field}")
+                loc = Location.of(elem, peca_no, f"/{field}")
                 results.append(("Erro", f"Campo '{field}' contém valor não numérico: '{elem.text}'", loc))
     return results
 
-def _check_zero_qty_in_aco(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, str]]:
+def _check_zero_qty_in_aco(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, Location]]:
     results = []
-    peca_location_base = f"PECA[{peca_idx+1}]"
+    peca_no = peca_idx + 1
     for pos_idx, posicao in enumerate(peca.findall(".//TABELAACO/POSICAO")):
-        posicao_location_base = f"{peca_location_base}/TABELAACO/POSICAO[{pos_idx+1}]"
         qtde_elem = posicao.find("./QTDE")
         if qtde_elem is not None and qtde_elem.text:
             try:
@@ -110,133 +103,666 @@ def _check_zero_qty_in_aco(peca: etree._Element, peca_idx: int) -> List[Tuple[st
                 if qtde_valor == 0:
                     pos_elem = posicao.find("./POS")
                     pos_text = pos_elem.text.strip() if pos_elem is not None and pos_elem.text else f"Posição {pos_idx+1}"
-                    loc = _format_location(qtde_elem, f"{posicao_location_base}/QTDE")
+                    loc = Location.of(qtde_elem, peca_no, f"/TABELAACO/POSICAO[{pos_idx+1}]/QTDE")
                     results.append(("Aviso", f"Armadura '{pos_text}' com quantidade zero (QTDE=0)", loc))
             except (ValueError, TypeError):
                 pass # Erro numérico já pego por _check_numeric_fields
     return results
 
-def _check_duplicated_fields(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, str]]:
+def _check_duplicated_fields(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, Location]]:
     results = []
-    peca_location_base = f"PECA[{peca_idx+1}]"
+    peca_no = peca_idx + 1
     tag_counts = {}
-    first_occurrence_location = {}
+    first_occurrence = {}
 
     for child in peca:
         if isinstance(child.tag, str):
             tag = child.tag
             if tag not in ALLOWED_MULTIPLE_PECA_CHILDREN:
                 tag_counts[tag] = tag_counts.get(tag, 0) + 1
-                if tag not in first_occurrence_location:
-                     loc_path = f"{peca_location_base}/{tag}"
-                     first_occurrence_location[tag] = _format_location(child, loc_path)
+                if tag not in first_occurrence:
+                     first_occurrence[tag] = child
 
     for tag, count in tag_counts.items():
         if count > 1:
-            loc = first_occurrence_location.get(tag, _format_location(peca, peca_location_base))
+            loc = Location.of(first_occurrence[tag], peca_no, f"/{tag}")
             results.append(("Erro", f"Campo '{tag}' aparece {count} vezes (deveria ser único sob PECA)", loc))
     return results
 
-def _check_xml_hierarchy(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, str]]:
+def _check_xml_hierarchy(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, Location]]:
     results = []
-    peca_location_base = f"PECA[{peca_idx+1}]"
-    peca_loc_str = _format_location(peca, peca_location_base)
+    peca_no = peca_idx + 1
 
     ids_diretos = peca.xpath("./ID")
     if ids_diretos:
-        loc = _format_location(ids_diretos[0], f"{peca_location_base}/ID")
+        loc = Location.of(ids_diretos[0], peca_no, "/ID")
         results.append(("Erro", "Encontrado(s) tag(s) <ID> diretamente sob <PECA>. Devem estar dentro de <LISTAID>.", loc))
 
     listaid = peca.find("./LISTAID")
     if listaid is None and peca.xpath(".//ID"):
-         results.append(("Erro", "Tag <LISTAID> não encontrada diretamente sob <PECA>, mas existem IDs na peça.", peca_loc_str))
+         results.append(("Erro", "Tag <LISTAID> não encontrada diretamente sob <PECA>, mas existem IDs na peça.", Location.of(peca, peca_no)))
 
     posicoes_diretas = peca.xpath("./POSICAO")
     if posicoes_diretas:
-        loc = _format_location(posicoes_diretas[0], f"{peca_location_base}/POSICAO")
+        loc = Location.of(posicoes_diretas[0], peca_no, "/POSICAO")
         results.append(("Erro", "Encontrado(s) tag(s) <POSICAO> diretamente sob <PECA>. Devem estar dentro de <TABELAACO>.", loc))
 
     tabelaaco = peca.find("./TABELAACO")
     if tabelaaco is None and peca.xpath(".//POSICAO"):
-         results.append(("Erro", "Tag <TABELAACO> não encontrada diretamente sob <PECA>, mas existem POSICOES na peça.", peca_loc_str))
+         results.append(("Erro", "Tag <TABELAACO> não encontrada diretamente sob <PECA>, mas existem POSICOES na peça.", Location.of(peca, peca_no)))
 
     return results
 
-def _check_global_duplicate_ids(root: etree._Element) -> List[Tuple[str, str, str]]:
+# --- Motor de Regras Compilado ---
+# Tabela declarativa derivada de constants.py; compilada uma vez em um despachante que
+# percorre os filhos de cada PECA uma única vez e alimenta todas as regras com essa leitura.
+# Produz exatamente os mesmos resultados (e ordem) das funções _check_* acima, exceto que
+# o conteúdo de PECAs aninhadas (recuperação de XML malformado) fica só com elas.
+
+PECA_RULE_TABLE = (
+    # (nome da verificação equivalente, parâmetros derivados das constantes)
+    ("_check_ids_vs_pecas", {"quantity_field": "QUANTIDADE", "container": "LISTAID", "item": "ID"}),
+    ("_check_required_fields", {"fields": tuple(REQUIRED_FIELDS)}),
+    ("_check_numeric_fields", {"fields": tuple(NUMERIC_FIELDS)}),
+    ("_check_zero_qty_in_aco", {"container": "TABELAACO", "item": "POSICAO", "quantity_field": "QTDE", "label_field": "POS"}),
+    ("_check_duplicated_fields", {"allowed_multiple": frozenset(ALLOWED_MULTIPLE_PECA_CHILDREN)}),
+    ("_check_xml_hierarchy", {"pairs": (("LISTAID", "ID", "IDs"), ("TABELAACO", "POSICAO", "POSICOES"))}),
+)
+
+class _PecaScan:
+    """Resultado da leitura única dos filhos de uma PECA."""
+    __slots__ = ("first", "counts", "collected", "numbers")
+
+    def __init__(self, peca: etree._Element, collect: frozenset, allowed_multiple: frozenset):
+        first = {}     # tag -> primeiro filho (semântica de peca.find("./TAG"))
+        counts = {}    # tag -> ocorrências (só tags que devem ser únicas), na ordem de aparição
+        collected = {} # tag -> todos os filhos (só contêineres usados pelas regras)
+        for child in peca:
+            tag = child.tag
+            if not isinstance(tag, str): continue # Comentários / instruções de processamento
+            if tag not in allowed_multiple:
+                counts[tag] = counts.get(tag, 0) + 1
+            if tag in collect:
+                if tag in collected: collected[tag].append(child)
+                else: collected[tag] = [child]
+            if tag not in first:
+                first[tag] = child
+        self.first = first
+        self.counts = counts
+        self.collected = collected
+        self.numbers = {} # tag -> float(texto) já convertido (ou None se inválido)
+
+    def number(self, tag: str, elem: etree._Element) -> Optional[float]:
+        """Converte o texto do campo para número uma única vez por PECA."""
+        if tag in self.numbers:
+            return self.numbers[tag]
+        try:
+            value = float(elem.text.strip().replace(',', '.'))
+        except (ValueError, TypeError):
+            value = None
+        self.numbers[tag] = value
+        return value
+
+    def children(self, tag: str) -> List[etree._Element]:
+        """Todos os filhos diretos com a tag (a tag precisa estar entre as coletadas)."""
+        return self.collected.get(tag, [])
+
+class _CompiledPecaRules:
+    """Regras por PECA compiladas a partir de PECA_RULE_TABLE."""
+    def __init__(self, rule_table=PECA_RULE_TABLE):
+        self.collect = frozenset()          # Contêineres cujos filhos as regras percorrem
+        self.allowed_multiple = frozenset() # Tags que podem se repetir sob PECA
+        self.rules = [] # [(nome, função(scan, peca, peca_no, results))]
+        for name, params in rule_table:
+            compiler = getattr(self, f"_compile{name}")
+            self.rules.append((name, compiler(**params)))
+
+    def check(self, peca: etree._Element, peca_idx: int,
+              profile: Optional[VerificationProfile] = None,
+              budget: Optional['_Budget'] = None) -> List[Tuple[str, str, Location]]:
+        """
+        Executa todas as regras com uma única leitura dos filhos da PECA.
+        Com profile, mede a leitura e cada regra separadamente; com budget, aplica
+        o limite de resultados por regra (regras esgotadas deixam de ser executadas).
+        """
+        if profile is not None or budget is not None:
+            return self._check_measured(peca, peca_idx, profile, budget)
+        results = []
+        scan = _PecaScan(peca, self.collect, self.allowed_multiple)
+        peca_no = peca_idx + 1
+        for _, rule in self.rules:
+            rule(scan, peca, peca_no, results)
+        return results
+
+    def _check_measured(self, peca, peca_idx, profile, budget):
+        results = []
+        start = time.perf_counter()
+        scan = _PecaScan(peca, self.collect, self.allowed_multiple)
+        peca_no = peca_idx + 1
+        now = time.perf_counter()
+        if profile is not None:
+            profile.add("_scan_peca_children", now - start)
+        for name, rule in self.rules:
+            if budget is not None and name in budget.exhausted:
+                continue
+            before = len(results)
+            rule(scan, peca, peca_no, results)
+            if budget is not None:
+                budget.admit(name, results, before)
+            if profile is not None:
+                start, now = now, time.perf_counter()
+                profile.add(name, now - start)
+        return results
+
+    def _compile_check_ids_vs_pecas(self, quantity_field, container, item):
+        missing_msg = f"Campo '{quantity_field}' não encontrado ou vazio"
+        self.collect |= {container}
+        def rule(scan, peca, peca_no, results):
+            quantidade_elem = scan.first.get(quantity_field)
+            if quantidade_elem is None or not quantidade_elem.text:
+                results.append(("Erro", missing_msg, Location.of(peca, peca_no)))
+                return
+            value = scan.number(quantity_field, quantidade_elem)
+            try:
+                quantidade = int(value)
+            except (ValueError, TypeError, OverflowError):
+                loc = Location.of(quantidade_elem, peca_no, f"/{quantity_field}")
+                results.append(("Erro", f"Valor de {quantity_field} ('{quantidade_elem.text}') não é um número inteiro válido", loc))
+                return
+            containers = scan.children(container)
+            num_ids_peca = 0
+            for container_elem in containers:
+                for _ in container_elem.iterchildren(item): num_ids_peca += 1
+            if num_ids_peca != quantidade:
+                loc = Location.of(containers[0], peca_no, f"/{container}") if containers else Location.of(peca, peca_no)
+                results.append(("Erro", f"Número de IDs em {container} ({num_ids_peca}) não corresponde à {quantity_field} ({quantidade})", loc))
+        return rule
+
+    def _compile_check_required_fields(self, fields):
+        # Mensagens e sufixos de caminho pré-montados por campo
+        compiled = [(field, f"/{field}", f"Campo obrigatório '{field}' não encontrado",
+                     f"Campo obrigatório '{field}' está vazio (nulo)", f"Campo obrigatório '{field}' contém apenas espaços")
+                    for field in fields]
+        def rule(scan, peca, peca_no, results):
+            first = scan.first
+            for field, suffix, missing_msg, null_msg, blank_msg in compiled:
+                elem = first.get(field)
+                if elem is None:
+                    results.append(("Erro", missing_msg, Location.of(peca, peca_no)))
+                else:
+                    text = elem.text
+                    # A localização só é montada quando há problema
+                    if text is None:
+                        results.append(("Erro", null_msg, Location.of(elem, peca_no, suffix)))
+                    elif not text.strip():
+                        results.append(("Erro", blank_msg, Location.of(elem, peca_no, suffix)))
+        return rule
+
+    def _compile_check_numeric_fields(self, fields):
+        compiled = [(field, f"/{field}") for field in fields]
+        def rule(scan, peca, peca_no, results):
+            first = scan.first
+            for field, suffix in compiled:
+                elem = first.get(field)
+                if elem is not None and elem.text and scan.number(field, elem) is None:
+                    loc = Location.of(elem, peca_no, suffix)
+                    results.append(("Erro", f"Campo '{field}' contém valor não numérico: '{elem.text}'", loc))
+        return rule
+
+    def _compile_check_zero_qty_in_aco(self, container, item, quantity_field, label_field):
+        def rule(scan, peca, peca_no, results):
+            pos_idx = 0
+            # Contêineres em qualquer profundidade (.//TABELAACO/POSICAO), não só filhos diretos
+            for container_elem in _own_descendants(peca, container):
+                for posicao in container_elem.iterchildren(item):
+                    pos_idx += 1
+                    qtde_elem = posicao.find(quantity_field)
+                    if qtde_elem is None or not qtde_elem.text: continue
+                    try:
+                        qtde_valor = float(qtde_elem.text.strip().replace(',', '.'))
+                    except (ValueError, TypeError):
+                        continue # Erro numérico já pego por _check_numeric_fields
+                    if qtde_valor == 0:
+                        pos_elem = posicao.find(label_field)
+                        pos_text = pos_elem.text.strip() if pos_elem is not None and pos_elem.text else f"Posição {pos_idx}"
+                        loc = Location.of(qtde_elem, peca_no, f"/{container}/{item}[{pos_idx}]/{quantity_field}")
+                        results.append(("Aviso", f"Armadura '{pos_text}' com quantidade zero (QTDE=0)", loc))
+        return rule
+
+    def _compile_check_duplicated_fields(self, allowed_multiple):
+        self.allowed_multiple |= allowed_multiple
+        def rule(scan, peca, peca_no, results):
+            for tag, count in scan.counts.items():
+                if count > 1:
+                    loc = Location.of(scan.first[tag], peca_no, f"/{tag}")
+                    results.append(("Erro", f"Campo '{tag}' aparece {count} vezes (deveria ser único sob PECA)", loc))
+        return rule
+
+    def _compile_check_xml_hierarchy(self, pairs):
+        compiled = [(container, item,
+                     f"Encontrado(s) tag(s) <{item}> diretamente sob <PECA>. Devem estar dentro de <{container}>.",
+                     f"Tag <{container}> não encontrada diretamente sob <PECA>, mas existem {plural} na peça.")
+                    for container, item, plural in pairs]
+        def rule(scan, peca, peca_no, results):
+            for container, item, direct_msg, missing_msg in compiled:
+                direct = scan.first.get(item)
+                if direct is not None:
+                    results.append(("Erro", direct_msg, Location.of(direct, peca_no, f"/{item}")))
+                # Só desce na subárvore (equivalente a .//ITEM) no caso raro de não haver contêiner nem item direto
+                if container not in scan.first and (direct is not None or _has_own_descendant(peca, item)):
+                    results.append(("Erro", missing_msg, Location.of(peca, peca_no)))
+        return rule
+
+def _own_descendants(peca: etree._Element, tag: str) -> Iterator[etree._Element]:
+    """
+    Descendentes com a tag (equivalente a .//TAG), exceto os de PECAs aninhadas (vindas
+    da recuperação de um </PECA> ausente): o conteúdo delas é verificado por elas mesmas.
+    """
+    for elem in peca.iterdescendants(tag):
+        for ancestor in elem.iterancestors():
+            if ancestor is peca:
+                yield elem
+                break
+            if ancestor.tag == "PECA": break
+
+def _has_own_descendant(peca: etree._Element, tag: str) -> bool:
+    return next(_own_descendants(peca, tag), None) is not None
+
+_compiled_peca_rules: Optional[_CompiledPecaRules] = None
+
+def compile_peca_rules() -> _CompiledPecaRules:
+    """Compila (uma vez por processo) o motor de regras por PECA."""
+    global _compiled_peca_rules
+    if _compiled_peca_rules is None:
+        _compiled_peca_rules = _CompiledPecaRules()
+    return _compiled_peca_rules
+
+def _describe_id_occurrence(peca_ordinal: Optional[int], line: Optional[int]) -> str:
+    """Descrição curta de uma ocorrência de ID: 'PECA[n] (Linha l)'."""
+    where = f"PECA[{peca_ordinal}]" if peca_ordinal is not None else "fora de PECA"
+    return f"{where} (Linha {line})" if line is not None else where
+
+def _id_location(peca_ordinal: Optional[int], line: Optional[int]) -> Location:
+    """Localização de uma ocorrência de ID (mesmo formato dos demais resultados)."""
+    path = "/.../ID" if peca_ordinal is not None else "/ID"
+    return Location(peca_ordinal, path, LINE_EXACT, line) if line is not None else Location(peca_ordinal, path)
+
+class _IdIndex:
+    """
+    Índice hash de IDs construído em uma única passada.
+    Guarda todas as ocorrências de cada valor como (ordinal da PECA, linha);
+    o ordinal é None para IDs fora de PECA.
+    """
+    def __init__(self):
+        # valor -> ocorrência única (tupla) ou lista de ocorrências, se repetido
+        self._occurrences: Dict[str, object] = {}
+
+    def add(self, value: str, peca_ordinal: Optional[int], line: Optional[int]):
+        occurrence = (peca_ordinal, line)
+        current = self._occurrences.get(value)
+        if current is None:
+            self._occurrences[value] = occurrence
+        elif isinstance(current, list):
+            current.append(occurrence)
+        else:
+            self._occurrences[value] = [current, occurrence]
+
+    def add_element(self, elem: etree._Element, peca_ordinal: Optional[int]):
+        if elem.text:
+            self.add(elem.text.strip(), peca_ordinal, _get_element_line(elem))
+
+    def occurrences(self) -> Iterator[Tuple[str, Optional[int], Optional[int]]]:
+        """Itera todas as ocorrências como (valor, ordinal da PECA, linha)."""
+        for value, occurrences in self._occurrences.items():
+            if isinstance(occurrences, list):
+                for peca_ordinal, line in occurrences:
+                    yield value, peca_ordinal, line
+            else:
+                yield (value,) + occurrences
+
+    def duplicates(self):
+        """Itera (valor, ocorrências) dos IDs repetidos, na ordem da primeira ocorrência."""
+        for value, occurrences in self._occurrences.items():
+            if isinstance(occurrences, list):
+                yield value, occurrences
+
+    def duplicate_results(self) -> List[Tuple[str, str, Location]]:
+        results = []
+        for value, occurrences in self.duplicates():
+            described = ", ".join(_describe_id_occurrence(p, l) for p, l in occurrences)
+            loc = _id_location(*occurrences[0])
+            results.append(("Erro", f"ID duplicado encontrado no arquivo: '{value}' ({len(occurrences)} ocorrências: {described})", loc))
+        return results
+
+def _build_id_index(root: etree._Element) -> _IdIndex:
+    """Indexa todos os IDs do documento em uma passada (tempo linear)."""
+    id_index = _IdIndex()
+    peca_stack = [] # Ordinais (base 1) das PECAs abertas; o ID é atribuído à mais externa
+    peca_count = 0
+    for event, elem in etree.iterwalk(root, events=("start", "end"), tag=("PECA", "ID")):
+        if elem.tag == "PECA":
+            if event == "start":
+                peca_count += 1
+                peca_stack.append(peca_count)
+            else:
+                peca_stack.pop()
+        elif event == "end":
+            id_index.add_element(elem, peca_stack[0] if peca_stack else None)
+    return id_index
+
+def _check_global_duplicate_ids(root: etree._Element) -> List[Tuple[str, str, Location]]:
     """Verifica IDs duplicados em todo o documento."""
+    return _build_id_index(root).duplicate_results()
+
+
+# --- Limites de Verificação ---
+
+class VerificationLimits:
+    """
+    Limites opcionais da verificação de um arquivo (None = sem limite):
+    máximo de problemas por arquivo, máximo por verificação (_check_*) e tempo
+    máximo em segundos. Ao atingir um limite a verificação para (ou a regra deixa
+    de reportar) e um único resultado de resumo informa o truncamento.
+    """
+    def __init__(self, max_issues_per_file: Optional[int] = None, max_issues_per_check: Optional[int] = None,
+                 max_seconds_per_file: Optional[float] = None):
+        self.max_issues_per_file = max_issues_per_file
+        self.max_issues_per_check = max_issues_per_check
+        self.max_seconds_per_file = max_seconds_per_file
+
+    def is_active(self) -> bool:
+        return (self.max_issues_per_file is not None or self.max_issues_per_check is not None
+                or self.max_seconds_per_file is not None)
+
+    def cache_key(self) -> str:
+        """Parte da chave do cache: resultados truncados dependem dos limites de quantidade."""
+        return f"limites:{self.max_issues_per_file}:{self.max_issues_per_check}"
+
+class _Budget:
+    """Contabiliza os limites durante a verificação de um arquivo."""
+    def __init__(self, limits: VerificationLimits):
+        self.limits = limits
+        self.total = 0
+        self.check_counts: Dict[str, int] = {}
+        self.exhausted = set() # Verificações com resultados descartados pelo limite por verificação
+        self.stop_reason: Optional[str] = None
+        self.timed_out = False
+        self.deadline = (time.perf_counter() + limits.max_seconds_per_file
+                         if limits.max_seconds_per_file is not None else None)
+
+    def admit(self, check: str, results: List[Tuple[str, str, Location]], start: int):
+        """Contabiliza results[start:] (gerados por check), descartando o que passar do limite da verificação."""
+        added = len(results) - start
+        if not added: return
+        limit = self.limits.max_issues_per_check
+        count = self.check_counts.get(check, 0)
+        if limit is not None and count + added > limit:
+            # Só conta como truncada quando algo é de fato descartado
+            del results[start + max(0, limit - count):]
+            added = len(results) - start
+            self.exhausted.add(check)
+        self.check_counts[check] = count + added
+        self.total += added
+
+    def should_stop(self) -> bool:
+        """Verdadeiro quando o arquivo atingiu o limite de problemas ou de tempo."""
+        if self.stop_reason is not None:
+            return True
+        max_issues = self.limits.max_issues_per_file
+        if max_issues is not None and self.total > max_issues:
+            self.stop_reason = f"limite de {max_issues} problemas por arquivo atingido"
+        elif self.deadline is not None and time.perf_counter() > self.deadline:
+            self.stop_reason = f"limite de tempo de {self.limits.max_seconds_per_file:g} s por arquivo atingido"
+            self.timed_out = True
+        return self.stop_reason is not None
+
+    def finish(self, results: List[Tuple[str, str, Location]]):
+        """Aplica o limite por arquivo ao total e acrescenta o resumo do truncamento, se houve."""
+        max_issues = self.limits.max_issues_per_file
+        parts = []
+        if self.stop_reason is not None:
+            parts.append(f"{self.stop_reason}; o restante do arquivo não foi verificado")
+        if max_issues is not None and len(results) > max_issues:
+            # Verificações globais (parser, IDs) podem ultrapassar o total
+            del results[max_issues:]
+            if self.stop_reason is None:
+                parts.append(f"limite de {max_issues} problemas por arquivo atingido; resultados excedentes omitidos")
+        if self.exhausted:
+            checks = ", ".join(sorted(self.exhausted))
+            parts.append(f"limite de {self.limits.max_issues_per_check} problemas por verificação atingido em {checks}")
+        if parts:
+            results.append(("Aviso", f"Verificação truncada: {'; '.join(parts)}.", "Geral"))
+
+
+# --- Modos de Verificação ---
+
+def _run_peca_checks(peca: etree._Element, peca_idx: int,
+                     profile: Optional[VerificationProfile] = None,
+                     budget: Optional[_Budget] = None) -> List[Tuple[str, str, Location]]:
+    """Executa todas as verificações de uma PECA pelo motor de regras compilado."""
+    return compile_peca_rules().check(peca, peca_idx, profile, budget)
+
+def _run_peca_checks_legacy(peca: etree._Element, peca_idx: int) -> List[Tuple[str, str, Location]]:
+    """Executa as funções _check_* uma a uma (implementação de referência do motor de regras)."""
     results = []
-    all_id_elems = root.findall(".//ID")
-    all_id_values = [elem.text.strip() for elem in all_id_elems if elem.text]
-    duplicates = set([x for x in all_id_values if all_id_values.count(x) > 1])
-
-    if duplicates:
-        first_occurrence_locations = {}
-        # Encontra a localização da primeira ocorrência de cada duplicado
-        processed_dups = set()
-        for elem in all_id_elems:
-            val = elem.text.strip() if elem.text else ""
-            if val in duplicates and val not in processed_dups:
-                 # Tenta encontrar o caminho relativo à PECA pai
-                 peca_parent = elem.xpath("./ancestor::PECA")
-                 loc_str = "Raiz do Documento" # Default
-                 if peca_parent:
-                     peca_list = root.findall(".//PECA")
-                     try:
-                         peca_idx = peca_list.index(peca_parent[0]) + 1
-                         loc_str = _format_location(elem, f"PECA[{peca_idx}]/.../ID") # Simplificado
-                     except ValueError:
-                         loc_str = _format_location(elem, f"PECA[?]/.../ID")
-                 else: # ID fora de uma PECA?
-                     loc_str = _format_location(elem, f"/{elem.tag}") # Caminho absoluto simplificado
-
-                 first_occurrence_locations[val] = loc_str
-                 processed_dups.add(val)
-
-
-        for dup in duplicates:
-            loc = first_occurrence_locations.get(dup, "Localização Desconhecida")
-            results.append(("Erro", f"ID duplicado encontrado no arquivo: '{dup}'", loc))
+    results.extend(_check_ids_vs_pecas(peca, peca_idx))
+    results.extend(_check_required_fields(peca, peca_idx))
+    results.extend(_check_numeric_fields(peca, peca_idx))
+    results.extend(_check_zero_qty_in_aco(peca, peca_idx))
+    results.extend(_check_duplicated_fields(peca, peca_idx))
+    results.extend(_check_xml_hierarchy(peca, peca_idx))
     return results
 
+# O parser completo acrescenta " line N" a esta mensagem e o incremental (iterparse) não;
+# a linha já está na localização
+_START_TAG_LINE_RE = re.compile(r"^(Couldn't find end of Start Tag \S+) line \d+$")
+
+def _parse_error_results(error_log) -> List[Tuple[str, str, Location]]:
+    """Converte os erros recuperados pelo parser em avisos."""
+    results = []
+    for error in error_log:
+         if "DTD" not in error.message and "Entity" not in error.message:
+            loc = Location(None, "", LINE_COLUMN, error.line, error.column)
+            message = _START_TAG_LINE_RE.sub(r"\1", error.message)
+            results.append(("Aviso", f"XML com problema (ignorado por recover=True): {message}", loc))
+    return results
+
+def _without_end_of_data(error_log) -> list:
+    """
+    Erros do iterparse alinhados aos do parser completo: o incremental sempre acrescenta
+    um "Premature end of data" no fim da entrada com tags abertas, e o completo só o
+    informa quando é o único erro (um erro anterior já encerrou a leitura).
+    """
+    errors = list(error_log)
+    if len(errors) > 1 and errors[-1].message.startswith("Premature end of data"):
+        errors.pop()
+    return errors
+
+def _admit(budget: Optional[_Budget], check: str, results: List[Tuple[str, str, Location]], start: int):
+    if budget is not None:
+        budget.admit(check, results, start)
+
+def _verify_in_memory(file_path: str, results: List[Tuple[str, str, Location]],
+                      profile: Optional[VerificationProfile] = None,
+                      budget: Optional[_Budget] = None) -> _IdIndex:
+    """
+    Verifica o arquivo carregando a árvore inteira (etree.parse). Acrescenta em results
+    e retorna o índice de IDs do arquivo.
+    """
+    start = time.perf_counter()
+    parser = etree.XMLParser(remove_blank_text=False, recover=True, encoding=DEFAULT_ENCODING)
+    tree = etree.parse(file_path, parser)
+    if profile is not None:
+        profile.add("parse", time.perf_counter() - start)
+    return _verify_tree(tree.getroot(), parser.error_log, results, profile, budget)
+
+def _verify_tree(root: etree._Element, error_log, results: List[Tuple[str, str, Location]],
+                 profile: Optional[VerificationProfile] = None,
+                 budget: Optional[_Budget] = None) -> _IdIndex:
+    """Verifica uma árvore já carregada (error_log = erros recuperados do parser, se houver)."""
+    # Adiciona avisos de erros de parsing recuperados
+    if error_log:
+        before = len(results)
+        results.extend(_parse_error_results(error_log))
+        _admit(budget, "_parse_error_results", results, before)
+
+    # Executa verificações globais
+    start = time.perf_counter()
+    id_index = _build_id_index(root)
+    before = len(results)
+    results.extend(id_index.duplicate_results())
+    _admit(budget, "_check_global_duplicate_ids", results, before)
+    if profile is not None:
+        profile.add("_check_global_duplicate_ids", time.perf_counter() - start)
+
+    # Executa verificações por PECA
+    pecas = root.findall(".//PECA")
+    if budget is None or not budget.should_stop():
+        for peca_idx, peca in enumerate(pecas):
+            results.extend(_run_peca_checks(peca, peca_idx, profile, budget))
+            if budget is not None and budget.should_stop():
+                break
+    if profile is not None:
+        profile.pecas = len(pecas)
+    return id_index
+
+def _verify_streaming(file_path: str, results: List[Tuple[str, str, Location]],
+                      profile: Optional[VerificationProfile] = None,
+                      budget: Optional[_Budget] = None) -> _IdIndex:
+    """
+    Verifica o arquivo em uma única passada com etree.iterparse. Acrescenta em results
+    e retorna o índice de IDs do arquivo.
+    Cada PECA é verificada quando se fecha e depois descartada, mantendo a memória
+    limitada. Os resultados (e sua ordem) são os mesmos de _verify_in_memory: PECAs
+    aninhadas (recuperação de um </PECA> ausente) se fecham antes da externa, então
+    seus resultados ficam guardados até que as anteriores na ordem do documento terminem.
+    No perfil, "parse" inclui a indexação dos IDs, feita durante a leitura.
+    """
+    peca_results = []
+    pending: Dict[int, List[Tuple[str, str, Location]]] = {} # Ordinal -> resultados ainda não emitidos
+    next_ordinal = 0 # Próxima PECA a emitir, na ordem do documento
+    id_index = _IdIndex()
+    peca_stack = [] # Índices das PECAs abertas (a mais externa primeiro)
+    peca_count = 0
+    checks_seconds = 0.0 # Tempo das regras dentro do laço (descontado do parsing)
+    start = time.perf_counter()
+
+    context = etree.iterparse(file_path, events=("start", "end"), tag=("PECA", "ID"),
+                              remove_blank_text=False, recover=True, encoding=DEFAULT_ENCODING)
+    for event, elem in context:
+        if elem.tag == "PECA":
+            if event == "start":
+                # Índice atribuído na abertura = ordem de root.findall(".//PECA")
+                peca_stack.append(peca_count)
+                peca_count += 1
+                continue
+            peca_idx = peca_stack.pop()
+            if profile is None:
+                pending[peca_idx] = _run_peca_checks(elem, peca_idx, None, budget)
+            else:
+                check_start = time.perf_counter()
+                pending[peca_idx] = _run_peca_checks(elem, peca_idx, profile, budget)
+                checks_seconds += time.perf_counter() - check_start
+            while next_ordinal in pending:
+                peca_results.extend(pending.pop(next_ordinal))
+                next_ordinal += 1
+            if budget is not None and budget.should_stop():
+                break # O restante do arquivo nem é lido
+            # Libera a subárvore processada (a PECA externa ainda vê a tag da aninhada)
+            elem.clear(keep_tail=True)
+            if not peca_stack:
+                # E as irmãs anteriores já verificadas
+                parent = elem.getparent()
+                if parent is not None:
+                    while elem.getprevious() is not None:
+                        del parent[0]
+        elif event == "end":
+            id_index.add_element(elem, peca_stack[0] + 1 if peca_stack else None)
+
+    for peca_idx in sorted(pending): # Interrompido pelos limites com PECAs externas abertas
+        peca_results.extend(pending[peca_idx])
+    if profile is not None:
+        profile.add("parse", time.perf_counter() - start - checks_seconds)
+        profile.pecas = peca_count
+
+    before = len(results)
+    results.extend(_parse_error_results(_without_end_of_data(context.error_log)))
+    _admit(budget, "_parse_error_results", results, before)
+    start = time.perf_counter()
+    before = len(results)
+    results.extend(id_index.duplicate_results())
+    _admit(budget, "_check_global_duplicate_ids", results, before)
+    if profile is not None:
+        profile.add("_check_global_duplicate_ids", time.perf_counter() - start)
+    results.extend(peca_results)
+    return id_index
+
 
 # --- Função Principal de Verificação ---
 
-def run_verification_checks(file_path: str) -> List[Tuple[str, str, str, str]]:
+def run_verification_checks(file_path: str, streaming: Optional[bool] = None,
+                            profile: Optional[VerificationProfile] = None,
+                            limits: Optional[VerificationLimits] = None) -> List[Tuple[str, str, str, str]]:
     """
     Executa todas as verificações em um único arquivo XML.
-    Retorna uma lista de resultados: [(file_basename, type, description, location_str)]
+    Com streaming=None, o modo streaming é escolhido para arquivos a partir de
+    STREAMING_THRESHOLD_BYTES; True/False força o modo.
+    Com profile (VerificationProfile), registra os tempos de cada etapa.
+    Com limits (VerificationLimits), para cedo ao atingir os limites de problemas
+    ou de tempo e acrescenta um resultado "Verificação truncada".
+    Retorna uma lista de resultados: [(file_basename, type, description, location)]
+    A localização é uma Location (vira texto com str()) ou, em mensagens gerais,
+    uma string como "Geral".
+    """
+    return run_verification_checks_with_ids(file_path, streaming, profile, limits)[0]
+
+def run_verification_checks_on_tree(file_path: str, tree: etree._ElementTree, error_log=None) -> List[Tuple[str, str, str, str]]:
+    """
+    Verifica uma árvore já carregada em memória (ex.: logo após a correção
+    estrutural), sem reler nem reparsear o arquivo. As linhas informadas são as
+    de tree, que devem corresponder ao conteúdo gravado em file_path.
+    error_log: erros recuperados do parser que gerou tree (opcional).
+    """
+    base_name = os.path.basename(file_path)
+    results = []
+    try:
+        _verify_tree(tree.getroot(), error_log, results)
+    except Exception as e:
+        results.append(("Erro", f"Erro inesperado na verificação: {str(e)}", "Geral"))
+    return [(base_name, r_type, desc, loc) for r_type, desc, loc in results]
+
+def run_verification_checks_with_ids(file_path: str, streaming: Optional[bool] = None,
+                                     profile: Optional[VerificationProfile] = None,
+                                     limits: Optional[VerificationLimits] = None) -> Tuple[List[Tuple[str, str, str, str]], List[Tuple[str, Optional[int], Optional[int]]]]:
+    """
+    Igual a run_verification_checks, mas também retorna as ocorrências de ID do
+    arquivo [(valor, ordinal da PECA, linha)], usadas na detecção entre arquivos.
+    Com limites, as ocorrências cobrem só a parte verificada do arquivo.
     """
+    budget = _Budget(limits) if limits is not None and limits.is_active() else None
+    return _run_checks(file_path, streaming, profile, budget)
+
+def _run_checks(file_path: str, streaming: Optional[bool], profile: Optional[VerificationProfile],
+                budget: Optional[_Budget]):
     base_name = os.path.basename(file_path)
-    results = [] # Lista de (type, description, location_str) para este arquivo
+    results = [] # Lista de (type, description, location) para este arquivo
+    id_index = None
+    start = time.perf_counter()
 
     try:
-        parser = etree.XMLParser(remove_blank_text=False, recover=True, encoding=DEFAULT_ENCODING)
-        tree = etree.parse(file_path, parser)
-        root = tree.getroot()
-
-        # Adiciona avisos de erros de parsing recuperados
-        if parser.error_log:
-            for error in parser.error_log:
-                 if "DTD" not in error.message and "Entity" not in error.message:
-                    loc = f"Linha {error.line}, Coluna {error.column}"
-                    results.append(("Aviso", f"XML com problema (ignorado por recover=True): {error.message}", loc))
-
-        # Executa verificações globais
-        results.extend(_check_global_duplicate_ids(root))
-
-        # Executa verificações por PECA
-        pecas = root.findall(".//PECA")
-        for peca_idx, peca in enumerate(pecas):
-            results.extend(_check_ids_vs_pecas(peca, peca_idx))
-            results.extend(_check_required_fields(peca, peca_idx))
-            results.extend(_check_numeric_fields(peca, peca_idx))
-            results.extend(_check_zero_qty_in_aco(peca, peca_idx))
-            results.extend(_check_duplicated_fields(peca, peca_idx))
-            results.extend(_check_xml_hierarchy(peca, peca_idx))
+        file_size = os.path.getsize(file_path)
+        if profile is not None:
+            profile.file_size = file_size
+        if streaming is None:
+            streaming = file_size >= STREAMING_THRESHOLD_BYTES
+        if streaming:
+            id_index = _verify_streaming(file_path, results, profile, budget)
+        else:
+            id_index = _verify_in_memory(file_path, results, profile, budget)
 
     except etree.XMLSyntaxError as e:
         # Erro fatal de parsing
-        results.append(("Erro", f"XML mal formado (erro fatal): {str(e)}", f"Linha {e.lineno}"))
+        results.append(("Erro", f"XML mal formado (erro fatal): {str(e)}", Location(None, "", LINE_ONLY, e.lineno)))
         # Poderia tentar a verificação baseada em texto aqui se necessário
         # results.extend(_check_xml_structure_text(file_path))
 
@@ -244,8 +770,104 @@ def run_verification_checks(file_path: str) -> List[Tuple[str, str, str, str]]:
         # Outro erro inesperado durante a verificação
         results.append(("Erro", f"Erro inesperado na verificação: {str(e)}", "Geral"))
 
+    if budget is not None:
+        budget.finish(results)
+
     # Formata o resultado final adicionando o nome do arquivo base
     final_results = [(base_name, r_type, desc, loc) for r_type, desc, loc in results]
-    return final_results
+    id_occurrences = list(id_index.occurrences()) if id_index is not None else []
+    if profile is not None:
+        profile.total_seconds += time.perf_counter() - start
+    return final_results, id_occurrences
+
+def _verify_file_worker(file_path: str, cache_dir: Optional[str] = None, collect_ids: bool = False,
+                        profile: bool = False, limits: Optional[VerificationLimits] = None):
+    """
+    Worker da verificação em lote.
+    Retorna (chave do cache, resultados, ocorrências de ID, veio_do_cache, perfil ou None).
+    Com cache_dir, calcula o hash do conteúdo e reutiliza resultados já gravados
+    (o worker só lê o cache; a gravação fica com o processo coordenador).
+    Com limites, a chave inclui os limites de quantidade; resultados truncados por
+    tempo não são gravados (chave None), pois dependem da velocidade da máquina.
+    As ocorrências de ID só são devolvidas se necessárias (cache ou collect_ids).
+    """
+    base_name = os.path.basename(file_path)
+    file_profile = VerificationProfile(base_name) if profile else None
+    budget = _Budget(limits) if limits is not None and limits.is_active() else None
+    digest = None
+    if cache_dir is not None:
+        start = time.perf_counter()
+        try:
+            digest = file_digest(file_path)
+            if budget is not None:
+                digest = f"{digest}:{limits.cache_key()}"
+        except OSError:
+            digest = None
+        cached = lookup_cached_results(cache_dir, digest) if digest is not None else None
+        if file_profile is not None:
+            elapsed = time.perf_counter() - start
+            file_profile.add("cache", elapsed)
+            file_profile.total_seconds += elapsed
+        if cached is not None:
+            cached_results, cached_ids = cached
+            if file_profile is not None:
+                file_profile.from_cache = True
+                try: file_profile.file_size = os.path.getsize(file_path)
+                except OSError: pass
+            return digest, [(base_name, r_type, desc, loc) for r_type, desc, loc in cached_results], cached_ids, True, file_profile
+    file_results, id_occurrences = _run_checks(file_path, None, file_profile, budget)
+    if budget is not None and budget.timed_out:
+        digest = None
+    if cache_dir is None and not collect_ids:
+        id_occurrences = None
+    return digest, file_results, id_occurrences, False, file_profile
+
+def run_verification_batch(file_paths: Iterable[str], max_workers: Optional[int] = None,
+                           should_continue: Optional[Callable[[], bool]] = None,
+                           cache: Optional[VerificationCache] = None,
+                           id_index: Optional['BatchIdIndex'] = None,
+                           profiles: Optional[List[VerificationProfile]] = None,
+                           limits: Optional[VerificationLimits] = None,
+                           triage: Optional[List[PrescreenReport]] = None) -> Iterator[Tuple[str, List[Tuple[str, str, str, str]]]]:
+    """
+    Verifica vários arquivos em paralelo (ProcessPoolExecutor), maiores primeiro.
+    Gera (file_path, resultados) à medida que cada arquivo termina.
+    should_continue permite cancelar: retornando False, os arquivos pendentes são descartados.
+    Com cache, arquivos de conteúdo inalterado reutilizam os resultados gravados
+    (cache.hits/cache.misses contabilizam o uso).
+    Com id_index, os IDs de cada arquivo são acumulados no índice do lote para a
+    detecção de duplicados entre arquivos (id_index.duplicate_results()).
+    Com profiles (lista), a verificação é medida e o perfil de cada arquivo é
+    acrescentado à lista (desligado por padrão: as medições têm custo).
+    Com limits (VerificationLimits), cada arquivo é verificado com esses limites.
+    Com triage (lista), é feita antes uma triagem rápida dos bytes (prescreen.py):
+    os relatórios são acrescentados à lista e os arquivos suspeitos vão primeiro.
+    """
+    if triage is not None:
+        reports = prescreen_files(file_paths, max_workers, should_continue)
+        triage.extend(reports)
+        ordered_paths = [report.file_path for report in reports]
+    else:
+        ordered_paths = order_largest_first(file_paths)
+    worker = functools.partial(_verify_file_worker, cache_dir=cache.cache_dir if cache is not None else None,
+                               collect_ids=id_index is not None, profile=profiles is not None, limits=limits)
+    for file_path, output, error in run_in_process_pool(worker, ordered_paths, max_workers, should_continue):
+        if error is not None:
+            # Falha do próprio worker (ex.: processo encerrado)
+            yield file_path, [(os.path.basename(file_path), "Erro", f"Erro inesperado ao processar arquivo: {str(error)}", "Geral")]
+            continue
+        digest, file_results, id_occurrences, from_cache, file_profile = output
+        if profiles is not None and file_profile is not None:
+            profiles.append(file_profile)
+        if cache is not None:
+            if from_cache:
+                cache.record_hit(digest)
+            else:
+                cache.misses += 1
+                if digest is not None:
+                    cache.put(digest, [(r_type, desc, loc) for _, r_type, desc, loc in file_results], id_occurrences)
+        if id_index is not None:
+            id_index.add_file(file_path, id_occurrences)
+        yield file_path, file_results
 
 # (Opcional: Função _check_xml_structure_text(file_path) pode ser adicionada aqui se a verificação baseada em texto for desejada como fallback)
\ No newline at end of file